@@ -0,0 +1,114 @@
+from typing import Any, Dict, List, Optional
+
+from app.db.neo4j_driver import read_all
+from app.db.ratings import RATING_AVG
+from app.services.like_buffer import like_buffer
+
+# Stanje kartice za trenutnog usera (?viewer_id=...) - racuna se u istom upitu kao lista, za recept `r`.
+# Bez viewer_id je null i kartice ostaju kakve su bile. viewer_id u mapi sluzi samo za with_viewer
+# (neupisani lajkovi iz write-behind bafera) i ne ide u odgovor.
+VIEWER_MAP = """
+CASE WHEN $viewer_id IS NULL THEN null ELSE {
+  viewer_id: $viewer_id,
+  like_count: coalesce(r.like_count, 0),
+  rating_avg: """ + RATING_AVG + """,
+  liked_by_me: EXISTS { MATCH (:User {id: $viewer_id})-[:LIKES]->(r) },
+  my_rating: head(COLLECT { MATCH (:User {id: $viewer_id})-[mine:RATED]->(r) RETURN mine.value })
+} END
+"""
+
+
+# Late hydration za liste: upit prvo izabere i poreda stranu samo po kljucu sortiranja
+# (WITH r, <kljuc> ORDER BY ... SKIP/LIMIT), pa se kategorija i sastojci citaju tek za recepte
+# sa strane - cena hidracije zavisi od velicine strane, ne od broja kandidata.
+# Posle fragmenta su u scope-u `category` i `ingredients`; CALL ne menja redosled redova,
+# ali liste i dalje zavrsavaju sa ORDER BY po istom kljucu.
+PAGE_DETAILS = """
+CALL {
+  WITH r
+  OPTIONAL MATCH (r)-[:IN_CATEGORY]->(page_cat:Category)
+  RETURN page_cat.name AS category
+  LIMIT 1
+}
+CALL {
+  WITH r
+  OPTIONAL MATCH (r)-[page_rel:HAS_INGREDIENT]->(page_ing:Ingredient)
+  RETURN collect({name: page_ing.name, amount: page_rel.amount, unit: page_rel.unit}) AS ingredients
+}"""
+
+
+def apply_pending_like(card: Dict[str, Any], viewer_id: Optional[str]) -> Dict[str, Any]:
+    # lajk/unlajk koji jos ceka u write-behind baferu ima prednost nad bazom (kao GET /likes/exists)
+    if viewer_id is None:
+        return card
+    pending = like_buffer.pending_state(viewer_id, card.get("id"))
+    if pending is not None and pending != card.get("liked_by_me"):
+        card["liked_by_me"] = pending
+        card["like_count"] = max(0, (card.get("like_count") or 0) + (1 if pending else -1))
+    return card
+
+
+def with_viewer(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # {..., viewer: {...}} -> polja viewer mape direktno u kartici
+    for row in rows:
+        viewer = row.pop("viewer", None)
+        if viewer:
+            viewer_id = viewer.pop("viewer_id", None)
+            row.update(viewer)
+            apply_pending_like(row, viewer_id)
+    return rows
+
+
+# Strana koju je vec izabrao in-memory indeks/tabela (samo id + skor) se dopunjava detaljima
+# jednim upitom; ostala polja iz reda (score, likes, mode...) se prepisuju u rezultat, redosled ostaje isti.
+HYDRATE_RECIPES_CYPHER = """
+UNWIND range(0, size($ids) - 1) AS pos
+MATCH (r:Recipe {id: $ids[pos]})
+""" + PAGE_DETAILS + """
+RETURN pos,
+       r.id AS id,
+       r.title AS title,
+       r.description AS description,
+       category,
+       ingredients,
+       """ + VIEWER_MAP + """ AS viewer
+ORDER BY pos ASC;
+"""
+
+VIEWER_CARDS_CYPHER = """
+UNWIND $ids AS id
+MATCH (r:Recipe {id: id})
+RETURN r.id AS id,
+       """ + VIEWER_MAP + """ AS viewer;
+"""
+
+
+async def hydrate_recipes(
+    driver, rows: List[Dict[str, Any]], viewer_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    # recepti obrisani u medjuvremenu ispadaju sa strane
+    if not rows:
+        return []
+    found = await read_all(
+        driver, HYDRATE_RECIPES_CYPHER, ids=[row["id"] for row in rows], viewer_id=viewer_id
+    )
+    out: List[Dict[str, Any]] = []
+    for rec in with_viewer(found):
+        pos = rec.pop("pos")
+        out.append({**rec, **rows[pos]})
+    return out
+
+
+async def add_viewer_state(driver, rows: List[Dict[str, Any]], viewer_id: Optional[str]) -> List[Dict[str, Any]]:
+    # za strane koje ne prolaze kroz bazu (in-memory indeks) - jedan upit za celu stranu
+    if not rows or viewer_id is None:
+        return rows
+    found = await read_all(driver, VIEWER_CARDS_CYPHER, ids=[row["id"] for row in rows], viewer_id=viewer_id)
+    by_id = {rec["id"]: rec["viewer"] for rec in found}
+    for row in rows:
+        viewer = by_id.get(row["id"])
+        if viewer:
+            viewer.pop("viewer_id", None)
+            row.update(viewer)
+            apply_pending_like(row, viewer_id)
+    return rows
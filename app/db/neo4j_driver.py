@@ -1,4 +1,7 @@
-from neo4j import GraphDatabase
+from typing import Any, Dict, List, Optional
+
+from neo4j import AsyncDriver, AsyncGraphDatabase, GraphDatabase
+from starlette.concurrency import run_in_threadpool
 from app import settings
 
 _driver = None
@@ -6,18 +9,81 @@ _driver = None
 def init_driver() -> None:
     global _driver
     if _driver is None:
-        _driver = GraphDatabase.driver(
+        # async driver je default, sync ostaje kao fallback (NEO4J_ASYNC=0)
+        factory = AsyncGraphDatabase if settings.NEO4J_ASYNC else GraphDatabase
+        _driver = factory.driver(
             settings.NEO4J_URI,
             auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD),
+            max_connection_pool_size=settings.NEO4J_MAX_POOL_SIZE,
+            connection_acquisition_timeout=settings.NEO4J_ACQUISITION_TIMEOUT,
+            max_connection_lifetime=settings.NEO4J_MAX_CONNECTION_LIFETIME,
+            max_transaction_retry_time=settings.NEO4J_MAX_TX_RETRY_TIME,
         )
 
-def close_driver() -> None:
+async def close_driver() -> None:
     global _driver
     if _driver is not None:
-        _driver.close()
+        if isinstance(_driver, AsyncDriver):
+            await _driver.close()
+        else:
+            _driver.close()
         _driver = None
 
 def get_driver():
     if _driver is None:
         init_driver()
     return _driver
+
+
+# helperi za rutere: rade i sa async i sa sync driverom
+# sve ide kroz managed transakcije (execute_read / execute_write):
+#  - driver sam ponavlja tx funkciju na transient greske (deadlock, leader switch...)
+#  - sa neo4j:// URI citanja idu na followere / read replike, pisanja na leadera
+# sync varijanta se izvrsava u threadpool-u, isto kao ranije kad su handleri bili obicni def
+
+def session_config() -> Dict[str, Any]:
+    return {"database": settings.NEO4J_DATABASE, "fetch_size": settings.NEO4J_FETCH_SIZE}
+
+async def _fetch_all(tx, cypher: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    result = await tx.run(cypher, params)
+    return [rec.data() async for rec in result]
+
+async def _fetch_single(tx, cypher: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    result = await tx.run(cypher, params)
+    rec = await result.single()
+    return rec.data() if rec else None
+
+def _fetch_all_sync(tx, cypher: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [rec.data() for rec in tx.run(cypher, params)]
+
+def _fetch_single_sync(tx, cypher: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    rec = tx.run(cypher, params).single()
+    return rec.data() if rec else None
+
+def _execute_sync(driver, write: bool, single: bool, cypher: str, params: Dict[str, Any]):
+    work = _fetch_single_sync if single else _fetch_all_sync
+    with driver.session(**session_config()) as session:
+        if write:
+            return session.execute_write(work, cypher, params)
+        return session.execute_read(work, cypher, params)
+
+async def _execute(driver, write: bool, single: bool, cypher: str, params: Dict[str, Any]):
+    if not isinstance(driver, AsyncDriver):
+        return await run_in_threadpool(_execute_sync, driver, write, single, cypher, params)
+    work = _fetch_single if single else _fetch_all
+    async with driver.session(**session_config()) as session:
+        if write:
+            return await session.execute_write(work, cypher, params)
+        return await session.execute_read(work, cypher, params)
+
+async def read_all(driver, cypher: str, **params) -> List[Dict[str, Any]]:
+    return await _execute(driver, False, False, cypher, params)
+
+async def read_single(driver, cypher: str, **params) -> Optional[Dict[str, Any]]:
+    return await _execute(driver, False, True, cypher, params)
+
+async def write_all(driver, cypher: str, **params) -> List[Dict[str, Any]]:
+    return await _execute(driver, True, False, cypher, params)
+
+async def write_single(driver, cypher: str, **params) -> Optional[Dict[str, Any]]:
+    return await _execute(driver, True, True, cypher, params)
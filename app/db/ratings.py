@@ -0,0 +1,43 @@
+# Agregat ocena recepta `r` kao Cypher izrazi.
+#
+# Bez shardova (RATING_SHARDS=0) ocene se upisuju direktno u r.rating_sum / r.rating_count.
+# Sa shardovima upis ide u jedan od N (:RatingShard {recipe_id, shard}) cvorova, pa popularan recept
+# ne zakljucava isti cvor pri svakoj oceni; pozadinski merge (app/services/rating_shards.py) ih
+# povremeno sabira u Recipe. Citanje zato uvek sabira bazu na receptu + ono sto je jos u shardovima,
+# pa je rezultat isti pre i posle merge-a.
+from app import settings
+
+RATING_SUM = """(coalesce(r.rating_sum, 0)
+  + reduce(acc = 0, x IN COLLECT { MATCH (s:RatingShard {recipe_id: r.id}) RETURN s.sum } | acc + x))"""
+
+RATING_COUNT = """(coalesce(r.rating_count, 0)
+  + reduce(acc = 0, x IN COLLECT { MATCH (s:RatingShard {recipe_id: r.id}) RETURN s.count } | acc + x))"""
+
+# za RETURN / WITH: rating_sum, rating_count, rating_avg
+RATING_FIELDS = """CALL {
+  WITH r
+  RETURN """ + RATING_SUM + """ AS rating_sum,
+         """ + RATING_COUNT + """ AS rating_count
+}
+WITH *, CASE WHEN rating_count = 0 THEN 0.0 ELSE (1.0 * rating_sum) / rating_count END AS rating_avg"""
+
+# jedan izraz (npr. unutar map-e), kad CALL nije moguc
+RATING_AVG = """CASE WHEN """ + RATING_COUNT + """ = 0 THEN 0.0
+  ELSE (1.0 * """ + RATING_SUM + """) / """ + RATING_COUNT + """ END"""
+
+# Bayesov (confidence-adjusted) skor za rangiranje: (C*m + sum) / (C + count), gde je m ocekivana
+# ocena (RATING_PRIOR_MEAN), a C "tezina" te pretpostavke u broju ocena (RATING_PRIOR_WEIGHT).
+# Recept sa jednom peticom tako ne preskace recept sa stotinu cetvorki. Materijalizuje se kao
+# r.rating_score (range indeks) - u upisu ocena, a sa shardovima u merge-u shardova.
+RATING_SCORE_SET = """r.rating_score = ($prior_weight * $prior_mean + coalesce(r.rating_sum, 0))
+  / ($prior_weight + coalesce(r.rating_count, 0))"""
+
+
+def rating_prior() -> dict:
+    # parametri za RATING_SCORE_SET
+    return {"prior_mean": settings.RATING_PRIOR_MEAN, "prior_weight": settings.RATING_PRIOR_WEIGHT}
+
+
+def initial_rating_score() -> float:
+    # skor recepta bez ocena (= prior); koristi se pri kreiranju recepta
+    return float(settings.RATING_PRIOR_MEAN)
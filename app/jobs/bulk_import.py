@@ -0,0 +1,75 @@
+# Bulk import iz NDJSON / CSV fajla (ili stdin-a) - vidi app/services/bulk_import.py:
+#   python -m app.jobs.bulk_import users   users.ndjson
+#   python -m app.jobs.bulk_import recipes recipes.csv --format csv --batch-size 2000 --workers 8
+#   zcat likes.ndjson.gz | python -m app.jobs.bulk_import likes -
+#
+# NDJSON redovi (CSV ima iste kolone, ingredients kao "ime:kolicina:jedinica;ime"):
+#   users    {"username": "...", "id": "..."?}
+#   recipes  {"title", "description"?, "category", "ingredients": [{"name", "amount"?, "unit"?}], "id"?, "user_id"?}
+#   likes    {"user_id", "recipe_id"}
+#   ratings  {"user_id", "recipe_id", "value": 1-5}
+import argparse
+import asyncio
+import sys
+from typing import AsyncIterator
+
+from app import settings
+from app.db.neo4j_driver import close_driver, get_driver
+from app.services.bulk_import import FORMATS, KINDS, run_import
+
+READ_CHUNK_BYTES = 1 << 20
+
+
+async def file_chunks(path: str) -> AsyncIterator[bytes]:
+    f = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        while True:
+            chunk = await asyncio.to_thread(f.read, READ_CHUNK_BYTES)
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        if f is not sys.stdin.buffer:
+            f.close()
+
+
+def print_progress(stats: dict) -> None:
+    print(
+        f"\r{stats['kind']}: {stats['valid']} valid, {stats['invalid']} invalid, "
+        f"{stats['written']} written, {stats['rows_per_second']} rows/s",
+        end="",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("kind", choices=KINDS)
+    ap.add_argument("path", help="fajl ili - za stdin")
+    ap.add_argument("--format", choices=FORMATS, default=None, help="podrazumevano po ekstenziji (.csv => csv)")
+    ap.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE)
+    ap.add_argument("--workers", type=int, default=settings.IMPORT_WORKERS)
+    args = ap.parse_args()
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    try:
+        stats = await run_import(
+            get_driver(),
+            args.kind,
+            fmt,
+            file_chunks(args.path),
+            batch_size=args.batch_size,
+            workers=args.workers,
+            progress=print_progress,
+        )
+        print(file=sys.stderr)
+        for err in stats.pop("errors"):
+            print(f"line {err['line']}: {err['error']}", file=sys.stderr)
+        print(stats)
+    finally:
+        await close_driver()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,156 @@
+# Preracunava Recipe.description_norm pravom sr_norm_latin f-jom (neo4j/init/description_norm.cypher
+# radi samo toLower, pa fulltext pretraga ne nalazi stare recepte sa dijakriticima / interpunkcijom).
+# Uz description_norm se upisuje description_norm_v = SR_NORM_VERSION; recept bez nje (seed,
+# toLower backfill, stari API) ili sa starijom verzijom se podrazumevano preracunava.
+#   python -m app.jobs.description_norm                  # recepti bez description_norm ili sa starom verzijom
+#   python -m app.jobs.description_norm --all            # ponovo za sve
+#   python -m app.jobs.description_norm --after <id>     # nastavak prekinutog pokretanja
+#
+# Recepti se citaju keyset batch-evima po id-u, normalizuju u process pool-u i upisuju UNWIND-om,
+# jedna kratka transakcija po batch-u; upisuju se samo recepti kojima se description_norm (ili
+# njegova verzija) menja.
+# U letu je najvise 2 * workers batch-eva, pa memorija ne zavisi od velicine kataloga. Posle
+# svakog batch-a se ispisuje poslednji obradjen id - to je vrednost za --after.
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from app.db.neo4j_driver import close_driver, get_driver, read_all, write_single
+from app.utils.text_norm import SR_NORM_VERSION, normalize_many
+
+BATCH_SIZE = 5000
+
+READ_CYPHER = """
+MATCH (r:Recipe)
+WHERE r.id > $after
+  AND ($all OR r.description_norm IS NULL OR coalesce(r.description_norm_v, 0) < $version)
+WITH r ORDER BY r.id LIMIT $batch
+RETURN r.id AS id,
+       r.description AS description,
+       r.description_norm AS description_norm,
+       r.description_norm_v AS description_norm_v;
+"""
+
+WRITE_CYPHER = """
+UNWIND $rows AS row
+MATCH (r:Recipe {id: row.id})
+SET r.description_norm = row.description_norm,
+    r.description_norm_v = $version
+RETURN count(r) AS updated;
+"""
+
+
+def normalize_batch(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # radi u process pool-u; vraca samo redove kojima se description_norm ili verzija menja
+    norms = normalize_many(row["description"] for row in rows)
+    return [
+        {"id": row["id"], "description_norm": norm}
+        for row, norm in zip(rows, norms)
+        if norm != row["description_norm"] or row["description_norm_v"] != SR_NORM_VERSION
+    ]
+
+
+def default_workers() -> int:
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+async def reindex_description_norms(
+    driver,
+    all_recipes: bool = False,
+    after: str = "",
+    batch_size: int = BATCH_SIZE,
+    workers: int = 0,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    workers = workers or default_workers()
+    stats: Dict[str, Any] = {
+        "scanned": 0,
+        "updated": 0,
+        "batches": 0,
+        "last_id": after,
+        "seconds": 0.0,
+        "rows_per_second": 0.0,
+    }
+    t0 = time.perf_counter()
+    loop = asyncio.get_running_loop()
+
+    async def write(item) -> None:
+        fut, scanned, last_id = item
+        rows = await fut
+        if rows:
+            rec = await write_single(driver, WRITE_CYPHER, rows=rows, version=SR_NORM_VERSION)
+            stats["updated"] += rec["updated"] if rec else 0
+        stats["batches"] += 1
+        stats["scanned"] += scanned
+        # batch-evi se upisuju redom, pa je sve do last_id obradjeno
+        stats["last_id"] = last_id
+        elapsed = time.perf_counter() - t0
+        stats["seconds"] = round(elapsed, 2)
+        stats["rows_per_second"] = round(stats["scanned"] / elapsed, 1) if elapsed else 0.0
+        if progress is not None:
+            progress(stats)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        inflight: deque = deque()
+        try:
+            while True:
+                rows = await read_all(
+                    driver, READ_CYPHER, after=after, all=all_recipes, version=SR_NORM_VERSION, batch=batch_size
+                )
+                if not rows:
+                    break
+                after = rows[-1]["id"]
+                inflight.append((loop.run_in_executor(pool, normalize_batch, rows), len(rows), after))
+                if len(inflight) >= 2 * workers:
+                    await write(inflight.popleft())
+                if len(rows) < batch_size:
+                    break
+            while inflight:
+                await write(inflight.popleft())
+        finally:
+            for fut, _, _ in inflight:
+                fut.cancel()
+
+    return stats
+
+
+def print_progress(stats: dict) -> None:
+    print(
+        f"\r{stats['scanned']} scanned, {stats['updated']} updated, "
+        f"{stats['rows_per_second']} rows/s, last id {stats['last_id']}",
+        end="",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--all", action="store_true", help="ponovo izracunaj description_norm za sve recepte")
+    ap.add_argument("--after", default="", help="nastavi posle ovog recipe id-a (poslednji ispisan id)")
+    ap.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    ap.add_argument("--workers", type=int, default=0, help="0 => broj jezgara - 1")
+    args = ap.parse_args()
+
+    try:
+        stats = await reindex_description_norms(
+            get_driver(),
+            all_recipes=args.all,
+            after=args.after,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            progress=print_progress,
+        )
+        print(file=sys.stderr)
+        print(stats)
+    finally:
+        await close_driver()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
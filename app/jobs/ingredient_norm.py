@@ -0,0 +1,49 @@
+# Popunjava Ingredient.name_norm (sr_norm_latin) za sastojke koji ga nemaju (seed, stari podaci) ili
+# ga imaju iz starije verzije normalizacije (name_norm_v < SR_NORM_VERSION, npr. pre đ -> d).
+# Pokrece se automatski na startup-u API-ja, a rucno:
+#   python -m app.jobs.ingredient_norm          # samo sastojci bez name_norm ili sa starom verzijom
+#   python -m app.jobs.ingredient_norm --all    # ponovo za sve
+import argparse
+import asyncio
+from typing import List
+
+from app.db.neo4j_driver import close_driver, get_driver, read_all, write_all
+from app.utils.text_norm import SR_NORM_VERSION, sr_norm_latin
+
+BATCH_SIZE = 1000
+
+
+async def backfill_ingredient_norms(driver, all_ingredients: bool = False) -> int:
+    cypher = """
+    MATCH (i:Ingredient)
+    WHERE $all OR i.name_norm IS NULL OR coalesce(i.name_norm_v, 0) < $version
+    RETURN i.name AS name;
+    """
+    names: List[str] = [r["name"] for r in await read_all(driver, cypher, all=all_ingredients, version=SR_NORM_VERSION)]
+
+    cypher_set = """
+    UNWIND $rows AS row
+    MATCH (i:Ingredient {name: row.name})
+    SET i.name_norm = row.name_norm, i.name_norm_v = $version;
+    """
+    for start in range(0, len(names), BATCH_SIZE):
+        rows = [{"name": n, "name_norm": sr_norm_latin(n)} for n in names[start:start + BATCH_SIZE]]
+        await write_all(driver, cypher_set, rows=rows, version=SR_NORM_VERSION)
+
+    return len(names)
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--all", action="store_true", help="ponovo izracunaj name_norm za sve sastojke")
+    args = ap.parse_args()
+
+    try:
+        n = await backfill_ingredient_norms(get_driver(), all_ingredients=args.all)
+        print(f"name_norm updated for {n} ingredients")
+    finally:
+        await close_driver()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+# Popunjava Recipe.rating_score (Bayesov skor, app/db/ratings.py) za recepte koji ga nemaju
+# (seed, stari podaci). Pokrece se automatski na startup-u API-ja, a rucno:
+#   python -m app.jobs.rating_score          # samo recepti bez rating_score
+#   python -m app.jobs.rating_score --all    # ponovo za sve (npr. posle izmene RATING_PRIOR_*)
+import argparse
+import asyncio
+
+from app.db.neo4j_driver import close_driver, get_driver, write_single
+from app.db.ratings import RATING_SCORE_SET, rating_prior
+
+BATCH_SIZE = 1000
+
+
+async def backfill_rating_scores(driver, all_recipes: bool = False) -> int:
+    # keyset po id-u, da --all ne bi ponovo obradjivao iste recepte
+    cypher = """
+    MATCH (r:Recipe)
+    WHERE r.id > $after AND ($all OR r.rating_score IS NULL)
+    WITH r ORDER BY r.id LIMIT $batch
+    SET r.rating_sum = coalesce(r.rating_sum, 0),
+        r.rating_count = coalesce(r.rating_count, 0)
+    SET """ + RATING_SCORE_SET + """
+    RETURN count(r) AS updated, max(r.id) AS last_id;
+    """
+    total = 0
+    after = ""
+    while True:
+        rec = await write_single(driver, cypher, after=after, all=all_recipes, batch=BATCH_SIZE, **rating_prior())
+        updated = rec["updated"] if rec else 0
+        total += updated
+        if updated < BATCH_SIZE:
+            return total
+        after = rec["last_id"]
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--all", action="store_true", help="ponovo izracunaj rating_score za sve recepte")
+    args = ap.parse_args()
+
+    try:
+        n = await backfill_rating_scores(get_driver(), all_recipes=args.all)
+        print(f"rating_score updated for {n} recipes")
+    finally:
+        await close_driver()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
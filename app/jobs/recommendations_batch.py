@@ -0,0 +1,141 @@
+# Offline content-based preporuke za sve usere (ili samo "prljave" sa --incremental).
+#
+#   H  = TF-IDF(recipe x ingredient), L2 normalizovano po receptu
+#   P  = L2norm(L @ H)          profil usera u prostoru sastojaka
+#   S  = P @ H.T                kosinusna slicnost user x recipe, racuna se u blokovima usera
+#
+# Top-K po useru se cuva kao (u)-[:RECOMMENDED {rank, score}]->(r); GET /recommendations/{user_id}
+# cita odatle, a live Cypher ostaje samo za usere koji jos nemaju izracunate preporuke.
+# Incremental: samo useri kojima je likes_changed_at (postavlja ga like/unlike) > recs_computed_at.
+#
+#   python -m app.jobs.recommendations_batch               # svi useri
+#   python -m app.jobs.recommendations_batch --incremental
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from app import settings
+from app.db.neo4j_driver import close_driver, get_driver, read_single, write_all
+from app.recs.matrices import block_rows, export_likes_matrix, export_recipe_matrix, l2_normalize_rows, tfidf
+
+WRITE_BATCH_SIZE = 500
+MAX_BLOCK_CELLS = 20_000_000  # ~80MB float32 po bloku skorova
+
+
+def top_k_for_users(
+    L: sparse.csr_matrix,
+    Hn: sparse.csr_matrix,
+    users: np.ndarray,
+    k: int,
+) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+    P = l2_normalize_rows(L[users].dot(Hn).tocsr())
+    HnT = Hn.T.tocsc()
+    n_recipes = Hn.shape[0]
+    step = block_rows(n_recipes, MAX_BLOCK_CELLS)
+
+    for start in range(0, len(users), step):
+        block = slice(start, start + step)
+        S = P[block].dot(HnT).toarray()
+
+        # vec lajkovani recepti ne idu u preporuke
+        liked = L[users[block]].tocoo()
+        S[liked.row, liked.col] = -np.inf
+
+        kk = min(k, n_recipes)
+        if kk == 0:
+            continue
+        idx = np.argpartition(-S, kk - 1, axis=1)[:, :kk]
+        part = np.take_along_axis(S, idx, axis=1)
+        order = np.argsort(-part, axis=1, kind="stable")
+        idx = np.take_along_axis(idx, order, axis=1)
+        part = np.take_along_axis(part, order, axis=1)
+
+        for row in range(S.shape[0]):
+            keep = part[row] > 0
+            yield int(users[start + row]), idx[row][keep], part[row][keep]
+
+
+async def write_recommendations(driver, rows: List[Dict[str, Any]], run_ts: int) -> None:
+    cypher = """
+    UNWIND $rows AS row
+    MATCH (u:User {id: row.uid})
+    CALL {
+      WITH u
+      MATCH (u)-[old:RECOMMENDED]->()
+      DELETE old
+    }
+    SET u.recs_computed_at = $run_ts
+    WITH u, row
+    CALL {
+      WITH u, row
+      UNWIND row.recs AS rec
+      MATCH (r:Recipe {id: rec.rid})
+      CREATE (u)-[:RECOMMENDED {rank: rec.rank, score: rec.score}]->(r)
+    }
+    RETURN count(*) AS users;
+    """
+    await write_all(driver, cypher, rows=rows, run_ts=run_ts)
+
+
+async def run(driver, incremental: bool, top_k: int) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    # vreme iz baze, da bude uporedivo sa likes_changed_at (timestamp() u like/unlike)
+    run_ts = (await read_single(driver, "RETURN timestamp() AS ts"))["ts"]
+
+    rm = await export_recipe_matrix(driver)
+    lm = await export_likes_matrix(driver, rm.recipe_index)
+    Hn = tfidf(rm.H)
+
+    if incremental:
+        users = np.array([
+            i for i, (changed, computed) in enumerate(zip(lm.changed_at, lm.computed_at))
+            if computed is None or (changed is not None and changed > computed)
+        ], dtype=np.int64)
+    else:
+        users = np.arange(len(lm.user_ids), dtype=np.int64)
+
+    # useri bez lajkova nemaju profil - dobijaju prazan spisak (live fallback ih servira kao popular)
+    batch: List[Dict[str, Any]] = []
+    written = 0
+    for ui, rec_idx, scores in top_k_for_users(lm.L, Hn, users, top_k):
+        batch.append({
+            "uid": lm.user_ids[ui],
+            "recs": [
+                {"rid": rm.recipe_ids[ri], "rank": rank, "score": float(sc)}
+                for rank, (ri, sc) in enumerate(zip(rec_idx, scores))
+            ],
+        })
+        if len(batch) >= WRITE_BATCH_SIZE:
+            await write_recommendations(driver, batch, run_ts)
+            written += len(batch)
+            batch = []
+    if batch:
+        await write_recommendations(driver, batch, run_ts)
+        written += len(batch)
+
+    return {
+        "mode": "incremental" if incremental else "full",
+        "users": written,
+        "recipes": len(rm.recipe_ids),
+        "seconds": round(time.perf_counter() - t0, 2),
+    }
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--incremental", action="store_true", help="samo useri kojima su se lajkovi promenili")
+    ap.add_argument("--top-k", type=int, default=settings.RECS_TOP_K)
+    args = ap.parse_args()
+
+    try:
+        print(await run(get_driver(), args.incremental, args.top_k))
+    finally:
+        await close_driver()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,13 +1,32 @@
-from fastapi import FastAPI, HTTPException
-from app.db.neo4j_driver import init_driver, close_driver, get_driver
+import logging
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
+from app.db.neo4j_driver import init_driver, close_driver, get_driver, read_single
+from app import settings
+from app.jobs.ingredient_norm import backfill_ingredient_norms
+from app.jobs.rating_score import backfill_rating_scores
+from app.recs.item_similarity import item_similarity
+from app.recs.popularity import popularity
+from app.search.bm25 import description_index
+from app.search.fulltext import total_cache as search_total_cache
+from app.search.ingredient_index import ingredient_index
+from app.services.bulk_import import import_pool
+from app.services.like_buffer import like_buffer
+from app.services.rating_shards import rating_shard_merger
+from app.services.recipe_events import recipe_events
 from app.routers.recipes import router as recipes_router
 from app.routers.users import router as users_router
 from app.routers.likes import router as likes_router
 from app.routers.ratings import router as ratings_router
 from app.routers.categories import router as categories_router
 from app.routers.recommendations import router as recommendations_router
+from app.routers.admin import router as admin_router
 from fastapi.middleware.cors import CORSMiddleware
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI(title="Recipe API (Neo4j)")
 
 origins = [
@@ -26,20 +45,74 @@ app.add_middleware(
 )
 
 
+# transient greske koje ni posle retry-a u execute_read/execute_write nisu prosle -> 503 umesto 500
+@app.exception_handler(ServiceUnavailable)
+@app.exception_handler(SessionExpired)
+@app.exception_handler(TransientError)
+async def neo4j_unavailable_handler(request: Request, exc: Exception):
+    return JSONResponse(status_code=503, content={"detail": f"Neo4j temporarily unavailable: {exc}"})
+
+
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     init_driver()
+    # pretraga po sastojcima ide preko Ingredient.name_norm, pa ga popuni gde fali ili je iz starije
+    # verzije sr_norm_latin (seed, stari podaci)
+    try:
+        await backfill_ingredient_norms(get_driver())
+    except Exception:
+        logger.exception("Ingredient name_norm backfill failed")
+    # /recipes/top_rated ide po indeksu nad Recipe.rating_score
+    try:
+        await backfill_rating_scores(get_driver())
+    except Exception:
+        logger.exception("Recipe rating_score backfill failed")
+
+    # in-process strukture prate kreiranje/izmenu/brisanje recepata (app/services/recipe_writes.py)
+    recipe_events.subscribe(popularity.on_recipe_event)
+    recipe_events.subscribe(ingredient_index.on_recipe_event)
+    recipe_events.subscribe(item_similarity.on_recipe_event)
+    recipe_events.subscribe(search_total_cache.clear)
+    recipe_events.subscribe(description_index.on_recipe_event)
+    await popularity.start(get_driver(), settings.POPULAR_REFRESH_SECONDS, settings.POPULAR_TOP_N)
+    if settings.LIKE_WRITE_BEHIND:
+        like_buffer.start(
+            get_driver(),
+            settings.LIKE_BUFFER_MAX_PENDING,
+            settings.LIKE_BUFFER_BATCH_SIZE,
+            settings.LIKE_BUFFER_FLUSH_MS,
+            settings.LIKE_BUFFER_ENQUEUE_TIMEOUT,
+        )
+    if settings.ADMIN_TOKEN:
+        # POST /admin/import deli jedan process pool
+        import_pool.start(settings.IMPORT_WORKERS)
+    if settings.RATING_SHARDS > 0:
+        rating_shard_merger.start(get_driver(), settings.RATING_MERGE_SECONDS)
+    if settings.INGREDIENT_INDEX:
+        await ingredient_index.start(get_driver(), settings.INGREDIENT_INDEX_REFRESH_SECONDS)
+    if settings.DESCRIPTION_SEARCH == "bm25":
+        await description_index.start(get_driver(), settings.DESCRIPTION_INDEX_REFRESH_SECONDS)
+    if settings.ITEM_SIMILARITY:
+        await item_similarity.start(
+            get_driver(), settings.ITEM_SIMILARITY_REFRESH_SECONDS, settings.ITEM_SIMILARITY_TOP_N
+        )
 
 @app.on_event("shutdown")
-def on_shutdown():
-    close_driver()
+async def on_shutdown():
+    # neupisani lajkovi idu u bazu pre zatvaranja driver-a
+    await like_buffer.stop()
+    await ingredient_index.stop()
+    await description_index.stop()
+    await item_similarity.stop()
+    await popularity.stop()
+    await rating_shard_merger.stop()
+    import_pool.stop()
+    await close_driver()
 
 @app.get("/health")
-def health():
+async def health():
     try:
-        driver = get_driver()
-        with driver.session() as session:
-            session.run("RETURN 1 AS ok").single()
+        await read_single(get_driver(), "RETURN 1 AS ok")
         return {"status": "ok", "neo4j": "connected"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Neo4j connection failed: {e}")
@@ -50,3 +123,4 @@ app.include_router(likes_router)
 app.include_router(recommendations_router)
 app.include_router(ratings_router)
 app.include_router(categories_router)
+app.include_router(admin_router)
@@ -0,0 +1,221 @@
+# Item-item collaborative filtering nad LIKES grafom.
+#
+#   sim(a, b) = co(a, b) / sqrt(n(a) * n(b))     co = broj usera koji su lajkovali oba, n = broj lajkova
+#
+# Ko-okurencija C = L.T @ L (recipe x recipe) se racuna sparse proizvodom u blokovima recepata,
+# pa se za svaki recept cuva samo top-N suseda. Serviranje (/recipes/{id}/also_liked,
+# /recommendations/{id}?mode=collaborative) je lookup u tu tabelu umesto obilaska grafa.
+#
+# Tabela se puni na startup-u i periodicno ponovo racuna u pozadini; like/unlike je azuriraju odmah
+# za parove (lajkovani recept, ostali recepti tog usera). Skorovi ostalih suseda tog recepta
+# (promenio mu se n) se dotera sledeci rebuild. Obrisan recept (RecipeEvent DELETED) se uklanja odmah.
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from app.recs.matrices import export_like_pairs
+from app.services.recipe_events import DELETED, RecipeEvent
+
+logger = logging.getLogger(__name__)
+
+BLOCK_CELLS = 5_000_000  # max nnz bloka C pre odsecanja na top-N (procena preko broja recepata u bloku)
+
+Neighbours = List[Tuple[str, float]]
+
+
+def _top_neighbours(L: sparse.csr_matrix, recipe_ids: List[str], top_n: int) -> Dict[str, Neighbours]:
+    n = np.asarray(L.sum(axis=0)).ravel().astype(np.float64)
+    LT = L.T.tocsr()
+    n_recipes = LT.shape[0]
+    step = max(1, min(n_recipes, BLOCK_CELLS // max(1, n_recipes)))
+    # tie-break po id-u recepta, isto kao inkrementalno azuriranje (_State._set_pair)
+    id_rank = np.argsort(np.argsort(np.array(recipe_ids, dtype=object)))
+
+    out: Dict[str, Neighbours] = {}
+    for start in range(0, n_recipes, step):
+        C = LT[start:start + step].dot(L).tocsr()
+        for row in range(C.shape[0]):
+            a = start + row
+            lo, hi = C.indptr[row], C.indptr[row + 1]
+            cols = C.indices[lo:hi]
+            co = C.data[lo:hi]
+            keep = cols != a
+            cols, co = cols[keep], co[keep]
+            if not len(cols):
+                continue
+            scores = co / np.sqrt(n[a] * n[cols])
+            order = np.lexsort((id_rank[cols], -scores))[:top_n]
+            out[recipe_ids[a]] = [(recipe_ids[cols[i]], float(scores[i])) for i in order]
+    return out
+
+
+class _State:
+    def __init__(self, top_n: int) -> None:
+        self.top_n = top_n
+        self.liked: Dict[str, Set[str]] = defaultdict(set)   # user -> recepti
+        self.likers: Dict[str, Set[str]] = defaultdict(set)  # recept -> useri
+        self.neighbours: Dict[str, Neighbours] = {}
+
+    @classmethod
+    def build(cls, user_ids: List[str], recipe_ids: List[str], L: sparse.csr_matrix, top_n: int) -> "_State":
+        st = cls(top_n)
+        coo = L.tocoo()
+        for ui, ri in zip(coo.row, coo.col):
+            st.liked[user_ids[ui]].add(recipe_ids[ri])
+            st.likers[recipe_ids[ri]].add(user_ids[ui])
+        st.neighbours = _top_neighbours(L, recipe_ids, top_n)
+        return st
+
+    def _set_pair(self, a: str, b: str, score: float) -> None:
+        lst = [(x, s) for x, s in self.neighbours.get(a, []) if x != b]
+        if score > 0:
+            lst.append((b, score))
+            lst.sort(key=lambda t: (-t[1], t[0]))
+            del lst[self.top_n:]
+        if lst:
+            self.neighbours[a] = lst
+        else:
+            self.neighbours.pop(a, None)
+
+    def _refresh_pairs(self, uid: str, rid: str) -> None:
+        ra = self.likers.get(rid, set())
+        for other in self.liked.get(uid, ()):
+            if other == rid:
+                continue
+            rb = self.likers.get(other, set())
+            co = len(ra & rb) if len(ra) < len(rb) else len(rb & ra)
+            score = co / (len(ra) * len(rb)) ** 0.5 if co else 0.0
+            self._set_pair(rid, other, score)
+            self._set_pair(other, rid, score)
+
+    def like(self, uid: str, rid: str) -> None:
+        if rid in self.liked[uid]:
+            return
+        self.liked[uid].add(rid)
+        self.likers[rid].add(uid)
+        self._refresh_pairs(uid, rid)
+
+    def unlike(self, uid: str, rid: str) -> None:
+        if rid not in self.liked.get(uid, ()):
+            return
+        self.liked[uid].discard(rid)
+        self.likers[rid].discard(uid)
+        self._refresh_pairs(uid, rid)
+
+    def remove_recipe(self, rid: str) -> None:
+        # obrisan recept: nestaje iz lajkova, svoje tabele suseda i tabela recepata koji ga imaju kao
+        # suseda (to mogu biti samo recepti koje su lajkovali isti useri)
+        related: Set[str] = set(x for x, _ in self.neighbours.pop(rid, ()))
+        for uid in self.likers.pop(rid, ()):
+            liked = self.liked.get(uid)
+            if liked is not None:
+                liked.discard(rid)
+                related |= liked
+        for other in related:
+            self._set_pair(other, rid, 0.0)
+
+    def also_liked(self, rid: str, skip: int, limit: int) -> List[Dict[str, Any]]:
+        return [
+            {"id": x, "score": s, "mode": "collaborative"}
+            for x, s in self.neighbours.get(rid, [])[skip:skip + limit]
+        ]
+
+    def recommend(self, uid: str, skip: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+        liked = self.liked.get(uid)
+        if not liked:
+            return None
+        scores: Dict[str, float] = defaultdict(float)
+        for rid in liked:
+            for x, s in self.neighbours.get(rid, ()):
+                if x not in liked:
+                    scores[x] += s
+        ranked = sorted(scores.items(), key=lambda t: (-t[1], t[0]))
+        return [{"id": x, "score": s, "mode": "collaborative"} for x, s in ranked[skip:skip + limit]]
+
+
+class ItemSimilarity:
+    def __init__(self) -> None:
+        self._state: Optional[_State] = None
+        self._pending: Optional[List[Tuple[str, str, str]]] = None
+        self._task: Optional[asyncio.Task] = None
+        self.top_n = 50
+
+    @property
+    def ready(self) -> bool:
+        return self._state is not None
+
+    async def reload(self, driver) -> None:
+        # lajkovi koji stignu dok traje racunanje se ponove nad novom tabelom
+        self._pending = []
+        try:
+            user_ids, recipe_ids, L = await export_like_pairs(driver)
+            state = await asyncio.to_thread(_State.build, user_ids, recipe_ids, L, self.top_n)
+            for op, uid, rid in self._pending:
+                if op == "remove_recipe":
+                    state.remove_recipe(rid)
+                else:
+                    getattr(state, op)(uid, rid)
+            self._state = state
+        finally:
+            self._pending = None
+        logger.info("Item similarity built: %d recipes with neighbours", len(state.neighbours))
+
+    async def start(self, driver, refresh_seconds: float, top_n: int) -> None:
+        # dok tabela nije izracunata, also_liked i mode=collaborative idu preko Cypher-a
+        self.top_n = top_n
+        try:
+            await self.reload(driver)
+        except Exception:
+            logger.exception("Item similarity build failed, falling back to Cypher")
+        if refresh_seconds > 0:
+            self._task = asyncio.create_task(self._refresh_loop(driver, refresh_seconds))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _refresh_loop(self, driver, refresh_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(refresh_seconds)
+            try:
+                await self.reload(driver)
+            except Exception:
+                logger.exception("Item similarity rebuild failed")
+
+    def like(self, uid: str, rid: str) -> None:
+        if self._pending is not None:
+            self._pending.append(("like", uid, rid))
+        if self._state is not None:
+            self._state.like(uid, rid)
+
+    def unlike(self, uid: str, rid: str) -> None:
+        if self._pending is not None:
+            self._pending.append(("unlike", uid, rid))
+        if self._state is not None:
+            self._state.unlike(uid, rid)
+
+    def remove_recipe(self, rid: str) -> None:
+        if self._pending is not None:
+            self._pending.append(("remove_recipe", "", rid))
+        if self._state is not None:
+            self._state.remove_recipe(rid)
+
+    def on_recipe_event(self, event: RecipeEvent) -> None:
+        # kreiranje/izmena ne menjaju lajkove; obrisan recept ne sme da ostane u tabeli suseda
+        if event.kind == DELETED:
+            self.remove_recipe(event.recipe_id)
+
+    def also_liked(self, rid: str, skip: int, limit: int) -> List[Dict[str, Any]]:
+        return self._state.also_liked(rid, skip, limit)
+
+    def recommend(self, uid: str, skip: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+        return self._state.recommend(uid, skip, limit)
+
+
+item_similarity = ItemSimilarity()
+
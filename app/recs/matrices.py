@@ -0,0 +1,158 @@
+# Izvoz grafa u sparse (CSR) matrice za offline preporuke:
+#   L: user x recipe  (LIKES)
+#   H: recipe x ingredient  (HAS_INGREDIENT)
+# Citanje ide u keyset batch-evima po id-u da memorija u bazi i driveru ostane ravna.
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from app.db.neo4j_driver import read_all
+
+EXPORT_BATCH_SIZE = 5000
+
+
+@dataclass
+class RecipeMatrix:
+    recipe_ids: List[str]
+    recipe_index: Dict[str, int]
+    ingredient_names: List[str]
+    H: sparse.csr_matrix
+
+
+@dataclass
+class LikesMatrix:
+    user_ids: List[str]
+    changed_at: List[Optional[int]]
+    computed_at: List[Optional[int]]
+    L: sparse.csr_matrix
+
+
+def _csr(rows: List[int], cols: List[int], shape) -> sparse.csr_matrix:
+    data = np.ones(len(rows), dtype=np.float32)
+    m = sparse.csr_matrix((data, (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))), shape=shape)
+    m.sum_duplicates()
+    m.data[:] = 1.0  # duplirane relacije se broje jednom
+    return m
+
+
+async def _batches(driver, cypher: str) -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    after_id = ""
+    while True:
+        rows = await read_all(driver, cypher, after_id=after_id, batch=EXPORT_BATCH_SIZE)
+        out.extend(rows)
+        if len(rows) < EXPORT_BATCH_SIZE:
+            return out
+        after_id = rows[-1]["id"]
+
+
+async def export_recipe_matrix(driver) -> RecipeMatrix:
+    cypher = """
+    MATCH (r:Recipe)
+    WHERE r.id > $after_id
+    WITH r
+    ORDER BY r.id ASC
+    LIMIT $batch
+    OPTIONAL MATCH (r)-[:HAS_INGREDIENT]->(i:Ingredient)
+    RETURN r.id AS id, collect(i.name) AS ingredients
+    ORDER BY id ASC;
+    """
+    recipes = await _batches(driver, cypher)
+
+    recipe_ids = [r["id"] for r in recipes]
+    ing_index: Dict[str, int] = {}
+    rows: List[int] = []
+    cols: List[int] = []
+    for ri, rec in enumerate(recipes):
+        for name in rec["ingredients"]:
+            rows.append(ri)
+            cols.append(ing_index.setdefault(name, len(ing_index)))
+
+    H = _csr(rows, cols, (len(recipe_ids), len(ing_index)))
+    return RecipeMatrix(
+        recipe_ids=recipe_ids,
+        recipe_index={rid: i for i, rid in enumerate(recipe_ids)},
+        ingredient_names=list(ing_index),
+        H=H,
+    )
+
+
+async def export_likes_matrix(driver, recipe_index: Dict[str, int]) -> LikesMatrix:
+    cypher = """
+    MATCH (u:User)
+    WHERE u.id > $after_id
+    WITH u
+    ORDER BY u.id ASC
+    LIMIT $batch
+    OPTIONAL MATCH (u)-[:LIKES]->(r:Recipe)
+    RETURN u.id AS id,
+           u.likes_changed_at AS changed_at,
+           u.recs_computed_at AS computed_at,
+           collect(r.id) AS liked
+    ORDER BY id ASC;
+    """
+    users = await _batches(driver, cypher)
+
+    rows: List[int] = []
+    cols: List[int] = []
+    for ui, u in enumerate(users):
+        for rid in u["liked"]:
+            ri = recipe_index.get(rid)
+            if ri is not None:  # recept dodat posle izvoza recepata
+                rows.append(ui)
+                cols.append(ri)
+
+    L = _csr(rows, cols, (len(users), len(recipe_index)))
+    return LikesMatrix(
+        user_ids=[u["id"] for u in users],
+        changed_at=[u["changed_at"] for u in users],
+        computed_at=[u["computed_at"] for u in users],
+        L=L,
+    )
+
+
+async def export_like_pairs(driver) -> Tuple[List[str], List[str], sparse.csr_matrix]:
+    # samo LIKES graf (bez sastojaka): kolone su recepti koji imaju bar jedan lajk
+    cypher = """
+    MATCH (u:User)
+    WHERE u.id > $after_id
+    WITH u
+    ORDER BY u.id ASC
+    LIMIT $batch
+    OPTIONAL MATCH (u)-[:LIKES]->(r:Recipe)
+    RETURN u.id AS id, collect(r.id) AS liked
+    ORDER BY id ASC;
+    """
+    users = await _batches(driver, cypher)
+
+    recipe_index: Dict[str, int] = {}
+    rows: List[int] = []
+    cols: List[int] = []
+    for ui, u in enumerate(users):
+        for rid in u["liked"]:
+            rows.append(ui)
+            cols.append(recipe_index.setdefault(rid, len(recipe_index)))
+
+    L = _csr(rows, cols, (len(users), len(recipe_index)))
+    return [u["id"] for u in users], list(recipe_index), L
+
+
+def l2_normalize_rows(m: sparse.csr_matrix) -> sparse.csr_matrix:
+    norms = np.sqrt(np.asarray(m.multiply(m).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms).dot(m).tocsr()
+
+
+def tfidf(H: sparse.csr_matrix) -> sparse.csr_matrix:
+    # ista IDF tezina kao u live Cypher preporukama: ln((N+1)/(df+1))
+    n = H.shape[0]
+    df = np.asarray(H.sum(axis=0)).ravel()
+    idf = np.log((n + 1.0) / (df + 1.0)).astype(np.float32)
+    return l2_normalize_rows(H.dot(sparse.diags(idf)).tocsr())
+
+
+def block_rows(n_cols: int, max_cells: int) -> int:
+    # koliko redova dense bloka (rows x n_cols float32) staje u max_cells
+    return max(1, min(4096, max_cells // max(1, n_cols)))
@@ -0,0 +1,149 @@
+# Globalni popularity ranking u procesu: top-N recepata po (likes DESC, title ASC, id ASC).
+# Koriste ga /recipes/popular i popular grana /recommendations (useri bez lajkova), pa je
+# cold-start citanje slice liste + hidracija samo recepata sa strane.
+#
+# Lista se ponovo ucitava na kratak interval (recipe_like_count indeks), a like/unlike i
+# kreiranje/izmena/brisanje recepta (RecipeEvent) je pomeraju odmah. Strane iza top-N (i dok lista nije ucitana) idu na Cypher.
+import asyncio
+import logging
+from bisect import bisect_right, insort
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.db.neo4j_driver import read_all
+from app.services.recipe_events import CREATED, UPDATED, RecipeEvent
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[int, str, str]  # (-likes, title, id)
+
+
+class _State:
+    def __init__(self, top_n: int, keys: List[Key], complete: bool) -> None:
+        self.top_n = top_n
+        self.keys = keys
+        self.by_id: Dict[str, Key] = {k[2]: k for k in keys}
+        # complete => u bazi nema vise recepata od ovih, pa je lista tacna i kad je kraca od top_n
+        self.complete = complete
+
+    def _remove(self, rid: str) -> None:
+        key = self.by_id.pop(rid, None)
+        if key is not None:
+            i = bisect_right(self.keys, key) - 1
+            del self.keys[i]
+
+    def set(self, rid: str, title: str, likes: int) -> None:
+        self._remove(rid)
+        key = (-likes, title, rid)
+        # iza poslednjeg u listi mogu biti recepti koje ne vidimo => tu ga ne ubacujemo
+        # (lista postaje kraca ali ostaje tacan prefiks, reload je dopuni)
+        if not self.complete and (not self.keys or key > self.keys[-1]):
+            return
+        insort(self.keys, key)
+        self.by_id[rid] = key
+        if len(self.keys) > self.top_n:
+            self.by_id.pop(self.keys.pop()[2], None)
+            self.complete = False
+
+    def retitle(self, rid: str, title: str) -> None:
+        key = self.by_id.get(rid)
+        if key is not None and key[1] != title:
+            self.set(rid, title, -key[0])
+
+    def remove(self, rid: str) -> None:
+        self._remove(rid)
+
+    def page(self, skip: int, limit: int, after: Optional[List[Any]]) -> Optional[List[Dict[str, Any]]]:
+        start = bisect_right(self.keys, (-after[0], after[1], after[2])) if after is not None else 0
+        start += skip
+        end = start + limit
+        if end > len(self.keys) and not self.complete:
+            return None
+        return [{"id": rid, "likes": -neg, "title": title} for neg, title, rid in self.keys[start:end]]
+
+
+class PopularityRanking:
+    def __init__(self) -> None:
+        self._state: Optional[_State] = None
+        self._pending: Optional[List[Tuple[str, tuple]]] = None
+        self._task: Optional[asyncio.Task] = None
+        self.top_n = 1000
+
+    @property
+    def ready(self) -> bool:
+        return self._state is not None
+
+    async def reload(self, driver) -> None:
+        cypher = """
+        MATCH (r:Recipe)
+        WHERE r.like_count IS NOT NULL
+        WITH r
+        ORDER BY r.like_count DESC, r.title ASC, r.id ASC
+        LIMIT $limit
+        RETURN r.id AS id, r.title AS title, r.like_count AS likes
+        """
+        self._pending = []
+        try:
+            # jedan red vise od top_n => znamo da li lista pokriva sve recepte
+            rows = await read_all(driver, cypher, limit=self.top_n + 1)
+            keys = [(-row["likes"], row["title"], row["id"]) for row in rows[:self.top_n]]
+            state = _State(self.top_n, keys, complete=len(rows) <= self.top_n)
+            for op, args in self._pending:
+                getattr(state, op)(*args)
+            self._state = state
+        finally:
+            self._pending = None
+
+    async def start(self, driver, refresh_seconds: float, top_n: int) -> None:
+        self.top_n = top_n
+        try:
+            await self.reload(driver)
+        except Exception:
+            logger.exception("Popularity ranking load failed, falling back to Cypher")
+        if refresh_seconds > 0:
+            self._task = asyncio.create_task(self._refresh_loop(driver, refresh_seconds))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _refresh_loop(self, driver, refresh_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(refresh_seconds)
+            try:
+                await self.reload(driver)
+            except Exception:
+                logger.exception("Popularity ranking reload failed")
+
+    def _apply(self, op: str, *args) -> None:
+        if self._pending is not None:
+            self._pending.append((op, args))
+        if self._state is not None:
+            getattr(self._state, op)(*args)
+
+    def set(self, rid: str, title: str, likes: int) -> None:
+        # like/unlike salju novi r.like_count iz iste transakcije; novi recept ulazi sa 0
+        self._apply("set", rid, title, likes)
+
+    def retitle(self, rid: str, title: str) -> None:
+        self._apply("retitle", rid, title)
+
+    def remove(self, rid: str) -> None:
+        self._apply("remove", rid)
+
+    def on_recipe_event(self, event: RecipeEvent) -> None:
+        if event.kind == CREATED:
+            self.set(event.recipe_id, event.recipe["title"], 0)
+        elif event.kind == UPDATED:
+            self.retitle(event.recipe_id, event.recipe["title"])
+        else:
+            self.remove(event.recipe_id)
+
+    def page(self, skip: int, limit: int, after: Optional[List[Any]] = None) -> Optional[List[Dict[str, Any]]]:
+        # None => strana izlazi van ucitanog top-N
+        if self._state is None:
+            return None
+        return self._state.page(skip, limit, after)
+
+
+popularity = PopularityRanking()
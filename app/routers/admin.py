@@ -0,0 +1,56 @@
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from app import settings
+from app.db.neo4j_driver import get_driver
+from app.services.bulk_import import FORMATS, KINDS, ImportFormatError, import_pool, run_import
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_LOG_EVERY = 50  # batch-eva
+
+
+def log_progress(stats: dict) -> None:
+    if stats["batches"] % PROGRESS_LOG_EVERY == 0:
+        logger.info(
+            "Import %s: %d valid, %d invalid, %d written, %.1f rows/s",
+            stats["kind"], stats["valid"], stats["invalid"], stats["written"], stats["rows_per_second"],
+        )
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    # bez ADMIN_TOKEN-a /admin rute ne postoje
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token != settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+# telo request-a je sam NDJSON / CSV (ne JSON omotac) i cita se kao stream, pa velicina
+# uvoza ne utice na memoriju; odgovor je zbirni izvestaj (vidi app/services/bulk_import.py)
+@router.post("/import", dependencies=[Depends(require_admin)])
+async def import_data(
+    request: Request,
+    kind: str = Query(..., pattern="^(" + "|".join(KINDS) + ")$"),
+    format: Optional[str] = Query(None, pattern="^(" + "|".join(FORMATS) + ")$", description="podrazumevano po Content-Type"),
+    batch_size: int = Query(settings.IMPORT_BATCH_SIZE, ge=1, le=50000),
+    driver=Depends(get_driver),
+):
+    # validacija ide u zajednicki pool (IMPORT_WORKERS procesa) napravljen na startup-u
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    try:
+        return await run_import(
+            driver,
+            kind,
+            fmt,
+            request.stream(),
+            batch_size=batch_size,
+            workers=import_pool.workers,
+            progress=log_progress,
+            pool=import_pool.executor,
+        )
+    except ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,55 +1,89 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.db.neo4j_driver import get_driver
+from typing import Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Response
+from app.db.neo4j_driver import get_driver, read_all, read_single, write_single
+from app.recs.item_similarity import item_similarity
+from app.recs.popularity import popularity
 from app.schemas.like import LikeCreate, UserLikesIdsResponse, LikeExistsResponse
-from app.schemas.like import LikeOut
+from app.schemas.like import LikeOut, LikeBatchRequest, LikeBatchResponse
+from app.schemas.like import LikeExistsBatchRequest, LikeExistsBatchResponse
 from fastapi import Query
 from app.schemas.like import UserLikesCountResponse, UserLikesIdsPageResponse
+from app.services.like_buffer import LikeBufferFull, like_buffer
+from app.services.like_writes import like_pairs, unlike_pairs
+from app.utils.cursor import decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/likes", tags=["likes"])
 
+async def buffer_like(uid: str, rid: str, like: bool) -> None:
+    # write-behind: 202 odmah, upis u bazu radi flusher (nepostojeci user/recept se tada preskace)
+    try:
+        await like_buffer.submit(uid, rid, like)
+    except LikeBufferFull:
+        raise HTTPException(status_code=503, detail="Like buffer is full, try again")
+
 @router.post("", status_code=201, response_model=LikeOut)
-def like_recipe(payload: LikeCreate, driver=Depends(get_driver)):
+async def like_recipe(payload: LikeCreate, response: Response, driver=Depends(get_driver)):
     uid = payload.user_id.strip()
     rid = payload.recipe_id.strip()
     if not uid or not rid:
         raise HTTPException(status_code=400, detail="user_id and recipe_id are required")
 
+    if like_buffer.enabled:
+        await buffer_like(uid, rid, True)
+        response.status_code = 202
+        return {"user_id": uid, "recipe_id": rid}
+
     cypher = """
     MATCH (u:User {id: $uid})
     MATCH (r:Recipe {id: $rid})
     MERGE (u)-[:LIKES]->(r)
-    RETURN u.id AS user_id, r.id AS recipe_id;
+    ON CREATE SET r.like_count = coalesce(r.like_count, 0) + 1,
+                  r.updated_at = timestamp(),
+                  u.likes_given = coalesce(u.likes_given, 0) + 1,
+                  u.likes_changed_at = timestamp()
+    RETURN u.id AS user_id, r.id AS recipe_id, r.title AS title, r.like_count AS like_count;
     """
 
-    with driver.session() as session:
-        rec = session.run(cypher, uid=uid, rid=rid).single()
+    rec = await write_single(driver, cypher, uid=uid, rid=rid)
 
     if not rec:
         raise HTTPException(status_code=404, detail="User or Recipe not found")
 
-    return rec.data()
+    item_similarity.like(uid, rid)
+    popularity.set(rid, rec["title"], rec["like_count"])
+    return {"user_id": rec["user_id"], "recipe_id": rec["recipe_id"]}
 
 @router.delete("", status_code=204)
-def unlike_recipe(payload: LikeCreate, driver=Depends(get_driver)):
+async def unlike_recipe(payload: LikeCreate, driver=Depends(get_driver)):
     uid = payload.user_id.strip()
     rid = payload.recipe_id.strip()
     if not uid or not rid:
         raise HTTPException(status_code=400, detail="user_id and recipe_id are required")
 
+    if like_buffer.enabled:
+        await buffer_like(uid, rid, False)
+        return Response(status_code=202)
+
     cypher = """
     MATCH (u:User {id: $uid})-[rel:LIKES]->(r:Recipe {id: $rid})
     DELETE rel
-    RETURN count(rel) AS deleted;
+    SET r.like_count = coalesce(r.like_count, 1) - 1,
+        r.updated_at = timestamp(),
+        u.likes_given = coalesce(u.likes_given, 1) - 1,
+        u.likes_changed_at = timestamp()
+    RETURN count(*) AS deleted, head(collect([r.title, r.like_count])) AS recipe;
     """
 
-    with driver.session() as session:
-        rec = session.run(cypher, uid=uid, rid=rid).single()
+    rec = await write_single(driver, cypher, uid=uid, rid=rid)
 
     if not rec or rec["deleted"] == 0:
         raise HTTPException(status_code=404, detail="Like not found")
 
+    item_similarity.unlike(uid, rid)
+    popularity.set(rid, *rec["recipe"])
+
 @router.get("/users/{user_id}", response_model=UserLikesIdsResponse)
-def list_user_likes(user_id: str, driver=Depends(get_driver)):
+async def list_user_likes(user_id: str, driver=Depends(get_driver)):
     uid = user_id.strip()
     if not uid:
         raise HTTPException(status_code=400, detail="user_id is required")
@@ -60,25 +94,22 @@ def list_user_likes(user_id: str, driver=Depends(get_driver)):
     ORDER BY id ASC;
     """
 
-    with driver.session() as session:
-        recipe_ids = [row["id"] for row in session.run(cypher, uid=uid)]
+    recipe_ids = [row["id"] for row in await read_all(driver, cypher, uid=uid)]
 
     return {"user_id": uid, "recipe_ids": recipe_ids}
 
 @router.get("/users/{user_id}/count", response_model=UserLikesCountResponse)
-def likes_count(user_id: str, driver=Depends(get_driver)):
+async def likes_count(user_id: str, driver=Depends(get_driver)):
     uid = user_id.strip()
     if not uid:
         raise HTTPException(status_code=400, detail="user_id is required")
 
     cypher = """
     MATCH (u:User {id: $uid})
-    OPTIONAL MATCH (u)-[:LIKES]->(r:Recipe)
-    RETURN count(r) AS total;
+    RETURN coalesce(u.likes_given, 0) AS total;
     """
 
-    with driver.session() as session:
-        rec = session.run(cypher, uid=uid).single()
+    rec = await read_single(driver, cypher, uid=uid)
 
     if not rec:
         raise HTTPException(status_code=404, detail="User not found")
@@ -86,28 +117,28 @@ def likes_count(user_id: str, driver=Depends(get_driver)):
     return {"user_id": uid, "total": rec["total"]}
 
 @router.get("/users/{user_id}/ids", response_model=UserLikesIdsPageResponse)
-def list_user_like_ids(
+async def list_user_like_ids(
     user_id: str,
     limit: int = Query(20, ge=1, le=100),
     skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor sa prethodne strane"),
     driver=Depends(get_driver),
 ):
     uid = user_id.strip()
     if not uid:
         raise HTTPException(status_code=400, detail="user_id is required")
 
+    after = decode_cursor(cursor, 1) or [""]
+
     cypher = """
     MATCH (u:User {id: $uid})
 
-    CALL {
-      WITH u
-      OPTIONAL MATCH (u)-[:LIKES]->(r:Recipe)
-      RETURN count(r) AS total
-    }
+    WITH u, coalesce(u.likes_given, 0) AS total
 
     CALL {
       WITH u
       OPTIONAL MATCH (u)-[:LIKES]->(r:Recipe)
+      WHERE r.id > $after_id
       RETURN r.id AS id
       ORDER BY id ASC
       SKIP $skip
@@ -117,22 +148,23 @@ def list_user_like_ids(
     RETURN total, [x IN collect(id) WHERE x IS NOT NULL] AS recipe_ids;
     """
 
-    with driver.session() as session:
-        rec = session.run(cypher, uid=uid, skip=skip, limit=limit).single()
+    rec = await read_single(driver, cypher, uid=uid, after_id=after[0], skip=skip, limit=limit)
 
     if not rec:
         raise HTTPException(status_code=404, detail="User not found")
 
+    recipe_ids = rec["recipe_ids"] or []
     return {
         "user_id": uid,
         "skip": skip,
         "limit": limit,
         "total": rec["total"],
-        "recipe_ids": rec["recipe_ids"] or [],
+        "next_cursor": encode_cursor(recipe_ids[-1]) if len(recipe_ids) == limit else None,
+        "recipe_ids": recipe_ids,
     }
 
 @router.get("/exists", response_model=LikeExistsResponse)
-def like_exists(
+async def like_exists(
     user_id: str = Query(..., min_length=1),
     recipe_id: str = Query(..., min_length=1),
     driver=Depends(get_driver),
@@ -149,10 +181,83 @@ def like_exists(
     RETURN exists( (u)-[:LIKES]->(r) ) AS ok;
     """
 
-    with driver.session() as session:
-        rec = session.run(cypher, uid=uid, rid=rid).single()
+    rec = await read_single(driver, cypher, uid=uid, rid=rid)
 
     if not rec:
         raise HTTPException(status_code=404, detail="User or Recipe not found")
 
-    return {"user_id": uid, "recipe_id": rid, "exists": bool(rec["ok"])}
\ No newline at end of file
+    # lajk/unlajk koji jos ceka u write-behind baferu ima prednost nad bazom
+    pending = like_buffer.pending_state(uid, rid)
+    exists = bool(rec["ok"]) if pending is None else pending
+    return {"user_id": uid, "recipe_id": rid, "exists": exists}
+
+
+# -----------------------------
+# BATCH (importeri, offline sync, liste)
+# -----------------------------
+
+def unique_pairs(payload: LikeBatchRequest) -> List[Dict[str, str]]:
+    # isti par dva puta u istom UNWIND-u bi se dva puta racunao u brojacima
+    seen = set()
+    out: List[Dict[str, str]] = []
+    for p in payload.pairs:
+        key = (p.user_id, p.recipe_id)
+        if key not in seen:
+            seen.add(key)
+            out.append({"user_id": p.user_id, "recipe_id": p.recipe_id})
+    return out
+
+def batch_results(
+    payload: LikeBatchRequest, outcome: Dict[Tuple[str, str], str]
+) -> List[Dict[str, str]]:
+    return [
+        {"user_id": p.user_id, "recipe_id": p.recipe_id, "status": outcome.get((p.user_id, p.recipe_id), "not_found")}
+        for p in payload.pairs
+    ]
+
+@router.post("/batch", response_model=LikeBatchResponse)
+async def like_recipes_batch(payload: LikeBatchRequest, driver=Depends(get_driver)):
+    rows = await like_pairs(driver, unique_pairs(payload))
+    applied = sum(1 for row in rows if not row["existed"])
+
+    outcome = {(row["user_id"], row["recipe_id"]): "exists" if row["existed"] else "created" for row in rows}
+    return {"applied": applied, "results": batch_results(payload, outcome)}
+
+@router.delete("/batch", response_model=LikeBatchResponse)
+async def unlike_recipes_batch(payload: LikeBatchRequest, driver=Depends(get_driver)):
+    rows = await unlike_pairs(driver, unique_pairs(payload))
+
+    outcome = {(row["user_id"], row["recipe_id"]): "deleted" for row in rows}
+    return {"applied": len(rows), "results": batch_results(payload, outcome)}
+
+@router.post("/exists/batch", response_model=LikeExistsBatchResponse)
+async def like_exists_batch(payload: LikeExistsBatchRequest, driver=Depends(get_driver)):
+    uid = payload.user_id
+    rids = [x.strip() for x in payload.recipe_ids if x and x.strip()]
+    if not rids:
+        raise HTTPException(status_code=400, detail="recipe_ids must not be empty")
+
+    cypher = """
+    MATCH (u:User {id: $uid})
+    UNWIND $rids AS rid
+    OPTIONAL MATCH (r:Recipe {id: rid})
+    RETURN rid AS recipe_id,
+           r IS NOT NULL AND EXISTS { (u)-[:LIKES]->(r) } AS exists;
+    """
+
+    rows = await read_all(driver, cypher, uid=uid, rids=rids)
+
+    if not rows:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    liked = {row["recipe_id"]: bool(row["exists"]) for row in rows}
+    for rid in liked:
+        pending = like_buffer.pending_state(uid, rid)
+        if pending is not None:
+            liked[rid] = pending
+    return {"user_id": uid, "results": [{"recipe_id": rid, "exists": liked[rid]} for rid in rids]}
+
+@router.get("/buffer/metrics")
+async def like_buffer_metrics():
+    # dubina reda i latencija flush-a write-behind bafera (LIKE_WRITE_BEHIND=1)
+    return like_buffer.metrics()
@@ -1,12 +1,36 @@
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
-from app.db.neo4j_driver import get_driver
+from app import settings
+from app.db.neo4j_driver import get_driver, read_single, write_single
+from app.db.ratings import RATING_FIELDS, RATING_SCORE_SET, rating_prior
+from app.services.rating_shards import shard_for
 from app.schemas.rating import RatingUpsert, RatingSummary
 
 router = APIRouter(prefix="/ratings", tags=["ratings"])
 
+# promena agregata (dsum, dcount) ide ili direktno na Recipe ili, sa RATING_SHARDS > 0, u shard
+# izabran po user-u - tada se Recipe cvor ne zakljucava pri svakoj oceni (vidi app/db/ratings.py).
+# r.rating_score se u direktnom modu racuna u istom upisu, a sa shardovima ga azurira merge.
+RATING_DELTA_CYPHER = """
+    FOREACH (_ IN CASE WHEN $shard IS NULL THEN [1] ELSE [] END |
+        SET r.rating_sum = coalesce(r.rating_sum, 0) + dsum,
+            r.rating_count = coalesce(r.rating_count, 0) + dcount,
+            r.updated_at = timestamp()
+        SET """ + RATING_SCORE_SET + """
+    )
+    FOREACH (_ IN CASE WHEN $shard IS NULL THEN [] ELSE [1] END |
+        MERGE (s:RatingShard {recipe_id: r.id, shard: $shard})
+        ON CREATE SET s.sum = 0, s.count = 0
+        SET s.sum = s.sum + dsum,
+            s.count = s.count + dcount
+    )
+"""
+
+def rating_shard(user_id: str) -> Optional[int]:
+    return shard_for(user_id, settings.RATING_SHARDS)
+
 @router.put("/{recipe_id}/rating", response_model=RatingSummary)
-def upsert_rating(recipe_id: str, payload: RatingUpsert, user_id: str, driver=Depends(get_driver)):
+async def upsert_rating(recipe_id: str, payload: RatingUpsert, user_id: str, driver=Depends(get_driver)):
     value = payload.value
 
     cypher = """
@@ -14,127 +38,99 @@ def upsert_rating(recipe_id: str, payload: RatingUpsert, user_id: str, driver=De
     MATCH (r:Recipe {id: $recipe_id})
     OPTIONAL MATCH (u)-[rt:RATED]->(r)
     WITH u, r, head(collect(rt)) AS rt
-    WITH u, r, rt, CASE WHEN rt IS NULL THEN null ELSE rt.value END AS prev
+    WITH u, r, rt,
+         CASE WHEN rt IS NULL THEN $value ELSE $value - rt.value END AS dsum,
+         CASE WHEN rt IS NULL THEN 1 ELSE 0 END AS dcount
 
     // CREATE
     FOREACH (_ IN CASE WHEN rt IS NULL THEN [1] ELSE [] END |
         CREATE (u)-[:RATED {value: $value, createdAt: datetime()}]->(r)
-        SET r.rating_sum = coalesce(r.rating_sum, 0) + $value,
-            r.rating_count = coalesce(r.rating_count, 0) + 1
     )
 
     // UPDATE
     FOREACH (_ IN CASE WHEN rt IS NULL THEN [] ELSE [1] END |
         SET rt.updatedAt = datetime(),
             rt.value = $value
-        SET r.rating_sum = coalesce(r.rating_sum, 0) + ($value - prev)
     )
 
+    """ + RATING_DELTA_CYPHER + """
+
     WITH r, u
     OPTIONAL MATCH (u)-[mine:RATED]->(r)
-    RETURN
-      coalesce(r.rating_sum,0) AS rating_sum,
-      coalesce(r.rating_count,0) AS rating_count,
-      CASE
-        WHEN coalesce(r.rating_count,0) = 0 THEN 0.0
-        ELSE (1.0 * coalesce(r.rating_sum,0)) / r.rating_count
-      END AS rating_avg,
-      mine.value AS my_rating
+    """ + RATING_FIELDS + """
+    RETURN rating_sum, rating_count, rating_avg, mine.value AS my_rating
     """
 
-    try:
-        with driver.session() as session:
-            rec = session.run(
-                cypher,
-                user_id=user_id,
-                recipe_id=recipe_id,
-                value=value
-            ).single()
-            if rec is None:
-                raise HTTPException(status_code=404, detail="User ili recept ne postoji.")
-            return {
-                "rating_sum": rec["rating_sum"],
-                "rating_count": rec["rating_count"],
-                "rating_avg": float(rec["rating_avg"]),
-                "my_rating": rec["my_rating"],
-            }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    rec = await write_single(
+        driver,
+        cypher,
+        user_id=user_id,
+        recipe_id=recipe_id,
+        value=value,
+        shard=rating_shard(user_id),
+        **rating_prior(),
+    )
+    if rec is None:
+        raise HTTPException(status_code=404, detail="User ili recept ne postoji.")
+    return {
+        "rating_sum": rec["rating_sum"],
+        "rating_count": rec["rating_count"],
+        "rating_avg": float(rec["rating_avg"]),
+        "my_rating": rec["my_rating"],
+    }
 
 
 @router.delete("/{recipe_id}/rating", response_model=RatingSummary)
-def delete_rating(recipe_id: str, user_id: str, driver=Depends(get_driver)):
+async def delete_rating(recipe_id: str, user_id: str, driver=Depends(get_driver)):
     cypher = """
     MATCH (u:User {id:$user_id})
     MATCH (r:Recipe {id:$recipe_id})
     OPTIONAL MATCH (u)-[rt:RATED]->(r)
     WITH u, r, head(collect(rt)) AS rt
-    WITH u, r, rt, CASE WHEN rt IS NULL THEN null ELSE rt.value END AS prev
+    WITH u, r, rt,
+         CASE WHEN rt IS NULL THEN 0 ELSE -rt.value END AS dsum,
+         CASE WHEN rt IS NULL THEN 0 ELSE -1 END AS dcount
 
     FOREACH (_ IN CASE WHEN rt IS NULL THEN [] ELSE [1] END |
         DELETE rt
-        SET r.rating_sum = coalesce(r.rating_sum,0) - prev,
-            r.rating_count = coalesce(r.rating_count,0) - 1
     )
 
+    """ + RATING_DELTA_CYPHER + """
+
     WITH r, u
     OPTIONAL MATCH (u)-[mine:RATED]->(r)
-    RETURN
-      coalesce(r.rating_sum,0) AS rating_sum,
-      coalesce(r.rating_count,0) AS rating_count,
-      CASE
-        WHEN coalesce(r.rating_count,0) = 0 THEN 0.0
-        ELSE (1.0 * coalesce(r.rating_sum,0)) / r.rating_count
-      END AS rating_avg,
-      mine.value AS my_rating
+    """ + RATING_FIELDS + """
+    RETURN rating_sum, rating_count, rating_avg, mine.value AS my_rating
     """
 
-    try:
-        with driver.session() as session:
-            rec = session.run(cypher, user_id=user_id, recipe_id=recipe_id).single()
-            if rec is None:
-                raise HTTPException(status_code=404, detail="User ili recept ne postoji.")
-            return {
-                "rating_sum": rec["rating_sum"],
-                "rating_count": rec["rating_count"],
-                "rating_avg": float(rec["rating_avg"]),
-                "my_rating": rec["my_rating"],
-            }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    rec = await write_single(
+        driver, cypher, user_id=user_id, recipe_id=recipe_id, shard=rating_shard(user_id), **rating_prior()
+    )
+    if rec is None:
+        raise HTTPException(status_code=404, detail="User ili recept ne postoji.")
+    return {
+        "rating_sum": rec["rating_sum"],
+        "rating_count": rec["rating_count"],
+        "rating_avg": float(rec["rating_avg"]),
+        "my_rating": rec["my_rating"],
+    }
 
 
 @router.get("/{recipe_id}/rating", response_model=RatingSummary)
-def get_rating(recipe_id: str, user_id: Optional[str] = None, driver=Depends(get_driver)):
+async def get_rating(recipe_id: str, user_id: Optional[str] = None, driver=Depends(get_driver)):
     cypher = """
     MATCH (r:Recipe {id:$recipe_id})
     OPTIONAL MATCH (u:User {id:$user_id})-[mine:RATED]->(r)
-    RETURN
-      coalesce(r.rating_sum,0) AS rating_sum,
-      coalesce(r.rating_count,0) AS rating_count,
-      CASE
-        WHEN coalesce(r.rating_count,0) = 0 THEN 0.0
-        ELSE (1.0 * coalesce(r.rating_sum,0)) / r.rating_count
-      END AS rating_avg,
-      mine.value AS my_rating
+    """ + RATING_FIELDS + """
+    RETURN rating_sum, rating_count, rating_avg, mine.value AS my_rating
     """
 
-    try:
-        with driver.session() as session:
-            rec = session.run(cypher, recipe_id=recipe_id, user_id=user_id).single()
-            if rec is None:
-                raise HTTPException(status_code=404, detail="Recept ne postoji.")
-            return {
-                "rating_sum": rec["rating_sum"],
-                "rating_count": rec["rating_count"],
-                "rating_avg": float(rec["rating_avg"]),
-                "my_rating": rec["my_rating"],
-            }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+    rec = await read_single(driver, cypher, recipe_id=recipe_id, user_id=user_id)
+    if rec is None:
+        raise HTTPException(status_code=404, detail="Recept ne postoji.")
+    return {
+        "rating_sum": rec["rating_sum"],
+        "rating_count": rec["rating_count"],
+        "rating_avg": float(rec["rating_avg"]),
+        "my_rating": rec["my_rating"],
+    }
\ No newline at end of file
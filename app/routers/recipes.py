@@ -1,144 +1,167 @@
-import uuid
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from app.db.neo4j_driver import get_driver
-from app.schemas.recipe import RecipeCreate, RecipeUpdate, IngredientInput, RecipeIdsRequest, RecipeLikesCountOut
+from fastapi.responses import StreamingResponse
+from app import settings
+from app.db.neo4j_driver import get_driver, read_all, read_single
+from app.db.ratings import RATING_FIELDS
+from app.db.hydrate import PAGE_DETAILS, VIEWER_MAP, add_viewer_state, apply_pending_like, hydrate_recipes, with_viewer
+from app.recs.item_similarity import item_similarity
+from app.recs.popularity import popularity
+from app.search.bm25 import description_index
+from app.search.fulltext import search_descriptions
+from app.search.ingredient_index import ingredient_index
+from app.schemas.recipe import RecipeCreate, RecipeUpdate, RecipeIdsRequest, RecipeLikesCountOut
+from app.services.recipe_export import export_ndjson
+from app.services.recipe_writes import InvalidCategory, RecipeNotFound, create_recipe_record, delete_recipe_record, update_recipe_record
+from app.utils.cursor import decode_cursor, next_cursor
 from app.utils.text_norm import sr_norm_latin
 
 router = APIRouter(prefix="/recipes", tags=["recipes"])
 
 
-def norm_ingredients(items: List[IngredientInput]) -> List[dict]:
-    return [{"name": it.name, "unit": it.unit, "amount": it.amount} for it in items]
-
+# trazeni sastojci se porede sa Ingredient.name_norm (indeksiran), pa se normalizuju istom f-jom
 def norm_wanted_names(items: List[str]) -> List[str]:
     out: List[str] = []
     seen = set()
     for x in items:
         if not x:
             continue
-        v = x.strip().lower()
+        v = sr_norm_latin(x)
         if not v or v in seen:
             continue
         seen.add(v)
         out.append(v)
     return out
 
+# ?viewer_id= na listama: prazan string se tretira kao da nije poslat
+def norm_viewer_id(viewer_id: Optional[str]) -> Optional[str]:
+    return (viewer_id or "").strip() or None
+
 
 # -----------------------------
 # SEARCH
 # -----------------------------
 
+# score DESC, title ASC, id ASC -> cursor = (score, title, id)
+# krece od pogodjenih Ingredient cvorova (ingredient_name_norm indeks) pa se siri na recepte
+SEARCH_BY_INGREDIENTS_CYPHER = """
+MATCH (i:Ingredient)
+WHERE i.name_norm IN $wanted
+MATCH (r:Recipe)-[rel:HAS_INGREDIENT]->(i)
+WITH r,
+     collect(DISTINCT {
+       name: i.name,
+       amount: rel.amount,
+       unit: rel.unit
+     }) AS matched,
+     count(DISTINCT i.name_norm) AS score
+WHERE $after IS NULL
+   OR score < $after[0]
+   OR (score = $after[0] AND (r.title > $after[1] OR (r.title = $after[1] AND r.id > $after[2])))
+WITH r, matched, score
+ORDER BY score DESC, r.title ASC, r.id ASC
+SKIP $skip
+LIMIT $limit
+OPTIONAL MATCH (r)-[:IN_CATEGORY]->(c:Category)
+RETURN r.id AS id,
+       r.title AS title,
+       coalesce(c.name, "uncategorized") AS category,
+       matched,
+       score,
+       """ + VIEWER_MAP + """ AS viewer
+ORDER BY score DESC, title ASC, id ASC;
+"""
+
+async def search_by_ingredients(
+    driver, wanted: List[str], skip: int, limit: int, cursor: Optional[str], viewer_id: Optional[str] = None
+) -> dict:
+    after = decode_cursor(cursor, 3)
+    if ingredient_index.ready:
+        rows = await add_viewer_state(driver, ingredient_index.search(wanted, skip, limit, after), viewer_id)
+    else:
+        rows = with_viewer(await read_all(
+            driver, SEARCH_BY_INGREDIENTS_CYPHER,
+            wanted=wanted, after=after, skip=skip, limit=limit, viewer_id=viewer_id,
+        ))
+    return {
+        "wanted": wanted,
+        "skip": skip,
+        "limit": limit,
+        "next_cursor": next_cursor(rows, limit, "score", "title", "id"),
+        "results": rows,
+    }
+
+
 @router.get("/search")
-def search_recipes(
+async def search_recipes(
     ingredients: List[str] = Query(..., description="Ponovi parametar: ?ingredients=jaja&ingredients=sir"),
     limit: int = Query(10, ge=1, le=50),
     skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor sa prethodne strane"),
+    viewer_id: Optional[str] = Query(None, description="trenutni user: liked_by_me, my_rating, like_count, rating_avg po kartici"),
     driver=Depends(get_driver),
 ):
     wanted = norm_wanted_names(ingredients)
     if not wanted:
         raise HTTPException(status_code=400, detail="ingredients must not be empty")
-    # !!! testtttttttttttttttttt
-    cypher = """
-    WITH $wanted AS wanted
-    MATCH (r:Recipe)-[rel:HAS_INGREDIENT]->(i:Ingredient)
-    OPTIONAL MATCH (r)-[:IN_CATEGORY]->(c:Category)
-    WHERE toLower(i.name) IN wanted
-    WITH r,
-         collect(DISTINCT {
-           name: toLower(i.name),
-           amount: rel.amount,
-           unit: rel.unit
-         }) AS matched,
-         count(DISTINCT i) AS score
-    RETURN r.id AS id,
-           r.title AS title,
-           c.name AS category,
-           matched,
-           score
-    ORDER BY score DESC, title ASC
-    SKIP $skip
-    LIMIT $limit;
-    """
-
-    with driver.session() as session:
-        rows = [rec.data() for rec in session.run(cypher, wanted=wanted, skip=skip, limit=limit)]
 
-    return {"wanted": wanted, "skip": skip, "limit": limit, "results": rows}
+    return await search_by_ingredients(driver, wanted, skip, limit, cursor, norm_viewer_id(viewer_id))
 
 
 @router.get("/search_csv")
-def search_recipes_csv(
+async def search_recipes_csv(
     ingredients: str = Query(..., description="Npr: ?ingredients=jaja,sir,testenina"),
     limit: int = Query(10, ge=1, le=50),
     skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor sa prethodne strane"),
+    viewer_id: Optional[str] = Query(None, description="trenutni user: liked_by_me, my_rating, like_count, rating_avg po kartici"),
     driver=Depends(get_driver),
 ):
     wanted = norm_wanted_names(ingredients.split(","))
     if not wanted:
         raise HTTPException(status_code=400, detail="ingredients must not be empty")
 
-    cypher = """
-    WITH $wanted AS wanted
-    MATCH (r:Recipe)-[rel:HAS_INGREDIENT]->(i:Ingredient)
-    WHERE toLower(i.name) IN wanted
-    OPTIONAL MATCH (r)-[:IN_CATEGORY]->(c:Category)
-    WITH r, c,
-         collect(DISTINCT {
-           name: toLower(i.name),
-           amount: rel.amount,
-           unit: rel.unit
-         }) AS matched,
-         count(DISTINCT i) AS score
-    RETURN r.id AS id,
-           r.title AS title,
-           coalesce(c.name, "uncategorized") AS category,
-           matched,
-           score
-    ORDER BY score DESC, title ASC
-    SKIP $skip
-    LIMIT $limit;
-    """
-
-    with driver.session() as session:
-        rows = [rec.data() for rec in session.run(cypher, wanted=wanted, skip=skip, limit=limit)]
-
-    return {"wanted": wanted, "skip": skip, "limit": limit, "results": rows}
+    return await search_by_ingredients(driver, wanted, skip, limit, cursor, norm_viewer_id(viewer_id))
 
 @router.get("/search_by_category")
-def search_by_category(
+async def search_by_category(
     category: str = Query(..., min_length=1, description=""),
     limit: int = Query(20, ge=1, le=100),
     skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor sa prethodne strane"),
+    viewer_id: Optional[str] = Query(None, description="trenutni user: liked_by_me, my_rating, like_count, rating_avg po kartici"),
     driver=Depends(get_driver),
 ):
     cat = category.strip().lower()
     if not cat:
         raise HTTPException(status_code=400, detail="category must not be empty")
 
+    after = decode_cursor(cursor, 2) or ["", ""]
+
+    # (title, id) keyset -> recipe_title_id indeks, strana se bira pre skupljanja sastojaka
     cypher = """
     MATCH (c:Category {name: $cat})
     
     CALL {
       WITH c
       MATCH (r:Recipe)-[:IN_CATEGORY]->(c)
-      OPTIONAL MATCH (r)-[rel:HAS_INGREDIENT]->(i:Ingredient)
-      WITH r, c, collect({
-        name: i.name,
-        amount: rel.amount,
-        unit: rel.unit
-      }) AS ingredients
-      ORDER BY r.title ASC
+      WHERE r.title >= $after_title
+        AND (r.title > $after_title OR r.id > $after_id)
+      WITH r
+      ORDER BY r.title ASC, r.id ASC
       SKIP $skip
       LIMIT $limit
+      """ + PAGE_DETAILS + """
+      WITH r, ingredients
+      ORDER BY r.title ASC, r.id ASC
       RETURN collect({
         id: r.id,
         title: r.title,
         description: r.description,
-        category: c.name,
-        ingredients: ingredients
+        category: $cat,
+        ingredients: ingredients,
+        viewer: """ + VIEWER_MAP + """
       }) AS results
     }
     
@@ -151,18 +174,22 @@ def search_by_category(
     RETURN total, results;
     """
 
-    with driver.session() as session:
-        rec = session.run(cypher, cat=cat, skip=skip, limit=limit).single()
+    rec = await read_single(
+        driver, cypher, cat=cat, after_title=after[0], after_id=after[1], skip=skip, limit=limit,
+        viewer_id=norm_viewer_id(viewer_id),
+    )
 
     if not rec:
         raise HTTPException(status_code=400, detail="Invalid category")
 
+    results = with_viewer(rec["results"] or [])
     return {
         "category": cat,
         "skip": skip,
         "limit": limit,
         "total": rec["total"],
-        "results": rec["results"] or [],
+        "next_cursor": next_cursor(results, limit, "title", "id"),
+        "results": results,
     }
 
 # imam 2 polja: description i description_norm, gde je description_norm normalizovano f-jom sr_norm_latin i nad njim je kreiran index u bazi
@@ -170,49 +197,25 @@ def search_by_category(
 # description se koristi da cuva originalni opis i da prikaz bude lepsi (prikazuje slova č ć đ... velika slova i slicno)
 # neo4j koristi Lucene biblioteku
 @router.get("/search_by_description")
-def search_by_description(
+async def search_by_description(
     q: str = Query(..., min_length=1),
     limit: int = Query(20, ge=1, le=100),
     skip: int = Query(0, ge=0),
+    mode: str = Query("match", pattern="^(match|prefix|fuzzy)$", description="match | prefix (term*) | fuzzy (term~)"),
     driver=Depends(get_driver),
 ):
     query = sr_norm_latin(q)
     if not query:
         raise HTTPException(status_code=400, detail="q must not be empty")
 
-    cypher = """
-    CALL db.index.fulltext.queryNodes("recipeDescNormIndex", $q) YIELD node, score
-    WITH node AS r, score
-    OPTIONAL MATCH (r)-[:IN_CATEGORY]->(c:Category)
-    OPTIONAL MATCH (r)-[rel:HAS_INGREDIENT]->(i:Ingredient)
-    WITH r, c, score, collect({
-      name: i.name,
-      amount: rel.amount,
-      unit: rel.unit
-    }) AS ingredients
-    RETURN r.id AS id,
-           r.title AS title,
-           r.description AS description,
-           c.name AS category,
-           score,
-           ingredients
-    ORDER BY score DESC, title ASC
-    SKIP $skip
-    LIMIT $limit;
-    """
-
-    with driver.session() as session:
-        rows = [rec.data() for rec in session.run(cypher, q=query, skip=skip, limit=limit)]
-
-    # total (za UI paginaciju)
-    cypher_total = """
-    CALL db.index.fulltext.queryNodes("recipeDescNormIndex", $q) YIELD node
-    RETURN count(node) AS total;
-    """
-    with driver.session() as session:
-        total = session.run(cypher_total, q=query).single()["total"]
+    # DESCRIPTION_SEARCH=bm25: rangiranje in-process, iz baze se cita samo strana
+    if settings.DESCRIPTION_SEARCH == "bm25" and description_index.ready:
+        total, page = description_index.search(query, mode, skip, limit)
+        rows = await hydrate_recipes(driver, page)
+    else:
+        total, rows = await search_descriptions(driver, query, mode, skip, limit)
 
-    return {"q": query, "skip": skip, "limit": limit, "total": total, "results": rows}
+    return {"q": query, "mode": mode, "skip": skip, "limit": limit, "total": total, "results": rows}
 
 
 # -----------------------------
@@ -220,40 +223,133 @@ def search_by_description(
 # -----------------------------
 
 @router.get("/popular")
-def popular_recipes(
+async def popular_recipes(
     limit: int = Query(10, ge=1, le=50),
     skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor sa prethodne strane"),
+    viewer_id: Optional[str] = Query(None, description="trenutni user: liked_by_me, my_rating, like_count, rating_avg po kartici"),
     driver=Depends(get_driver),
 ):
+    # likes DESC, title ASC, id ASC -> cursor = (likes, title, id)
+    # like_count je materijalizovan i indeksiran (recipe_like_count) => top-K citanje po indeksu
+    after = decode_cursor(cursor, 3)
+    viewer_id = norm_viewer_id(viewer_id)
+
+    # strana iz in-process rankinga => citaju se samo recepti sa strane
+    page = popularity.page(skip, limit, after)
+    if page is not None:
+        rows = await hydrate_recipes(driver, page, viewer_id)
+        return {
+            "skip": skip,
+            "limit": limit,
+            "next_cursor": next_cursor(rows, limit, "likes", "title", "id"),
+            "results": rows,
+        }
+
     cypher = """
     MATCH (r:Recipe)
-    OPTIONAL MATCH (u:User)-[:LIKES]->(r)
-    WITH r, count(u) AS likes
-    OPTIONAL MATCH (r)-[:IN_CATEGORY]->(c:Category)
-    OPTIONAL MATCH (r)-[rel:HAS_INGREDIENT]->(i:Ingredient)
-    WITH r, likes, c, collect({
-      name: i.name,
-      amount: rel.amount,
-      unit: rel.unit
-    }) AS ingredients
+    WHERE r.like_count IS NOT NULL
+      AND ($after IS NULL
+           OR r.like_count < $after[0]
+           OR (r.like_count = $after[0] AND (r.title > $after[1] OR (r.title = $after[1] AND r.id > $after[2]))))
+    WITH r, r.like_count AS likes
+    ORDER BY likes DESC, r.title ASC, r.id ASC
+    SKIP $skip
+    LIMIT $limit
+    """ + PAGE_DETAILS + """
     RETURN r.id AS id,
            r.title AS title,
            r.description AS description,
-           c.name AS category,
+           category,
            likes,
-           ingredients
-    ORDER BY likes DESC, title ASC
+           ingredients,
+           """ + VIEWER_MAP + """ AS viewer
+    ORDER BY likes DESC, title ASC, id ASC;
+    """
+
+    rows = with_viewer(await read_all(driver, cypher, after=after, skip=skip, limit=limit, viewer_id=viewer_id))
+
+    return {
+        "skip": skip,
+        "limit": limit,
+        "next_cursor": next_cursor(rows, limit, "likes", "title", "id"),
+        "results": rows,
+    }
+
+@router.get("/top_rated")
+async def top_rated_recipes(
+    category: Optional[str] = Query(None, description="samo recepti iz kategorije"),
+    limit: int = Query(10, ge=1, le=50),
+    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor sa prethodne strane"),
+    viewer_id: Optional[str] = Query(None, description="trenutni user: liked_by_me, my_rating, like_count, rating_avg po kartici"),
+    driver=Depends(get_driver),
+):
+    # rating_score DESC, title ASC, id ASC -> cursor = (score, title, id)
+    # rating_score (Bayesov skor, app/db/ratings.py) je materijalizovan i indeksiran (recipe_rating_score)
+    # => citanje ide niz indeks i staje posle LIMIT-a; filter po kategoriji se proverava usput po receptu
+    after = decode_cursor(cursor, 3)
+    viewer_id = norm_viewer_id(viewer_id)
+    # imena kategorija su lowercase (kao by_category)
+    category = category.strip().lower() if category else None
+
+    cypher = """
+    MATCH (r:Recipe)
+    WHERE r.rating_score IS NOT NULL
+      AND ($after IS NULL
+           OR r.rating_score < $after[0]
+           OR (r.rating_score = $after[0] AND (r.title > $after[1] OR (r.title = $after[1] AND r.id > $after[2]))))
+      AND ($category IS NULL OR EXISTS { (r)-[:IN_CATEGORY]->(:Category {name: $category}) })
+    WITH r, r.rating_score AS score
+    ORDER BY score DESC, r.title ASC, r.id ASC
     SKIP $skip
-    LIMIT $limit;
+    LIMIT $limit
+    """ + RATING_FIELDS + """
+    """ + PAGE_DETAILS + """
+    RETURN r.id AS id,
+           r.title AS title,
+           r.description AS description,
+           category,
+           score,
+           rating_avg,
+           rating_count,
+           ingredients,
+           """ + VIEWER_MAP + """ AS viewer
+    ORDER BY score DESC, title ASC, id ASC;
     """
 
-    with driver.session() as session:
-        rows = [rec.data() for rec in session.run(cypher, skip=skip, limit=limit)]
+    rows = with_viewer(await read_all(
+        driver, cypher, after=after, category=category, skip=skip, limit=limit, viewer_id=viewer_id
+    ))
+
+    return {
+        "category": category,
+        "skip": skip,
+        "limit": limit,
+        "next_cursor": next_cursor(rows, limit, "score", "title", "id"),
+        "results": rows,
+    }
+
+@router.get("/export")
+async def export_recipes(
+    since: Optional[int] = Query(None, ge=0, description="samo recepti izmenjeni od (ms, r.updated_at); bez => ceo katalog"),
+    gzip: bool = Query(False, description="gzip (Content-Encoding: gzip)"),
+    driver=Depends(get_driver),
+):
+    # X-Export-Next-Since: since za sledecu deltu (vreme baze pre prvog batch-a, pa se nista ne propusta)
+    now = await read_single(driver, "RETURN timestamp() AS now")
+    headers = {"X-Export-Next-Since": str(now["now"])}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(export_ndjson(driver, since, gzip), media_type="application/x-ndjson", headers=headers)
 
-    return {"skip": skip, "limit": limit, "results": rows}
 
 @router.post("/by_ids")
-def recipes_by_ids(payload: RecipeIdsRequest, driver=Depends(get_driver)):
+async def recipes_by_ids(
+    payload: RecipeIdsRequest,
+    viewer_id: Optional[str] = Query(None, description="trenutni user: liked_by_me, my_rating, like_count, rating_avg po kartici"),
+    driver=Depends(get_driver),
+):
     ids = [x.strip() for x in payload.ids if x and x.strip()]
     if not ids:
         raise HTTPException(status_code=400, detail="ids must not be empty")
@@ -274,123 +370,168 @@ def recipes_by_ids(payload: RecipeIdsRequest, driver=Depends(get_driver)):
            r.title AS title,
            r.description AS description,
            c.name AS category,
-           ingredients
+           ingredients,
+           """ + VIEWER_MAP + """ AS viewer
     ORDER BY idx ASC;
     """
 
-    with driver.session() as session:
-        rows = [rec.data() for rec in session.run(cypher, ids=ids)]
+    rows = with_viewer(await read_all(driver, cypher, ids=ids, viewer_id=norm_viewer_id(viewer_id)))
 
     return {"results": rows}
 
 @router.get("/{recipe_id}/likes_count", response_model=RecipeLikesCountOut)
-def recipe_likes_count(recipe_id: str, driver=Depends(get_driver)):
+async def recipe_likes_count(recipe_id: str, driver=Depends(get_driver)):
     rid = recipe_id.strip()
     if not rid:
         raise HTTPException(status_code=400, detail="recipe_id is required")
 
     cypher = """
     MATCH (r:Recipe {id: $rid})
-    OPTIONAL MATCH (:User)-[l:LIKES]->(r)
-    RETURN r.id AS recipe_id, count(l) AS likes;
+    RETURN r.id AS recipe_id, coalesce(r.like_count, 0) AS likes;
     """
 
-    with driver.session() as session:
-        rec = session.run(cypher, rid=rid).single()
+    rec = await read_single(driver, cypher, rid=rid)
 
     if not rec:
         raise HTTPException(status_code=404, detail="Recipe not found")
 
-    return rec.data()
+    return rec
 
+@router.get("/{recipe_id}/view")
+async def recipe_view(
+    recipe_id: str,
+    user_id: Optional[str] = Query(None, description="trenutni user (liked_by_me, my_rating)"),
+    driver=Depends(get_driver),
+):
+    # sve sto stranica recepta prikazuje, jednim upitom (umesto get_recipe + likes_count + likes/exists + rating)
+    rid = recipe_id.strip()
+    if not rid:
+        raise HTTPException(status_code=400, detail="recipe_id is required")
+    uid = norm_viewer_id(user_id)
 
-# -----------------------------
-# CRUD
-# -----------------------------
+    cypher = """
+    MATCH (r:Recipe {id: $rid})
+    OPTIONAL MATCH (creator:User)-[:CREATED]->(r)
+    OPTIONAL MATCH (r)-[:IN_CATEGORY]->(c:Category)
+    OPTIONAL MATCH (me:User {id: $uid})
+    CALL {
+      WITH r
+      OPTIONAL MATCH (r)-[rel:HAS_INGREDIENT]->(i:Ingredient)
+      RETURN collect({ name: i.name, amount: rel.amount, unit: rel.unit }) AS ingredients
+    }
+    OPTIONAL MATCH (me)-[mine:RATED]->(r)
+    """ + RATING_FIELDS + """
+    RETURN r.id AS id,
+       r.title AS title,
+       r.description AS description,
+       c.name AS category,
+       { id: creator.id, username: creator.username } AS created_by,
+       ingredients,
+       coalesce(r.like_count, 0) AS like_count,
+       me IS NOT NULL AND EXISTS { (me)-[:LIKES]->(r) } AS liked_by_me,
+       rating_sum,
+       rating_count,
+       rating_avg,
+       mine.value AS my_rating;
+    """
 
-@router.post("", status_code=201)
-def create_recipe(payload: RecipeCreate, driver=Depends(get_driver)):
-    rid = str(uuid.uuid4())
-    title = payload.title
-    description = payload.description
-    description_norm = sr_norm_latin(description) if description else None
-    ings = norm_ingredients(payload.ingredients)
-    category = payload.category
+    rec = await read_single(driver, cypher, rid=rid, uid=uid)
+
+    if not rec:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+
+    return apply_pending_like(rec, uid)
+
+@router.get("/{recipe_id}/also_liked")
+async def recipe_also_liked(
+    recipe_id: str,
+    limit: int = Query(10, ge=1, le=50),
+    skip: int = Query(0, ge=0),
+    driver=Depends(get_driver),
+):
+    rid = recipe_id.strip()
+    if not rid:
+        raise HTTPException(status_code=400, detail="recipe_id is required")
+
+    # sa ITEM_SIMILARITY=1 susedi su vec izracunati (lookup), inace co-like obilazak u Cypher-u
+    if item_similarity.ready:
+        rows = await hydrate_recipes(driver, item_similarity.also_liked(rid, skip, limit))
+        return {"recipe_id": rid, "skip": skip, "limit": limit, "results": rows}
 
     cypher = """
-    MATCH (c:Category {name: $category})
-    CREATE (r:Recipe {id: $rid, title: $title, description: $description, description_norm: $description_norm, rating_sum: 0, rating_count: 0, rating_avg: 0.0})
-    MERGE (r)-[:IN_CATEGORY]->(c)
-    WITH r
-    UNWIND $ings AS ing
-    MERGE (i:Ingredient {name: ing.name})
-    MERGE (r)-[rel:HAS_INGREDIENT]->(i)
-    SET rel.amount = ing.amount,
-        rel.unit = ing.unit
-    RETURN r.id AS id,
-           r.title AS title,
-           r.description AS description,
-           r.rating_sum AS rating_sum, 
-           r.rating_count AS rating_count,
-           rating_avg AS rating_avg;
+    MATCH (src:Recipe {id: $rid})<-[:LIKES]-(:User)-[:LIKES]->(r:Recipe)
+    WHERE r <> src
+    WITH src, r, count(*) AS co
+    WITH r, toFloat(co) / sqrt(toFloat(src.like_count * r.like_count)) AS score
+    WHERE score > 0
+    ORDER BY score DESC, r.id ASC
+    SKIP $skip
+    LIMIT $limit
+    RETURN r.id AS id, score, "collaborative" AS mode
     """
+    scored = await read_all(driver, cypher, rid=rid, skip=skip, limit=limit)
+    rows = await hydrate_recipes(driver, scored)
+    return {"recipe_id": rid, "skip": skip, "limit": limit, "results": rows}
 
-    with driver.session() as session:
-        rec = session.run(
-            cypher,
-            rid=rid,
-            title=title,
-            description=description,
-            description_norm=description_norm,
-            ings=ings,
-            category=category
-        ).single()
 
+# -----------------------------
+# CRUD
+# -----------------------------
+
+@router.post("", status_code=201)
+async def create_recipe(payload: RecipeCreate, driver=Depends(get_driver)):
+    rec = await create_recipe_record(driver, payload)
     if not rec:
         raise HTTPException(status_code=400, detail="Invalid category")
 
-    return {"recipe": rec.data() if rec else None}
+    return {"recipe": rec}
 
 
 @router.get("")
-def list_recipes(
+async def list_recipes(
     limit: int = Query(20, ge=1, le=100),
     skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor sa prethodne strane"),
     driver=Depends(get_driver),
 ):
+    after = decode_cursor(cursor, 2) or ["", ""]
+
     cypher = """
     MATCH (r:Recipe)
-    OPTIONAL MATCH (r)-[:IN_CATEGORY]->(c:Category)
-    OPTIONAL MATCH (r)-[rel:HAS_INGREDIENT]->(i:Ingredient)
-    WITH r, c, collect({
-      name: i.name,
-      amount: rel.amount,
-      unit: rel.unit
-    }) AS ingredients
+    WHERE r.title >= $after_title
+      AND (r.title > $after_title OR r.id > $after_id)
+    WITH r
+    ORDER BY r.title ASC, r.id ASC
+    SKIP $skip
+    LIMIT $limit
+    """ + PAGE_DETAILS + """
     RETURN r.id AS id,
            r.title AS title,
            r.description AS description,
-           c.name AS category,
+           category,
            ingredients
-    ORDER BY title ASC
-    SKIP $skip
-    LIMIT $limit;
+    ORDER BY title ASC, id ASC;
     """
 
-    with driver.session() as session:
-        rows = [rec.data() for rec in session.run(cypher, skip=skip, limit=limit)]
+    rows = await read_all(driver, cypher, after_title=after[0], after_id=after[1], skip=skip, limit=limit)
 
-    return {"skip": skip, "limit": limit, "results": rows}
+    return {
+        "skip": skip,
+        "limit": limit,
+        "next_cursor": next_cursor(rows, limit, "title", "id"),
+        "results": rows,
+    }
 
 
 @router.get("/{recipe_id}")
-def get_recipe(recipe_id: str, driver=Depends(get_driver)):
+async def get_recipe(recipe_id: str, driver=Depends(get_driver)):
     rid = recipe_id.strip()
     if not rid:
         raise HTTPException(status_code=400, detail="recipe_id is required")
 
     cypher = """
     MATCH (r:Recipe {id: $rid})
+    """ + RATING_FIELDS + """
     OPTIONAL MATCH (u:User)-[:CREATED]->(r)
     OPTIONAL MATCH (r)-[:IN_CATEGORY]->(c:Category)
     OPTIONAL MATCH (r)-[rel:HAS_INGREDIENT]->(i:Ingredient)
@@ -400,123 +541,41 @@ def get_recipe(recipe_id: str, driver=Depends(get_driver)):
        c.name AS category,
        { id: u.id, username: u.username } AS created_by,
        collect({ name: i.name, amount: rel.amount, unit: rel.unit }) AS ingredients,
-       coalesce(r.rating_sum,0) AS rating_sum,
-       coalesce(r.rating_count,0) AS rating_count,
-       CASE
-         WHEN coalesce(r.rating_sum,0) = 0 THEN 0.0
-         ELSE (1.0 * coalesce(r.rating_sum,0)) / coalesce(r.rating_count,0)
-       END AS rating_avg;
-
+       rating_sum,
+       rating_count,
+       rating_avg;
     """
 
-    with driver.session() as session:
-        rec = session.run(cypher, rid=rid).single()
+    rec = await read_single(driver, cypher, rid=rid)
 
     if not rec:
         raise HTTPException(status_code=404, detail="Recipe not found")
 
-    return rec.data()
+    return rec
 
 
 @router.patch("/{recipe_id}")
-def update_recipe(recipe_id: str, payload: RecipeUpdate, driver=Depends(get_driver)):
+async def update_recipe(recipe_id: str, payload: RecipeUpdate, driver=Depends(get_driver)):
     rid = recipe_id.strip()
     if not rid:
         raise HTTPException(status_code=400, detail="recipe_id is required")
 
-    # title: None => nije poslato
-    # description: None => nije poslato; "" => obriši;
-    title = payload.title
-    description = payload.description
-    description_norm = sr_norm_latin(description) if description else None
-    ings = norm_ingredients(payload.ingredients) if payload.ingredients is not None else None
-    category = payload.category
-
-    if title is None and payload.description is None and ings is None and category is None:
+    if payload.title is None and payload.description is None and payload.ingredients is None and payload.category is None:
         raise HTTPException(status_code=400, detail="Nothing to update")
 
-    if title is not None:
-        cypher_title = """
-        MATCH (r:Recipe {id: $rid})
-        SET r.title = $title
-        RETURN r.id AS id;
-        """
-        with driver.session() as session:
-            ok = session.run(cypher_title, rid=rid, title=title).single()
-        if not ok:
-            raise HTTPException(status_code=404, detail="Recipe not found")
-
-    if payload.description is not None:
-        cypher_desc = """
-        MATCH (r:Recipe {id: $rid})
-        SET r.description = $description
-        SET r.description_norm = $description_norm
-        RETURN r.id AS id;
-        """
-        with driver.session() as session:
-            ok = session.run(cypher_desc, rid=rid, description=description, description_norm=description_norm).single()
-        if not ok:
-            raise HTTPException(status_code=404, detail="Recipe not found")
-
-    if category is not None:
-        cypher_cat = """
-        MATCH (r:Recipe {id: $rid})
-        MATCH (c:Category {name: $category})
-        OPTIONAL MATCH (r)-[old:IN_CATEGORY]->(:Category)
-        DELETE old
-        MERGE (r)-[:IN_CATEGORY]->(c)
-        RETURN r.id AS id;
-        """
-        with driver.session() as session:
-            ok = session.run(cypher_cat, rid=rid, category=category).single()
-        if not ok:
-            # moze biti Recipe not found ili Category ne postoji
-            # prvo proverim da li recipe postoji
-            check = """
-            MATCH (r:Recipe {id: $rid})
-            RETURN r.id AS id;
-            """
-            with driver.session() as session:
-                exists = session.run(check, rid=rid).single()
-            if not exists:
-                raise HTTPException(status_code=404, detail="Recipe not found")
-            raise HTTPException(status_code=400, detail="Invalid category")
-
-    if ings is not None:
-        cypher_ings = """
-        MATCH (r:Recipe {id: $rid})
-        OPTIONAL MATCH (r)-[old:HAS_INGREDIENT]->(:Ingredient)
-        DELETE old
-        WITH r
-        UNWIND $ings AS ing
-        MERGE (i:Ingredient {name: ing.name})
-        MERGE (r)-[rel:HAS_INGREDIENT]->(i)
-        SET rel.amount = ing.amount,
-            rel.unit = ing.unit
-        RETURN r.id AS id;
-        """
-        with driver.session() as session:
-            ok = session.run(cypher_ings, rid=rid, ings=ings).single()
-        if not ok:
-            raise HTTPException(status_code=404, detail="Recipe not found")
-
-    return get_recipe(rid, driver)
+    try:
+        return await update_recipe_record(driver, rid, payload)
+    except RecipeNotFound:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    except InvalidCategory:
+        raise HTTPException(status_code=400, detail="Invalid category")
 
 
 @router.delete("/{recipe_id}", status_code=204)
-def delete_recipe(recipe_id: str, driver=Depends(get_driver)):
+async def delete_recipe(recipe_id: str, driver=Depends(get_driver)):
     rid = recipe_id.strip()
     if not rid:
         raise HTTPException(status_code=400, detail="recipe_id is required")
 
-    cypher = """
-    MATCH (r:Recipe {id: $rid})
-    DETACH DELETE r
-    RETURN count(*) AS deleted;
-    """
-
-    with driver.session() as session:
-        rec = session.run(cypher, rid=rid).single()
-
-    if not rec or rec["deleted"] == 0:
-        raise HTTPException(status_code=404, detail="Recipe not found")
\ No newline at end of file
+    if not await delete_recipe_record(driver, rid):
+        raise HTTPException(status_code=404, detail="Recipe not found")
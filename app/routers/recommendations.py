@@ -1,13 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from app.db.neo4j_driver import get_driver
+from app import settings
+from app.db.neo4j_driver import get_driver, read_all, read_single
+from app.db.hydrate import PAGE_DETAILS, hydrate_recipes
+from app.recs.item_similarity import item_similarity
+from app.recs.popularity import popularity
 
 router = APIRouter(prefix="/recommendations", tags=["recommendations"])
 
 @router.get("/{user_id}")
-def recommend_for_user(
+async def recommend_for_user(
     user_id: str,
     limit: int = Query(10, ge=1, le=50),
     skip: int = Query(0, ge=0),
+    mode: str = Query("content", pattern="^(content|collaborative)$"),
     driver=Depends(get_driver),
 ):
 
@@ -15,6 +20,20 @@ def recommend_for_user(
     if not uid:
         raise HTTPException(status_code=400, detail="user_id is required")
 
+    if mode == "collaborative":
+        rows = await _collaborative(driver, uid, skip, limit)
+        if rows is not None:
+            return {"user_id": uid, "skip": skip, "limit": limit, "results": rows}
+        # user bez lajkova -> isti popular fallback kao content mod
+
+    if settings.RECS_PRECOMPUTED:
+        pre = await _precomputed(driver, uid, skip, limit)
+        if pre is not None:
+            return {"user_id": uid, "skip": skip, "limit": limit, "results": pre}
+
+    # kandidati nastaju samo sirenjem liked recept -> sastojak -> drugi recepti (komsiluk usera),
+    # a ne skeniranjem svih recepata; score je suma IDF tezina zajednickih sastojaka
+    # (so, biber... su u skoro svakom receptu pa nose ~0). Strana (skip/limit) se bira pre hidracije.
     cypher = """
     // Proveri da user postoji + ucitaj lajkovane
     MATCH (u:User {id: $uid})
@@ -22,29 +41,28 @@ def recommend_for_user(
     WITH collect(DISTINCT liked) AS likedRecipes
 
     CALL {
-      // ---------- POPULAR fallback ----------
+      // ---------- POPULAR fallback: strana iz in-process rankinga (app/recs/popularity.py) ----------
       WITH likedRecipes
-      WITH likedRecipes WHERE size(likedRecipes) = 0
+      WITH likedRecipes WHERE size(likedRecipes) = 0 AND $popular IS NOT NULL
+
+      UNWIND $popular AS p
+      MATCH (r:Recipe {id: p.id})
+      RETURN r, toFloat(p.likes) AS score, "popular" AS mode
+
+      UNION
+
+      // ---------- POPULAR fallback (top-K po recipe_like_count indeksu, ranking nije dostupan) ----------
+      WITH likedRecipes
+      WITH likedRecipes WHERE size(likedRecipes) = 0 AND $popular IS NULL
 
       MATCH (r:Recipe)
-      OPTIONAL MATCH (x:User)-[:LIKES]->(r)
-      WITH r, count(x) AS score
-
-      OPTIONAL MATCH (r)-[:IN_CATEGORY]->(c:Category)
-      OPTIONAL MATCH (r)-[rel:HAS_INGREDIENT]->(i:Ingredient)
-
-      RETURN
-        r.id AS id,
-        r.title AS title,
-        r.description AS description,
-        c.name AS category,
-        score AS score,
-        collect(DISTINCT {
-          name: i.name,
-          amount: rel.amount,
-          unit: rel.unit
-        }) AS ingredients,
-        "popular" AS mode
+      WHERE r.like_count IS NOT NULL
+      WITH r
+      ORDER BY r.like_count DESC, r.title ASC, r.id ASC
+      SKIP $skip
+      LIMIT $limit
+
+      RETURN r, toFloat(r.like_count) AS score, "popular" AS mode
 
       UNION
 
@@ -54,48 +72,125 @@ def recommend_for_user(
 
       UNWIND likedRecipes AS lr
       MATCH (lr)-[:HAS_INGREDIENT]->(pi:Ingredient)
-      WITH likedRecipes, collect(DISTINCT toLower(pi.name)) AS profile
+      WITH likedRecipes, collect(DISTINCT pi) AS profile
 
-      MATCH (cand:Recipe)
-      WHERE NOT cand IN likedRecipes
+      // ukupan broj recepata (count store) i df sastojka (degree) su O(1)
+      CALL {
+        MATCH (x:Recipe)
+        RETURN count(x) AS n
+      }
 
-      OPTIONAL MATCH (cand)-[:IN_CATEGORY]->(c:Category)
-      MATCH (cand)-[rel:HAS_INGREDIENT]->(ci:Ingredient)
+      UNWIND profile AS pi
+      WITH likedRecipes, pi,
+           log(toFloat(n + 1) / (COUNT { (pi)<-[:HAS_INGREDIENT]-() } + 1)) AS idf
 
-      WITH cand, c, profile,
-           count(DISTINCT CASE WHEN toLower(ci.name) IN profile THEN ci END) AS score,
-           collect(DISTINCT {
-             name: ci.name,
-             amount: rel.amount,
-             unit: rel.unit
-           }) AS ingredients
+      MATCH (pi)<-[:HAS_INGREDIENT]-(cand:Recipe)
+      WHERE NOT cand IN likedRecipes
+      WITH cand, sum(idf) AS score
       WHERE score > 0
 
-      RETURN
-        cand.id AS id,
-        cand.title AS title,
-        cand.description AS description,
-        c.name AS category,
-        score AS score,
-        ingredients,
-        "content" AS mode
+      WITH cand, score
+      ORDER BY score DESC, cand.title ASC, cand.id ASC
+      SKIP $skip
+      LIMIT $limit
+
+      RETURN cand AS r, score, "content" AS mode
+    }
+
+    // hidracija samo za recepte sa strane
+    """ + PAGE_DETAILS + """
+
+    RETURN r.id AS id,
+           r.title AS title,
+           r.description AS description,
+           category,
+           score,
+           ingredients,
+           mode
+    ORDER BY score DESC, title ASC, id ASC
+    """
+
+    rows = await read_all(
+        driver,
+        cypher,
+        uid=uid,
+        limit=limit,
+        skip=skip,
+        popular=popularity.page(skip, limit),
+    )
+
+    return {"user_id": uid, "skip": skip, "limit": limit, "results": rows}
+
+async def _precomputed(driver, uid: str, skip: int, limit: int):
+    # top-K iz offline job-a (app/jobs/recommendations_batch.py); None => user jos nema
+    # izracunate preporuke pa ide live upit. Recepti lajkovani posle poslednjeg job-a se preskacu.
+    cypher = """
+    MATCH (u:User {id: $uid})
+    WITH u, EXISTS { (u)-[:RECOMMENDED]->() } AS has_recs
+
+    CALL {
+      WITH u, has_recs
+      WITH u WHERE has_recs
+
+      MATCH (u)-[rec:RECOMMENDED]->(r:Recipe)
+      WHERE NOT EXISTS { (u)-[:LIKES]->(r) }
+      WITH r, rec
+      ORDER BY rec.rank ASC
+      SKIP $skip
+      LIMIT $limit
+
+      """ + PAGE_DETAILS + """
+      WITH r, rec, category, ingredients
+      ORDER BY rec.rank ASC
+      RETURN collect({
+        id: r.id,
+        title: r.title,
+        description: r.description,
+        category: category,
+        score: rec.score,
+        ingredients: ingredients,
+        mode: "precomputed"
+      }) AS results
     }
 
-    RETURN id, title, description, category, score, ingredients, mode
-    ORDER BY score DESC, title ASC
-    SKIP $skip
-    LIMIT $limit
+    RETURN has_recs, results
     """
+    row = await read_single(driver, cypher, uid=uid, skip=skip, limit=limit)
+    if not row or not row["has_recs"]:
+        return None
+    return row["results"]
+
 
-    with driver.session() as session:
-        rows = [
-            r.data()
-            for r in session.run(
-                cypher,
-                uid=uid,
-                limit=limit,
-                skip=skip
-            )
-        ]
-
-    return {"user_id": uid, "skip": skip, "limit": limit, "results": rows}
\ No newline at end of file
+async def _collaborative(driver, uid: str, skip: int, limit: int):
+    # suma item-item slicnosti lajkovanih recepata; None => user nema lajkova
+    if item_similarity.ready:
+        scored = item_similarity.recommend(uid, skip, limit)
+        if scored is None:
+            return None
+        return await hydrate_recipes(driver, scored)
+
+    cypher = """
+    MATCH (u:User {id: $uid})
+    OPTIONAL MATCH (u)-[:LIKES]->(liked:Recipe)
+    WITH u, collect(liked) AS likedRecipes
+
+    CALL {
+      WITH u, likedRecipes
+      UNWIND likedRecipes AS lr
+      MATCH (lr)<-[:LIKES]-(v:User)-[:LIKES]->(cand:Recipe)
+      WHERE NOT cand IN likedRecipes
+      WITH lr, cand, count(*) AS co
+      WITH cand, sum(toFloat(co) / sqrt(toFloat(lr.like_count * cand.like_count))) AS score
+      WHERE score > 0
+      ORDER BY score DESC, cand.id ASC
+      SKIP $skip
+      LIMIT $limit
+      RETURN collect({id: cand.id, score: score, mode: "collaborative"}) AS scored
+    }
+
+    RETURN size(likedRecipes) > 0 AS has_likes, scored
+    """
+    row = await read_single(driver, cypher, uid=uid, skip=skip, limit=limit)
+    if not row or not row["has_likes"]:
+        return None
+    return await hydrate_recipes(driver, row["scored"])
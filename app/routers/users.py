@@ -1,15 +1,22 @@
 import uuid
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, Query
-from app.db.neo4j_driver import get_driver
-from app.routers.recipes import norm_ingredients
+from app.db.hydrate import PAGE_DETAILS
+from app.db.neo4j_driver import get_driver, read_all, read_single, write_single
+from app.recs.item_similarity import item_similarity
+from app.recs.popularity import popularity
 from app.schemas.recipe import RecipeCreate, RecipeUpdate
+from app.services.recipe_events import DELETED, RecipeEvent, recipe_events
+from app.services.recipe_writes import InvalidCategory, RecipeNotFound, create_recipe_record, delete_recipe_record, update_recipe_record
 from app.schemas.user import UserCreate, UserOut, UserCreateResponse
+from app.utils.cursor import decode_cursor, next_cursor
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.post("", status_code=201, response_model=UserCreateResponse)
-def create_user(payload: UserCreate, driver=Depends(get_driver)):
+async def create_user(payload: UserCreate, driver=Depends(get_driver)):
     uid = str(uuid.uuid4())
     username = payload.username
 
@@ -21,18 +28,17 @@ def create_user(payload: UserCreate, driver=Depends(get_driver)):
            (u.id = $uid) AS created;
     """
 
-    with driver.session() as session:
-        rec = session.run(cypher, uid=uid, username=username).single()
+    rec = await write_single(driver, cypher, uid=uid, username=username)
 
     if not rec:
         raise HTTPException(status_code=500, detail="Failed to create user")
 
-    data = rec.data()
+    data = rec
     return {"user": {"id": data["id"], "username": data["username"]}, "created": data["created"]}
 
 
 @router.get("/{user_id}", response_model=UserOut)
-def get_user(user_id: str, driver=Depends(get_driver)):
+async def get_user(user_id: str, driver=Depends(get_driver)):
     uid = user_id.strip()
     if not uid:
         raise HTTPException(status_code=400, detail="user_id is required")
@@ -42,55 +48,51 @@ def get_user(user_id: str, driver=Depends(get_driver)):
     RETURN u.id AS id, u.username AS username;
     """
 
-    with driver.session() as session:
-        rec = session.run(cypher, uid=uid).single()
+    rec = await read_single(driver, cypher, uid=uid)
 
     if not rec:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return rec.data()
+    return rec
 
 @router.get("/{user_id}/recipes")
-def list_user_recipes(
+async def list_user_recipes(
     user_id: str,
     limit: int = Query(20, ge=1, le=100),
     skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor sa prethodne strane"),
     driver=Depends(get_driver),
 ):
     uid = user_id.strip()
     if not uid:
         raise HTTPException(status_code=400, detail="user_id is required")
 
+    after = decode_cursor(cursor, 2) or ["", ""]
+
     cypher = """
     MATCH (u:User {id: $uid})
 
-    // broj recepata usera
-    CALL {
-      WITH u
-      OPTIONAL MATCH (u)-[:CREATED]->(r:Recipe)
-      RETURN count(r) AS total
-    }
+    // broj recepata usera (materijalizovan brojac)
+    WITH u, coalesce(u.recipes_created, 0) AS total
 
-    // page recepti
+    // page recepti (title, id) keyset
     CALL {
       WITH u
       OPTIONAL MATCH (u)-[:CREATED]->(r:Recipe)
-      OPTIONAL MATCH (r)-[:IN_CATEGORY]->(c:Category)
-      OPTIONAL MATCH (r)-[rel:HAS_INGREDIENT]->(i:Ingredient)
-      WITH r, c, collect({
-        name: i.name,
-        amount: rel.amount,
-        unit: rel.unit
-      }) AS ingredients
-      WITH r, c, ingredients
-      ORDER BY r.title ASC
+      WHERE r.title >= $after_title
+        AND (r.title > $after_title OR r.id > $after_id)
+      WITH r
+      ORDER BY r.title ASC, r.id ASC
       SKIP $skip
       LIMIT $limit
+      """ + PAGE_DETAILS + """
+      WITH r, category, ingredients
+      ORDER BY r.title ASC, r.id ASC
       RETURN collect({
         id: r.id,
         title: r.title,
         description: r.description,
-        category: c.name,
+        category: category,
         ingredients: ingredients
       }) AS results
     }
@@ -101,25 +103,28 @@ def list_user_recipes(
            results;
     """
 
-    with driver.session() as session:
-        rec = session.run(cypher, uid=uid, skip=skip, limit=limit).single()
+    rec = await read_single(
+        driver, cypher, uid=uid, after_title=after[0], after_id=after[1], skip=skip, limit=limit
+    )
 
     if not rec:
         raise HTTPException(status_code=404, detail="User not found")
 
-    data = rec.data()
+    data = rec
+    results = [x for x in (data["results"] or []) if x["id"] is not None]
     return {
         "user_id": data["user_id"],
         "username": data["username"],
         "skip": skip,
         "limit": limit,
         "total": data["total"],
-        "results": [x for x in (data["results"] or []) if x["id"] is not None],
+        "next_cursor": next_cursor(results, limit, "title", "id"),
+        "results": results,
     }
 
 
 @router.post("/{user_id}/recipes", status_code=201)
-def create_recipe_for_user(
+async def create_recipe_for_user(
     user_id: str,
     payload: RecipeCreate,
     driver=Depends(get_driver),
@@ -128,48 +133,14 @@ def create_recipe_for_user(
     if not uid:
         raise HTTPException(status_code=400, detail="user_id is required")
 
-    rid = str(uuid.uuid4())
-    title = payload.title
-    description = payload.description
-    category = payload.category
-    ings = norm_ingredients(payload.ingredients)
-
-    if len(ings) == 0:
-        raise HTTPException(status_code=400, detail="At least 1 ingridient is required!")
-
-    cypher = """
-    MATCH (u:User {id: $uid})
-    MATCH (c:Category {name: $category})
-    CREATE (r:Recipe {id: $rid, title: $title, description: $description})
-    MERGE (u)-[:CREATED]->(r)
-    MERGE (r)-[:IN_CATEGORY]->(c)
-    WITH r
-    UNWIND $ings AS ing
-    MERGE (i:Ingredient {name: ing.name})
-    MERGE (r)-[rel:HAS_INGREDIENT]->(i)
-    SET rel.amount = ing.amount,
-        rel.unit = ing.unit
-    RETURN r.id AS id, r.title AS title, r.description AS description;
-    """
-
-    with driver.session() as session:
-        rec = session.run(
-            cypher,
-            uid=uid,
-            category=category,
-            rid=rid,
-            title=title,
-            description=description,
-            ings=ings,
-        ).single()
-
+    rec = await create_recipe_record(driver, payload, owner_id=uid)
     if not rec:
         raise HTTPException(status_code=400, detail="User not found or invalid category")
 
-    return {"recipe": rec.data()}
+    return {"recipe": rec}
 
 @router.patch("/{user_id}/recipes/{recipe_id}")
-def update_recipe_for_user(
+async def update_recipe_for_user(
     user_id: str,
     recipe_id: str,
     payload: RecipeUpdate,
@@ -180,160 +151,110 @@ def update_recipe_for_user(
     if not uid or not rid:
         raise HTTPException(status_code=400, detail="user_id and recipe_id are required")
 
-    title = payload.title
-    description = payload.description
-    category = payload.category
-    ings = norm_ingredients(payload.ingredients) if payload.ingredients is not None else None
-
-    if title is None and payload.description is None and category is None and ings is None:
+    if (
+        payload.title is None
+        and payload.description is None
+        and payload.category is None
+        and payload.ingredients is None
+    ):
         raise HTTPException(status_code=400, detail="Nothing to update")
 
-    # update title
-    if title is not None:
-        cypher_title = """
-        MATCH (u:User {id: $uid})-[:CREATED]->(r:Recipe {id: $rid})
-        SET r.title = $title
-        RETURN r.id AS id;
-        """
-        with driver.session() as session:
-            ok = session.run(cypher_title, uid=uid, rid=rid, title=title).single()
-        if not ok:
-            raise HTTPException(status_code=404, detail="Recipe not found for this user")
-
-    # update desc
-    if payload.description is not None:
-        cypher_desc = """
-        MATCH (u:User {id: $uid})-[:CREATED]->(r:Recipe {id: $rid})
-        SET r.description = $description
-        RETURN r.id AS id;
-        """
-        with driver.session() as session:
-            ok = session.run(cypher_desc, uid=uid, rid=rid, description=description).single()
-        if not ok:
-            raise HTTPException(status_code=404, detail="Recipe not found for this user")
-
-    # update categ
-    if category is not None:
-        cypher_cat = """
-        MATCH (u:User {id: $uid})-[:CREATED]->(r:Recipe {id: $rid})
-        MATCH (c:Category {name: $category})
-        OPTIONAL MATCH (r)-[old:IN_CATEGORY]->(:Category)
-        DELETE old
-        MERGE (r)-[:IN_CATEGORY]->(c)
-        RETURN r.id AS id;
-        """
-        with driver.session() as session:
-            ok = session.run(cypher_cat, uid=uid, rid=rid, category=category).single()
-        if not ok:
-            # moze biti: recipe nije od usera ili category ne postoji
-            check = """
-            MATCH (u:User {id: $uid})-[:CREATED]->(r:Recipe {id: $rid})
-            RETURN r.id AS id;
-            """
-            with driver.session() as session:
-                owned = session.run(check, uid=uid, rid=rid).single()
-            if not owned:
-                raise HTTPException(status_code=404, detail="Recipe not found for this user")
-            raise HTTPException(status_code=400, detail="Invalid category")
-
-    # update ingredients
-    if ings is not None:
-        if not ings:
-            raise HTTPException(status_code=400, detail="ingredients must not be empty")
-
-        cypher_ings = """
-        MATCH (u:User {id: $uid})-[:CREATED]->(r:Recipe {id: $rid})
-        OPTIONAL MATCH (r)-[old:HAS_INGREDIENT]->(:Ingredient)
-        DELETE old
-        WITH r
-        UNWIND $ings AS ing
-        MERGE (i:Ingredient {name: ing.name})
-        MERGE (r)-[rel:HAS_INGREDIENT]->(i)
-        SET rel.amount = ing.amount,
-            rel.unit = ing.unit
-        RETURN r.id AS id;
-        """
-        with driver.session() as session:
-            ok = session.run(cypher_ings, uid=uid, rid=rid, ings=ings).single()
-        if not ok:
-            raise HTTPException(status_code=404, detail="Recipe not found for this user")
-
-    # vrati novo
-    cypher_out = """
-    MATCH (u:User {id: $uid})-[:CREATED]->(r:Recipe {id: $rid})
-    OPTIONAL MATCH (r)-[:IN_CATEGORY]->(c:Category)
-    OPTIONAL MATCH (r)-[rel:HAS_INGREDIENT]->(i:Ingredient)
-    RETURN r.id AS id,
-           r.title AS title,
-           r.description AS description,
-           c.name AS category,
-           collect({name:i.name, amount:rel.amount, unit:rel.unit}) AS ingredients;
-    """
-    with driver.session() as session:
-        rec = session.run(cypher_out, uid=uid, rid=rid).single()
-
-    if not rec:
+    # isti upis kao PATCH /recipes/{id}, uz proveru da je recept od usera
+    try:
+        return await update_recipe_record(driver, rid, payload, owner_id=uid)
+    except RecipeNotFound:
         raise HTTPException(status_code=404, detail="Recipe not found for this user")
-
-    return rec.data()
+    except InvalidCategory:
+        raise HTTPException(status_code=400, detail="Invalid category")
 
 @router.delete("/{user_id}/recipes/{recipe_id}", status_code=204)
-def delete_recipe_for_user(user_id: str, recipe_id: str, driver=Depends(get_driver)):
+async def delete_recipe_for_user(user_id: str, recipe_id: str, driver=Depends(get_driver)):
     uid = user_id.strip()
     rid = recipe_id.strip()
     if not uid or not rid:
         raise HTTPException(status_code=400, detail="user_id and recipe_id are required")
 
-    cypher = """
-    MATCH (u:User {id: $uid})-[:CREATED]->(r:Recipe {id: $rid})
-    DETACH DELETE r
-    RETURN count(*) AS deleted;
-    """
-    with driver.session() as session:
-        rec = session.run(cypher, uid=uid, rid=rid).single()
-
-    if not rec or rec["deleted"] == 0:
+    if not await delete_recipe_record(driver, rid, owner_id=uid):
         raise HTTPException(status_code=404, detail="Recipe not found for this user")
 
 
 @router.get("", response_model=dict)
-def list_users(
+async def list_users(
     limit: int = Query(20, ge=1, le=100),
     skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor sa prethodne strane"),
     driver=Depends(get_driver),
 ):
+    # username je unique (user_username_unique) pa je dovoljan kao cursor
+    after = decode_cursor(cursor, 1) or [""]
+
     cypher = """
     MATCH (u:User)
+    WHERE u.username > $after_username
     RETURN u.id AS id, u.username AS username
     ORDER BY u.username ASC
     SKIP $skip
     LIMIT $limit;
     """
 
-    with driver.session() as session:
-        rows = [r.data() for r in session.run(cypher, skip=skip, limit=limit)]
+    rows = await read_all(driver, cypher, after_username=after[0], skip=skip, limit=limit)
 
-    return {"skip": skip, "limit": limit, "results": rows}
+    return {
+        "skip": skip,
+        "limit": limit,
+        "next_cursor": next_cursor(rows, limit, "username"),
+        "results": rows,
+    }
 
 @router.delete("/{user_id}")
-def delete_user(user_id: str, driver=Depends(get_driver)):
+async def delete_user(user_id: str, driver=Depends(get_driver)):
     uid = user_id.strip()
     if not uid:
         raise HTTPException(status_code=400, detail="user_id is required")
 
     cypher = """
     MATCH (u:User {id: $uid})
+    // recepti koje je user lajkovao gube njegov lajk
+    CALL {
+      WITH u
+      MATCH (u)-[:LIKES]->(liked:Recipe)
+      SET liked.like_count = coalesce(liked.like_count, 1) - 1,
+          liked.updated_at = timestamp()
+      RETURN collect({recipe_id: liked.id, title: liked.title, like_count: liked.like_count}) AS unliked
+    }
     OPTIONAL MATCH (u)-[:CREATED]->(r:Recipe)
-    WITH u, [x IN collect(r) WHERE x IS NOT NULL] AS rs
+    WITH u, unliked, [x IN collect(r) WHERE x IS NOT NULL] AS rs
+    WITH u, unliked, rs, [x IN rs | x.id] AS recipe_ids
+    // ostali useri gube lajkove na receptima koji se brisu
+    CALL {
+      WITH u, rs
+      UNWIND rs AS x
+      MATCH (liker:User)-[:LIKES]->(x)
+      WHERE liker <> u
+      SET liker.likes_given = coalesce(liker.likes_given, 1) - 1
+    }
+    // rating shardovi obrisanih recepata (nisu povezani relacijama)
+    CALL {
+      WITH rs
+      UNWIND rs AS x
+      MATCH (s:RatingShard {recipe_id: x.id})
+      DELETE s
+    }
     FOREACH (x IN rs | DETACH DELETE x)
     DETACH DELETE u
-    RETURN size(rs) AS deleted_recipes;
+    RETURN size(rs) AS deleted_recipes, recipe_ids, unliked;
     """
 
-    with driver.session() as session:
-        rec = session.run(cypher, uid=uid).single()
+    rec = await write_single(driver, cypher, uid=uid)
 
     if not rec:
         raise HTTPException(status_code=404, detail="User not found")
 
+    # in-process strukture gube lajkove obrisanog usera (kao unlike_pairs), pa tek onda njegove recepte
+    for row in rec["unliked"]:
+        item_similarity.unlike(uid, row["recipe_id"])
+        popularity.set(row["recipe_id"], row["title"], row["like_count"])
+    for rid in rec["recipe_ids"]:
+        recipe_events.publish(RecipeEvent(DELETED, rid))
+
     return {"user_id": uid, "deleted_recipes": rec["deleted_recipes"]}
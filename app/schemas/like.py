@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel, Field, field_validator
 
 class LikeCreate(BaseModel):
@@ -31,8 +31,42 @@ class UserLikesIdsPageResponse(BaseModel):
     limit: int
     total: int
     recipe_ids: List[str]
+    next_cursor: Optional[str] = None
 
 class LikeExistsResponse(BaseModel):
     user_id: str
     recipe_id: str
     exists: bool
+
+# batch: vise (user, recipe) parova u jednoj transakciji
+class LikeBatchRequest(BaseModel):
+    pairs: List[LikeCreate] = Field(..., min_length=1, max_length=1000)
+
+class LikeBatchItemOut(BaseModel):
+    user_id: str
+    recipe_id: str
+    status: str  # created | exists | deleted | not_found
+
+class LikeBatchResponse(BaseModel):
+    applied: int
+    results: List[LikeBatchItemOut]
+
+class LikeExistsBatchRequest(BaseModel):
+    user_id: str = Field(..., min_length=1)
+    recipe_ids: List[str] = Field(..., min_length=1, max_length=1000)
+
+    @field_validator("user_id")
+    @classmethod
+    def strip_user_id(cls, v: str) -> str:
+        v = v.strip()
+        if not v:
+            raise ValueError("id must not be empty")
+        return v
+
+class LikeExistsItem(BaseModel):
+    recipe_id: str
+    exists: bool
+
+class LikeExistsBatchResponse(BaseModel):
+    user_id: str
+    results: List[LikeExistsItem]
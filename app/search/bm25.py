@@ -0,0 +1,248 @@
+# In-process BM25 pretraga po opisu i naslovu recepta (DESCRIPTION_SEARCH=bm25), alternativa
+# Lucene indeksu recipeDescNormIndex (app/search/fulltext.py) za /recipes/search_by_description.
+#
+# - tekst prolazi kroz sr_norm_latin + sr_stem (Lucene nema srpski analyzer, pa bez stemminga
+#   "paradajz" ne nalazi "paradajzom"); reci iz naslova se broje TITLE_WEIGHT puta
+# - posting lista po termu su dva array-a (slotovi rastuce, tf), 4 + 2 bajta po pojavljivanju
+# - score = BM25 (k1, b); prefix / fuzzy mod prosiruju term na termine iz recnika (isti kontrakt
+#   kao Lucene modovi), a recept dobija najbolji skor po reci upita
+#
+# Puni se iz Neo4j na startup-u i periodicno (kompaktuje obrisane slotove, vidi izmene drugih
+# worker-a), a kreiranje/izmena/brisanje recepta ga azurira odmah preko RecipeEvent-a.
+import asyncio
+import heapq
+import logging
+import math
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.db.neo4j_driver import read_all
+from app.services.recipe_events import DELETED, RecipeEvent
+from app.utils.text_norm import sr_norm_latin, sr_stem
+
+logger = logging.getLogger(__name__)
+
+LOAD_BATCH_SIZE = 5000
+TITLE_WEIGHT = 2
+K1 = 1.2
+B = 0.75
+FUZZY_MIN_LEN = 4
+_ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789"
+
+
+def _terms(text: Optional[str]) -> List[str]:
+    return [sr_stem(t) for t in sr_norm_latin(text or "").split()]
+
+
+def _doc_tf(rec: Dict[str, Any]) -> Counter:
+    tf = Counter(_terms(rec.get("description")))
+    for term in _terms(rec.get("title")):
+        tf[term] += TITLE_WEIGHT
+    return tf
+
+
+def _edits1(term: str) -> set:
+    # sve reci na Levenshtein rastojanju 1 (brisanje, zamena, umetanje, zamena susednih)
+    splits = [(term[:i], term[i:]) for i in range(len(term) + 1)]
+    out = {a + b[1:] for a, b in splits if b}
+    out |= {a + b[1] + b[0] + b[2:] for a, b in splits if len(b) > 1}
+    out |= {a + c + b[1:] for a, b in splits if b for c in _ALPHABET}
+    out |= {a + c + b for a, b in splits for c in _ALPHABET}
+    return out
+
+
+class _State:
+    def __init__(self) -> None:
+        self.ids: List[Optional[str]] = []  # None => obrisan slot
+        self.titles: List[str] = []
+        self.lengths = array("I")
+        self.doc_terms: List[Tuple[str, ...]] = []
+        self.slot: Dict[str, int] = {}
+        self.postings: Dict[str, Tuple[array, array]] = {}  # term -> (slotovi, tf)
+        self.df: Dict[str, int] = {}  # samo zivi dokumenti
+        self.live = 0
+        self.total_len = 0
+        self._vocab: Optional[List[str]] = None  # sortiran recnik za prefix, gradi se po potrebi
+
+    @classmethod
+    def build(cls, records: List[Dict[str, Any]]) -> "_State":
+        st = cls()
+        for rec in records:
+            st.add(rec)
+        return st
+
+    def add(self, rec: Dict[str, Any]) -> None:
+        # izmenjen recept dobija nov slot (slotovi u posting listama ostaju rastuci)
+        self.remove(rec["id"])
+        tf = _doc_tf(rec)
+        slot = len(self.ids)
+        length = sum(tf.values())
+        self.ids.append(rec["id"])
+        self.titles.append(rec.get("title") or "")
+        self.lengths.append(length)
+        self.doc_terms.append(tuple(tf))
+        self.slot[rec["id"]] = slot
+        self.live += 1
+        self.total_len += length
+        for term, n in tf.items():
+            p = self.postings.get(term)
+            if p is None:
+                p = self.postings[term] = (array("I"), array("H"))
+                self._vocab = None
+            p[0].append(slot)
+            p[1].append(min(n, 0xFFFF))
+            self.df[term] = self.df.get(term, 0) + 1
+
+    def remove(self, rid: str) -> None:
+        # slot se samo oznaci kao obrisan; posting liste cisti sledeci reload
+        slot = self.slot.pop(rid, None)
+        if slot is None:
+            return
+        self.ids[slot] = None
+        self.live -= 1
+        self.total_len -= self.lengths[slot]
+        for term in self.doc_terms[slot]:
+            self.df[term] -= 1
+        self.doc_terms[slot] = ()
+
+    def _expand(self, term: str, mode: str) -> List[str]:
+        if mode == "prefix":
+            if self._vocab is None:
+                self._vocab = sorted(self.postings)
+            out = []
+            for i in range(bisect_left(self._vocab, term), len(self._vocab)):
+                if not self._vocab[i].startswith(term):
+                    break
+                out.append(self._vocab[i])
+            return out
+        if mode == "fuzzy" and len(term) >= FUZZY_MIN_LEN:
+            return [t for t in _edits1(term) | {term} if t in self.postings]
+        return [term] if term in self.postings else []
+
+    def search(self, query_norm: str, mode: str, skip: int, limit: int) -> Tuple[int, List[Dict[str, Any]]]:
+        if self.live == 0:
+            return 0, []
+        avg_len = self.total_len / self.live
+        scores: Dict[int, float] = {}
+        for token in dict.fromkeys(_terms(query_norm)):
+            best: Dict[int, float] = {}
+            for term in self._expand(token, mode):
+                df = self.df.get(term, 0)
+                if df <= 0:
+                    continue
+                idf = math.log(1.0 + (self.live - df + 0.5) / (df + 0.5))
+                slots, tfs = self.postings[term]
+                for slot, tf in zip(slots, tfs):
+                    if self.ids[slot] is None:
+                        continue
+                    norm = K1 * (1.0 - B + B * self.lengths[slot] / avg_len)
+                    s = idf * tf * (K1 + 1.0) / (tf + norm)
+                    if s > best.get(slot, 0.0):
+                        best[slot] = s
+            for slot, s in best.items():
+                scores[slot] = scores.get(slot, 0.0) + s
+
+        # score DESC, title ASC (kao Lucene putanja), id kao poslednji kljuc
+        top = heapq.nsmallest(
+            skip + limit, scores.items(), key=lambda kv: (-kv[1], self.titles[kv[0]], self.ids[kv[0]])
+        )
+        page = [
+            {"id": self.ids[slot], "title": self.titles[slot], "score": round(score, 4)}
+            for slot, score in top[skip:]
+        ]
+        return len(scores), page
+
+
+async def _fetch_recipes(driver) -> List[Dict[str, Any]]:
+    cypher = """
+    MATCH (r:Recipe)
+    WHERE r.id > $after_id
+    WITH r
+    ORDER BY r.id ASC
+    LIMIT $batch
+    RETURN r.id AS id, r.title AS title, r.description AS description;
+    """
+    out: List[Dict[str, Any]] = []
+    after_id = ""
+    while True:
+        rows = await read_all(driver, cypher, after_id=after_id, batch=LOAD_BATCH_SIZE)
+        out.extend(rows)
+        if len(rows) < LOAD_BATCH_SIZE:
+            return out
+        after_id = rows[-1]["id"]
+
+
+class DescriptionIndex:
+    def __init__(self) -> None:
+        self._state: Optional[_State] = None
+        self._pending: Optional[List[Tuple[str, Any]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._state is not None
+
+    async def reload(self, driver) -> None:
+        # izmene koje stignu dok traje ucitavanje se ponove nad novim stanjem
+        self._pending = []
+        try:
+            records = await _fetch_recipes(driver)
+            state = await asyncio.to_thread(_State.build, records)
+            for op, arg in self._pending:
+                if op == "upsert":
+                    state.add(arg)
+                else:
+                    state.remove(arg)
+            self._state = state
+        finally:
+            self._pending = None
+        logger.info("BM25 description index loaded: %d recipes, %d terms", state.live, len(state.postings))
+
+    async def start(self, driver, refresh_seconds: float) -> None:
+        # dok indeks nije ucitan pretraga ide preko Lucene indeksa
+        try:
+            await self.reload(driver)
+        except Exception:
+            logger.exception("BM25 description index load failed, falling back to fulltext index")
+        if refresh_seconds > 0:
+            self._task = asyncio.create_task(self._refresh_loop(driver, refresh_seconds))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _refresh_loop(self, driver, refresh_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(refresh_seconds)
+            try:
+                await self.reload(driver)
+            except Exception:
+                logger.exception("BM25 description index reload failed")
+
+    def upsert(self, rec: Dict[str, Any]) -> None:
+        if self._pending is not None:
+            self._pending.append(("upsert", rec))
+        if self._state is not None:
+            self._state.add(rec)
+
+    def remove(self, rid: str) -> None:
+        if self._pending is not None:
+            self._pending.append(("remove", rid))
+        if self._state is not None:
+            self._state.remove(rid)
+
+    def on_recipe_event(self, event: RecipeEvent) -> None:
+        if event.kind == DELETED:
+            self.remove(event.recipe_id)
+        else:
+            self.upsert(event.recipe)
+
+    def search(self, query_norm: str, mode: str, skip: int, limit: int) -> Tuple[int, List[Dict[str, Any]]]:
+        # (total, strana {id, title, score}) - detalje dopunjava hydrate_recipes
+        return self._state.search(query_norm, mode, skip, limit)
+
+
+description_index = DescriptionIndex()
@@ -0,0 +1,92 @@
+# /recipes/search_by_description preko Lucene fulltext indeksa (recipeDescNormIndex nad description_norm).
+#
+# Upit se gradi od sr_norm_latin tokena; oni su samo [a-z0-9] (bez Lucene specijalnih znakova i
+# velikih AND/OR/NOT), pa escape nije potreban:
+#   match  - tokeni kako jesu (OR)
+#   prefix - term*  (npr. "pas" nalazi "pasta", "pasulj")
+#   fuzzy  - term~  (greske u kucanju; tokeni kraci od FUZZY_MIN_LEN ostaju tacni)
+#
+# Strana i total idu iz jednog upita; total je count(*) nad pogocima (bez skupljanja cvorova u listu),
+# a strana top-K (ORDER BY ... SKIP/LIMIT). Total se kesira po (mode, upit) na
+# SEARCH_TOTAL_TTL_SECONDS, pa sledece strane iste pretrage ne broje ponovo. Kes se prazni na svaku
+# izmenu recepta (RecipeEvent).
+from typing import Any, Dict, List, Tuple
+
+from app import settings
+from app.db.hydrate import PAGE_DETAILS
+from app.db.neo4j_driver import read_all, read_single
+from app.utils.ttl_cache import TTLCache
+
+MODES = ("match", "prefix", "fuzzy")
+FUZZY_MIN_LEN = 4
+
+total_cache = TTLCache(settings.SEARCH_TOTAL_CACHE_SIZE, settings.SEARCH_TOTAL_TTL_SECONDS)
+
+
+def build_lucene_query(query_norm: str, mode: str = "match") -> str:
+    parts: List[str] = []
+    for token in query_norm.split():
+        term = token
+        if mode == "prefix":
+            term += "*"
+        elif mode == "fuzzy" and len(token) >= FUZZY_MIN_LEN:
+            term += "~"
+        parts.append(term)
+    return " ".join(parts)
+
+
+RESULT_FIELDS = """{
+  id: r.id,
+  title: r.title,
+  description: r.description,
+  category: category,
+  score: score,
+  ingredients: ingredients
+}"""
+
+# bez kesiranog totala: total se broji (count(*) ne drzi pogotke u memoriji), a strana je top-K
+# i hidrira se samo ona
+PAGE_WITH_TOTAL_CYPHER = """
+CALL {
+  CALL db.index.fulltext.queryNodes("recipeDescNormIndex", $q) YIELD node
+  RETURN count(*) AS total
+}
+CALL {
+  CALL db.index.fulltext.queryNodes("recipeDescNormIndex", $q) YIELD node, score
+  WITH node AS r, score
+  ORDER BY score DESC, r.title ASC, r.id ASC
+  SKIP $skip
+  LIMIT $limit
+  """ + PAGE_DETAILS + """
+  WITH * ORDER BY score DESC, r.title ASC, r.id ASC
+  RETURN collect(""" + RESULT_FIELDS + """) AS results
+}
+RETURN total, results;
+"""
+
+PAGE_CYPHER = """
+CALL db.index.fulltext.queryNodes("recipeDescNormIndex", $q) YIELD node, score
+WITH node AS r, score
+ORDER BY score DESC, r.title ASC, r.id ASC
+SKIP $skip
+LIMIT $limit
+""" + PAGE_DETAILS + """
+RETURN """ + RESULT_FIELDS + """ AS result
+ORDER BY result.score DESC, result.title ASC, result.id ASC;
+"""
+
+
+async def search_descriptions(
+    driver, query_norm: str, mode: str, skip: int, limit: int
+) -> Tuple[int, List[Dict[str, Any]]]:
+    lucene = build_lucene_query(query_norm, mode)
+    key = (mode, query_norm)
+    total = total_cache.get(key)
+    if total is not None:
+        rows = await read_all(driver, PAGE_CYPHER, q=lucene, skip=skip, limit=limit)
+        return total, [row["result"] for row in rows]
+
+    rec = await read_single(driver, PAGE_WITH_TOTAL_CYPHER, q=lucene, skip=skip, limit=limit)
+    total = rec["total"] if rec else 0
+    total_cache.set(key, total)
+    return total, (rec["results"] if rec else [])
@@ -0,0 +1,307 @@
+# In-memory inverted index za pretragu po sastojcima (/recipes/search, /recipes/search_csv).
+#
+# - svaki recept dobija kompaktan int slot; slotovi [0, sorted_upto) su dodeljeni po (title, id)
+#   pa redosled bitova = redosled rezultata unutar istog score-a
+# - posting lista po sastojku (name_norm) je ili bitset (Python int) ili sortiran array slotova
+#   za retke sastojke (roaring-style: bira se manja reprezentacija)
+# - score = broj trazenih sastojaka u receptu, racuna se bit-sliced sabiranjem bitseta
+#   (bitwise nad svim receptima odjednom), a velicine score nivoa preko popcount-a (int.bit_count)
+#
+# Puni se iz Neo4j na startup-u, osvezava se periodicno (writes iz drugih worker-a),
+# a upisi recepata ga azuriraju odmah preko RecipeEvent-a (app/services/recipe_events.py).
+import asyncio
+import logging
+import re
+from array import array
+from bisect import bisect_right
+from heapq import merge
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from app.db.neo4j_driver import read_all
+from app.services.recipe_events import DELETED, RecipeEvent
+from app.utils.text_norm import sr_norm_latin
+
+logger = logging.getLogger(__name__)
+
+LOAD_BATCH_SIZE = 5000
+
+Posting = Union[int, array]
+
+_NONZERO_BYTE = re.compile(rb"[^\x00]")
+_BYTE_BITS = [tuple(b for b in range(8) if (v >> b) & 1) for v in range(256)]
+
+
+def _iter_bits(bits: int, start: int = 0) -> Iterator[int]:
+    # rastuce pozicije setovanih bitova >= start
+    if start:
+        bits >>= start
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for m in _NONZERO_BYTE.finditer(data):
+        i = m.start()
+        base = start + i * 8
+        for b in _BYTE_BITS[data[i]]:
+            yield base + b
+
+
+def _bits_from_slots(slots: Iterable[int], size: int) -> int:
+    buf = bytearray((size + 7) // 8)
+    for s in slots:
+        buf[s >> 3] |= 1 << (s & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _recipe_ingredients(rec: Dict[str, Any]) -> Dict[str, dict]:
+    out: Dict[str, dict] = {}
+    for ing in rec.get("ingredients") or []:
+        name = ing.get("name")
+        if not name:
+            continue
+        key = ing.get("name_norm") or sr_norm_latin(name)
+        out[key] = {"name": name, "amount": ing.get("amount"), "unit": ing.get("unit")}
+    return out
+
+
+class _State:
+    def __init__(self) -> None:
+        self.ids: List[Optional[str]] = []
+        self.keys: List[Tuple[str, str]] = []  # (title, id) po slotu
+        self.category: List[Optional[str]] = []
+        self.ings: List[Dict[str, dict]] = []  # name_norm -> {name, amount, unit}
+        self.slot: Dict[str, int] = {}
+        self.postings: Dict[str, Posting] = {}
+        self.sorted_upto = 0
+        self.head_mask = 0
+
+    @classmethod
+    def build(cls, records: List[Dict[str, Any]]) -> "_State":
+        st = cls()
+        records.sort(key=lambda r: (r["title"], r["id"]))
+        per_ing: Dict[str, List[int]] = {}
+        for slot, rec in enumerate(records):
+            ings = _recipe_ingredients(rec)
+            st._append(rec, ings)
+            for key in ings:
+                per_ing.setdefault(key, []).append(slot)
+
+        n = len(records)
+        for key, slots in per_ing.items():
+            # bitset kosta n/8 bajtova, array 4 bajta po slotu
+            if len(slots) * 32 > n:
+                st.postings[key] = _bits_from_slots(slots, n)
+            else:
+                st.postings[key] = array("I", slots)
+
+        st.sorted_upto = n
+        st.head_mask = (1 << n) - 1
+        return st
+
+    def _append(self, rec: Dict[str, Any], ings: Dict[str, dict]) -> int:
+        slot = len(self.ids)
+        self.ids.append(rec["id"])
+        self.keys.append((rec["title"], rec["id"]))
+        self.category.append(rec.get("category"))
+        self.ings.append(ings)
+        self.slot[rec["id"]] = slot
+        return slot
+
+    def add(self, rec: Dict[str, Any]) -> None:
+        # novi/izmenjeni recept ide na kraj (van sortiranog dela), sledeci reload ga vraca u red
+        self.remove(rec["id"])
+        ings = _recipe_ingredients(rec)
+        slot = self._append(rec, ings)
+        n = len(self.ids)
+        for key in ings:
+            p = self.postings.get(key)
+            if isinstance(p, int):
+                self.postings[key] = p | (1 << slot)
+            elif p is None:
+                self.postings[key] = array("I", [slot])
+            elif (len(p) + 1) * 32 > n:
+                self.postings[key] = _bits_from_slots(p, n) | (1 << slot)
+            else:
+                p.append(slot)  # slot je veci od svih postojecih
+
+    def remove(self, rid: str) -> None:
+        slot = self.slot.pop(rid, None)
+        if slot is None:
+            return
+        for key in self.ings[slot]:
+            p = self.postings.get(key)
+            if isinstance(p, int):
+                self.postings[key] = p & ~(1 << slot)
+            elif p is not None:
+                i = bisect_right(p, slot) - 1
+                if i >= 0 and p[i] == slot:
+                    del p[i]
+        self.ids[slot] = None
+        self.ings[slot] = {}
+
+    def _bits(self, p: Posting) -> int:
+        if isinstance(p, int):
+            return p
+        return _bits_from_slots(p, len(self.ids))
+
+    def _iter_tier(self, tier: int, after_key: Optional[Tuple[str, str]]) -> Iterator[int]:
+        head = tier & self.head_mask
+        tail = tier & ~self.head_mask
+        start = bisect_right(self.keys, after_key, 0, self.sorted_upto) if after_key else 0
+        tail_slots = sorted(
+            (s for s in _iter_bits(tail) if after_key is None or self.keys[s] > after_key),
+            key=self.keys.__getitem__,
+        )
+        if not tail_slots:
+            return _iter_bits(head, start)
+        return merge(_iter_bits(head, start), tail_slots, key=self.keys.__getitem__)
+
+    def _row(self, slot: int, score: int, wanted: List[str]) -> Dict[str, Any]:
+        ings = self.ings[slot]
+        return {
+            "id": self.ids[slot],
+            "title": self.keys[slot][0],
+            "category": self.category[slot] or "uncategorized",
+            "matched": [ings[w] for w in wanted if w in ings],
+            "score": score,
+        }
+
+    def search(self, wanted: List[str], skip: int, limit: int, after: Optional[List[Any]]) -> List[Dict[str, Any]]:
+        postings = [self._bits(self.postings[w]) for w in wanted if w in self.postings]
+        if not postings:
+            return []
+
+        # bit-sliced brojac: planes[k] = k-ti bit score-a za svaki recept
+        planes: List[int] = []
+        union = 0
+        for p in postings:
+            union |= p
+            carry = p
+            for k in range(len(planes)):
+                planes[k], carry = planes[k] ^ carry, planes[k] & carry
+                if not carry:
+                    break
+            if carry:
+                planes.append(carry)
+
+        out: List[Dict[str, Any]] = []
+        max_score = min(len(postings), (1 << len(planes)) - 1)
+        for score in range(max_score, 0, -1):
+            if after is not None and score > after[0]:
+                continue
+            tier = union
+            for k, plane in enumerate(planes):
+                tier &= plane if (score >> k) & 1 else ~plane
+            if not tier:
+                continue
+
+            after_key = (after[1], after[2]) if after is not None and score == after[0] else None
+            if after_key is None:
+                size = tier.bit_count()
+                if skip >= size:
+                    skip -= size
+                    continue
+
+            for slot in self._iter_tier(tier, after_key):
+                if skip:
+                    skip -= 1
+                    continue
+                out.append(self._row(slot, score, wanted))
+                if len(out) == limit:
+                    return out
+        return out
+
+
+async def _fetch_recipes(driver) -> List[Dict[str, Any]]:
+    cypher = """
+    MATCH (r:Recipe)
+    WHERE r.id > $after_id
+    WITH r
+    ORDER BY r.id ASC
+    LIMIT $batch
+    OPTIONAL MATCH (r)-[:IN_CATEGORY]->(c:Category)
+    OPTIONAL MATCH (r)-[rel:HAS_INGREDIENT]->(i:Ingredient)
+    RETURN r.id AS id,
+           r.title AS title,
+           c.name AS category,
+           collect({name: i.name, name_norm: i.name_norm, amount: rel.amount, unit: rel.unit}) AS ingredients
+    ORDER BY id ASC;
+    """
+    out: List[Dict[str, Any]] = []
+    after_id = ""
+    while True:
+        rows = await read_all(driver, cypher, after_id=after_id, batch=LOAD_BATCH_SIZE)
+        out.extend(rows)
+        if len(rows) < LOAD_BATCH_SIZE:
+            return out
+        after_id = rows[-1]["id"]
+
+
+class IngredientIndex:
+    def __init__(self) -> None:
+        self._state: Optional[_State] = None
+        self._pending: Optional[List[Tuple[str, Any]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._state is not None
+
+    async def reload(self, driver) -> None:
+        # izmene koje stignu dok traje ucitavanje se ponove nad novim stanjem (upsert/remove su idempotentni)
+        self._pending = []
+        try:
+            records = await _fetch_recipes(driver)
+            state = await asyncio.to_thread(_State.build, records)
+            for op, arg in self._pending:
+                if op == "upsert":
+                    state.add(arg)
+                else:
+                    state.remove(arg)
+            self._state = state
+        finally:
+            self._pending = None
+        logger.info("Ingredient index loaded: %d recipes, %d ingredients", len(state.slot), len(state.postings))
+
+    async def start(self, driver, refresh_seconds: float) -> None:
+        # dok indeks nije ucitan pretraga ide preko Cypher-a
+        try:
+            await self.reload(driver)
+        except Exception:
+            logger.exception("Ingredient index load failed, falling back to Cypher search")
+        if refresh_seconds > 0:
+            self._task = asyncio.create_task(self._refresh_loop(driver, refresh_seconds))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _refresh_loop(self, driver, refresh_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(refresh_seconds)
+            try:
+                await self.reload(driver)
+            except Exception:
+                logger.exception("Ingredient index reload failed")
+
+    def upsert(self, rec: Dict[str, Any]) -> None:
+        if self._pending is not None:
+            self._pending.append(("upsert", rec))
+        if self._state is not None:
+            self._state.add(rec)
+
+    def remove(self, rid: str) -> None:
+        if self._pending is not None:
+            self._pending.append(("remove", rid))
+        if self._state is not None:
+            self._state.remove(rid)
+
+    def on_recipe_event(self, event: RecipeEvent) -> None:
+        if event.kind == DELETED:
+            self.remove(event.recipe_id)
+        else:
+            self.upsert(event.recipe)
+
+    def search(self, wanted: List[str], skip: int, limit: int, after: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+        return self._state.search(wanted, skip, limit, after)
+
+
+ingredient_index = IngredientIndex()
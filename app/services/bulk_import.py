@@ -0,0 +1,440 @@
+# Streaming bulk import (python -m app.jobs.bulk_import i POST /admin/import).
+#
+# Ulaz je tok bajtova (fajl, stdin ili telo request-a) u NDJSON ili CSV formatu, jedna vrsta
+# entiteta po toku (users / recipes / likes / ratings). Pipeline:
+#   bajtovi -> zapisi -> batch-evi od batch_size redova
+#           -> validacija + normalizacija u process pool-u (Pydantic seme, sr_norm_latin)
+#           -> UNWIND upis, jedna transakcija po batch-u
+# U letu je najvise 2 * workers batch-eva, pa memorija ne zavisi od velicine ulaza. Upisi idu
+# redom, jedan po jedan (bez deadlock-ova na popularnim cvorovima).
+#
+# Import je idempotentan: postojeci useri (username) i recepti (id) se preskacu, lajk se ne broji
+# dvaput, a ocena istog usera se prepisuje. Zato se prekinut import moze samo pokrenuti ponovo.
+# In-process strukture (ingredient index, popularity...) ne dobijaju RecipeEvent po uvezenom
+# receptu nego ih pokupi njihov periodicni reload.
+import asyncio
+import codecs
+import csv
+import json
+import os
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from neo4j.exceptions import ConstraintError
+from pydantic import ValidationError
+
+from app.db.neo4j_driver import write_single
+from app.db.ratings import RATING_SCORE_SET, initial_rating_score, rating_prior
+from app.schemas.like import LikeCreate
+from app.schemas.rating import RatingUpsert
+from app.schemas.recipe import RecipeCreate
+from app.schemas.user import UserCreate
+from app.services.like_writes import like_pairs
+from app.services.recipe_writes import INGREDIENT_NORM_SET, norm_description, norm_ingredients
+from app.utils.text_norm import SR_NORM_VERSION
+
+KINDS = ("users", "recipes", "likes", "ratings")
+FORMATS = ("ndjson", "csv")
+MAX_ERROR_SAMPLES = 20
+
+Row = Dict[str, Any]
+
+
+class ImportFormatError(Exception):
+    pass
+
+
+# ---------- citanje ----------
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    # linije sa '\n' na kraju; UTF-8 (sa ili bez BOM-a) moze biti presecen izmedju chunk-ova
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    async for chunk in chunks:
+        tail += decoder.decode(chunk)
+        start = 0
+        while True:
+            end = tail.find("\n", start)
+            if end < 0:
+                break
+            yield tail[start:end + 1]
+            start = end + 1
+        tail = tail[start:]
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def _ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Any]]:
+    n = 0
+    async for line in lines:
+        n += 1
+        if line.strip():
+            yield n, line
+
+
+async def _csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Any]]:
+    # zapis moze da se prostire kroz vise linija (polje pod navodnicima sa '\n'): linije se
+    # spajaju dok broj '"' nije paran, pa se zapis parsira csv modulom
+    header: Optional[List[str]] = None
+    record = ""
+    n = 0
+    first = 0
+    async for line in lines:
+        n += 1
+        if not record:
+            first = n
+        record += line
+        if record.count('"') % 2:
+            continue
+        values = next(csv.reader([record]), [])
+        record = ""
+        if not any(v.strip() for v in values):
+            continue
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        yield first, dict(zip(header, values))
+    if record:
+        raise ImportFormatError(f"unterminated quoted field starting at line {first}")
+
+
+async def _batches(records: AsyncIterator[Tuple[int, Any]], size: int) -> AsyncIterator[List[Tuple[int, Any]]]:
+    batch: List[Tuple[int, Any]] = []
+    async for rec in records:
+        batch.append(rec)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ---------- validacija (izvrsava se u worker procesu) ----------
+
+def _csv_ingredients(value: str) -> List[dict]:
+    # CSV kolona ingredients: "ime:kolicina:jedinica;ime;ime:kolicina"
+    out = []
+    for part in (value or "").split(";"):
+        if not part.strip():
+            continue
+        name, amount, unit = (part.split(":") + ["", ""])[:3]
+        out.append({"name": name, "amount": amount.strip() or None, "unit": unit.strip() or None})
+    return out
+
+
+def _opt_str(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _user_row(raw: Row) -> Row:
+    user = UserCreate.model_validate(raw)
+    return {"id": _opt_str(raw.get("id")) or str(uuid.uuid4()), "username": user.username}
+
+
+def _recipe_row(raw: Row) -> Row:
+    if isinstance(raw.get("ingredients"), str):
+        raw = dict(raw, ingredients=_csv_ingredients(raw["ingredients"]))
+    recipe = RecipeCreate.model_validate(raw)
+    return {
+        "id": _opt_str(raw.get("id")) or str(uuid.uuid4()),
+        "user_id": _opt_str(raw.get("user_id")),
+        "title": recipe.title,
+        "description": recipe.description,
+        "description_norm": norm_description(recipe.description),
+        "category": recipe.category,
+        "ings": norm_ingredients(recipe.ingredients),
+    }
+
+
+def _like_row(raw: Row) -> Row:
+    like = LikeCreate.model_validate(raw)
+    return {"user_id": like.user_id, "recipe_id": like.recipe_id}
+
+
+def _rating_row(raw: Row) -> Row:
+    ids = LikeCreate.model_validate(raw)
+    rating = RatingUpsert.model_validate(raw)
+    return {"user_id": ids.user_id, "recipe_id": ids.recipe_id, "value": rating.value}
+
+
+_ROW_BUILDERS: Dict[str, Callable[[Row], Row]] = {
+    "users": _user_row,
+    "recipes": _recipe_row,
+    "likes": _like_row,
+    "ratings": _rating_row,
+}
+
+
+def validate_batch(kind: str, fmt: str, batch: List[Tuple[int, Any]]) -> Tuple[List[Row], List[dict]]:
+    build = _ROW_BUILDERS[kind]
+    rows: List[Row] = []
+    errors: List[dict] = []
+    for line, raw in batch:
+        try:
+            if fmt == "ndjson":
+                raw = json.loads(raw)
+                if not isinstance(raw, dict):
+                    raise ValueError("expected a JSON object")
+            rows.append(dict(build(raw), line=line))
+        except ValidationError as e:
+            errors.append({"line": line, "error": "; ".join(err["msg"] for err in e.errors())})
+        except ValueError as e:
+            errors.append({"line": line, "error": str(e)})
+    return rows, errors
+
+
+# ---------- upis ----------
+
+# red ciji id vec pripada drugom username-u bi oborio ceo batch na constraint-u user_id, pa se
+# izdvaja kao greska (conflicts = linije tih redova)
+IMPORT_USERS_CYPHER = """
+UNWIND $rows AS row
+OPTIONAL MATCH (taken:User {id: row.id})
+WITH row, taken IS NOT NULL AND taken.username <> row.username AS conflict
+WITH collect(CASE WHEN conflict THEN row.line END) AS conflicts,
+     collect(CASE WHEN NOT conflict THEN row END) AS ok_rows
+CALL {
+  WITH ok_rows
+  UNWIND ok_rows AS row
+  MERGE (u:User {username: row.username})
+  ON CREATE SET u.id = row.id, u.likes_given = 0, u.recipes_created = 0
+  RETURN count(CASE WHEN u.id = row.id THEN 1 END) AS written
+}
+RETURN written, conflicts;
+"""
+
+IMPORT_RECIPES_CYPHER = """
+UNWIND $rows AS row
+MATCH (c:Category {name: row.category})
+OPTIONAL MATCH (owner:User {id: row.user_id})
+WITH row, c, owner
+WHERE NOT EXISTS { MATCH (:Recipe {id: row.id}) }
+  AND (row.user_id IS NULL OR owner IS NOT NULL)
+CREATE (r:Recipe {
+  id: row.id,
+  title: row.title,
+  description: row.description,
+  description_norm: row.description_norm,
+  description_norm_v: $norm_version,
+  rating_sum: 0,
+  rating_count: 0,
+  rating_avg: 0.0,
+  rating_score: $rating_score,
+  like_count: 0,
+  updated_at: timestamp()
+})
+CREATE (r)-[:IN_CATEGORY]->(c)
+FOREACH (_ IN CASE WHEN owner IS NULL THEN [] ELSE [1] END |
+    CREATE (owner)-[:CREATED]->(r)
+    SET owner.recipes_created = coalesce(owner.recipes_created, 0) + 1
+)
+WITH r, row
+CALL {
+  WITH r, row
+  UNWIND row.ings AS ing
+  MERGE (i:Ingredient {name: ing.name})
+  """ + INGREDIENT_NORM_SET + """
+  CREATE (r)-[:HAS_INGREDIENT {amount: ing.amount, unit: ing.unit}]->(i)
+}
+RETURN count(r) AS written;
+"""
+
+# isti agregat kao PUT /ratings/{id}/rating, ali direktno na Recipe (bez shardova)
+IMPORT_RATINGS_CYPHER = """
+UNWIND $rows AS row
+MATCH (u:User {id: row.user_id})
+MATCH (r:Recipe {id: row.recipe_id})
+OPTIONAL MATCH (u)-[rt:RATED]->(r)
+WITH row, u, r, head(collect(rt)) AS rt
+FOREACH (_ IN CASE WHEN rt IS NULL THEN [1] ELSE [] END |
+    CREATE (u)-[:RATED {value: row.value, createdAt: datetime()}]->(r)
+    SET r.rating_sum = coalesce(r.rating_sum, 0) + row.value,
+        r.rating_count = coalesce(r.rating_count, 0) + 1
+)
+FOREACH (_ IN CASE WHEN rt IS NULL THEN [] ELSE [1] END |
+    SET r.rating_sum = coalesce(r.rating_sum, 0) + row.value - rt.value,
+        rt.value = row.value,
+        rt.updatedAt = datetime()
+)
+SET r.updated_at = timestamp()
+SET """ + RATING_SCORE_SET + """
+RETURN count(*) AS written;
+"""
+
+
+def _dedupe(rows: List[Row], *keys: str) -> List[Row]:
+    # isti kljuc dvaput u jednom UNWIND-u bi se dvaput racunao u brojacima; poslednji pobedjuje
+    return list({tuple(row[k] for k in keys): row for row in rows}.values())
+
+
+def _user_id_conflicts(rows: List[Row]) -> Tuple[List[Row], List[dict]]:
+    # isti id za razlicite username-ove u jednom batch-u: prvi red ostaje, ostali su greske
+    owner: Dict[str, str] = {}
+    ok: List[Row] = []
+    errors: List[dict] = []
+    for row in rows:
+        if owner.setdefault(row["id"], row["username"]) != row["username"]:
+            errors.append({"line": row["line"], "error": f"user id {row['id']!r} already used by another username"})
+        else:
+            ok.append(row)
+    return ok, errors
+
+
+async def _write_users(driver, rows: List[Row]) -> Tuple[int, List[dict]]:
+    rows, errors = _user_id_conflicts(_dedupe(rows, "username"))
+    try:
+        rec = await write_single(driver, IMPORT_USERS_CYPHER, rows=rows)
+    except ConstraintError as e:
+        # isti id upisan u medjuvremenu (paralelan import / API) - batch se prijavljuje kao greska
+        return 0, errors + [{"line": row["line"], "error": e.message or str(e)} for row in rows]
+    if not rec:
+        return 0, errors
+    errors += [
+        {"line": line, "error": "user id already belongs to another username"} for line in rec["conflicts"]
+    ]
+    return rec["written"], errors
+
+
+async def _write_batch(driver, kind: str, rows: List[Row]) -> Tuple[int, List[dict]]:
+    # (upisano, greske upisa - redovi koji su prosli validaciju ali ih baza odbija)
+    if kind == "users":
+        return await _write_users(driver, rows)
+    elif kind == "recipes":
+        rec = await write_single(
+            driver,
+            IMPORT_RECIPES_CYPHER,
+            rows=_dedupe(rows, "id"),
+            rating_score=initial_rating_score(),
+            norm_version=SR_NORM_VERSION,
+        )
+    elif kind == "likes":
+        written = await like_pairs(driver, _dedupe(rows, "user_id", "recipe_id"))
+        return sum(1 for row in written if not row["existed"]), []
+    else:
+        rec = await write_single(
+            driver, IMPORT_RATINGS_CYPHER, rows=_dedupe(rows, "user_id", "recipe_id"), **rating_prior()
+        )
+    return (rec["written"] if rec else 0), []
+
+
+# ---------- pipeline ----------
+
+def default_workers() -> int:
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+class ImportPool:
+    # jedan process pool za POST /admin/import, pravi se na startup-u API-ja (ne po request-u)
+    def __init__(self) -> None:
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.workers = 0
+
+    @property
+    def executor(self) -> Optional[ProcessPoolExecutor]:
+        return self._pool
+
+    def start(self, workers: int) -> None:
+        self.workers = workers or default_workers()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+
+    def stop(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+import_pool = ImportPool()
+
+
+async def run_import(
+    driver,
+    kind: str,
+    fmt: str,
+    chunks: AsyncIterator[bytes],
+    batch_size: int = 1000,
+    workers: int = 0,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    pool: Optional[ProcessPoolExecutor] = None,
+) -> Dict[str, Any]:
+    # bez pool-a (CLI) import pravi svoj pool sa `workers` procesa; sa pool-om (API) workers je
+    # njegova velicina i odredjuje samo broj batch-eva u letu
+    if kind not in KINDS:
+        raise ImportFormatError(f"unknown kind {kind!r}, expected one of {', '.join(KINDS)}")
+    if fmt not in FORMATS:
+        raise ImportFormatError(f"unknown format {fmt!r}, expected one of {', '.join(FORMATS)}")
+
+    workers = workers or default_workers()
+    if pool is None:
+        with ProcessPoolExecutor(max_workers=workers) as own_pool:
+            return await _run_import(driver, kind, fmt, chunks, batch_size, workers, progress, own_pool)
+    return await _run_import(driver, kind, fmt, chunks, batch_size, workers, progress, pool)
+
+
+async def _run_import(
+    driver,
+    kind: str,
+    fmt: str,
+    chunks: AsyncIterator[bytes],
+    batch_size: int,
+    workers: int,
+    progress: Optional[Callable[[Dict[str, Any]], None]],
+    pool: ProcessPoolExecutor,
+) -> Dict[str, Any]:
+    lines = _lines(chunks)
+    records = _ndjson_records(lines) if fmt == "ndjson" else _csv_records(lines)
+    stats: Dict[str, Any] = {
+        "kind": kind,
+        "rows": 0,
+        "valid": 0,
+        "invalid": 0,
+        "written": 0,
+        "skipped": 0,
+        "batches": 0,
+        "seconds": 0.0,
+        "rows_per_second": 0.0,
+        "errors": [],
+    }
+    t0 = time.perf_counter()
+    loop = asyncio.get_running_loop()
+
+    async def write(fut) -> None:
+        rows, errors = await fut
+        written, write_errors = await _write_batch(driver, kind, rows) if rows else (0, [])
+        errors = errors + write_errors
+        rows_ok = len(rows) - len(write_errors)
+        stats["batches"] += 1
+        stats["valid"] += rows_ok
+        stats["invalid"] += len(errors)
+        stats["written"] += written
+        # postojeci / duplikati / nepostojeca kategorija, user ili recept
+        stats["skipped"] += rows_ok - written
+        room = MAX_ERROR_SAMPLES - len(stats["errors"])
+        if room > 0:
+            stats["errors"].extend(errors[:room])
+        elapsed = time.perf_counter() - t0
+        stats["seconds"] = round(elapsed, 2)
+        stats["rows_per_second"] = round(stats["valid"] / elapsed, 1) if elapsed else 0.0
+        if progress is not None:
+            progress(stats)
+
+    inflight: deque = deque()
+    try:
+        async for batch in _batches(records, batch_size):
+            stats["rows"] += len(batch)
+            inflight.append(loop.run_in_executor(pool, validate_batch, kind, fmt, batch))
+            if len(inflight) >= 2 * workers:
+                await write(inflight.popleft())
+        while inflight:
+            await write(inflight.popleft())
+    finally:
+        for fut in inflight:
+            fut.cancel()
+
+    return stats
@@ -0,0 +1,175 @@
+# Write-behind za POST/DELETE /likes (LIKE_WRITE_BEHIND=1).
+#
+# Zahtev samo upise nameru u in-process bafer i odmah dobija odgovor (202). Bafer je mapa
+# (user, recipe) -> like/unlike, pa vise klikova na isti par pre flush-a postaje jedan upis
+# (poslednji pobedjuje). Flusher ga na LIKE_BUFFER_FLUSH_MS ili kad se skupi LIKE_BUFFER_BATCH_SIZE
+# parova prazni u UNWIND transakcijama (app/services/like_writes.py), pa viralan recept dobija
+# jedan upis po batch-u umesto jedne transakcije po kliku.
+#
+# Bafer je ogranicen (LIKE_BUFFER_MAX_PENDING): kad je pun, zahtev ceka mesto do
+# LIKE_BUFFER_ENQUEUE_TIMEOUT pa dobija 503. Na shutdown-u se prazni do kraja.
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.like_writes import like_pairs, unlike_pairs
+
+logger = logging.getLogger(__name__)
+
+Pair = Tuple[str, str]
+
+FLUSH_RETRY_SECONDS = 1.0  # pauza posle neuspelog flush-a (npr. baza nedostupna)
+
+
+class LikeBufferFull(Exception):
+    pass
+
+
+class LikeBuffer:
+    def __init__(self) -> None:
+        self._pending: Dict[Pair, bool] = {}
+        self._inflight: Dict[Pair, bool] = {}  # batch koji se upravo upisuje
+        self._driver = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self.max_pending = 10000
+        self.batch_size = 500
+        self.flush_seconds = 0.005
+        self.enqueue_timeout = 1.0
+        self._metrics: Dict[str, Any] = {
+            "enqueued": 0,
+            "coalesced": 0,
+            "flushed": 0,
+            "flushes": 0,
+            "flush_errors": 0,
+            "rejected": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self._task is not None
+
+    def start(self, driver, max_pending: int, batch_size: int, flush_ms: float, enqueue_timeout: float) -> None:
+        self._driver = driver
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_seconds = flush_ms / 1000.0
+        self.enqueue_timeout = enqueue_timeout
+        self._stopping = False
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        # prvo zaustavi flusher, pa isprazni sve sto je ostalo (poziva se iz on_shutdown pre close_driver).
+        # Flusher se ne cancel-uje: zavrsi batch koji upravo upisuje i izadje iz petlje.
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        while self._pending:
+            before = len(self._pending)
+            await self.flush()
+            if len(self._pending) >= before:
+                logger.error("Like buffer: dropping %d pending likes on shutdown", len(self._pending))
+                break
+
+    async def submit(self, uid: str, rid: str, like: bool) -> None:
+        key = (uid, rid)
+        if key not in self._pending:
+            # backpressure: nov par ceka mesto; prepis postojeceg para ne zauzima mesto
+            while len(self._pending) >= self.max_pending:
+                self._space.clear()
+                self._wakeup.set()
+                try:
+                    await asyncio.wait_for(self._space.wait(), timeout=self.enqueue_timeout)
+                except asyncio.TimeoutError:
+                    self._metrics["rejected"] += 1
+                    raise LikeBufferFull()
+        else:
+            self._metrics["coalesced"] += 1
+
+        self._pending[key] = like
+        self._metrics["enqueued"] += 1
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def pending_state(self, uid: str, rid: str) -> Optional[bool]:
+        # jos neupisana namera za par (True like, False unlike), None => nema je u baferu
+        key = (uid, rid)
+        state = self._pending.get(key)
+        return self._inflight.get(key) if state is None else state
+
+    async def _flush_loop(self) -> None:
+        timeout = self.flush_seconds
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                return
+            timeout = self.flush_seconds if await self.flush() else FLUSH_RETRY_SECONDS
+
+    async def flush(self) -> bool:
+        async with self._flush_lock:
+            if not self._pending:
+                return True
+            batch, self._pending = self._pending, {}
+            self._inflight = batch
+            self._space.set()
+
+            t0 = time.perf_counter()
+            likes: List[Dict[str, str]] = []
+            unlikes: List[Dict[str, str]] = []
+            for (uid, rid), like in batch.items():
+                (likes if like else unlikes).append({"user_id": uid, "recipe_id": rid})
+            try:
+                for i in range(0, len(likes), self.batch_size):
+                    await like_pairs(self._driver, likes[i:i + self.batch_size])
+                for i in range(0, len(unlikes), self.batch_size):
+                    await unlike_pairs(self._driver, unlikes[i:i + self.batch_size])
+            except asyncio.CancelledError:
+                # prekinut upis (npr. cancel taska) - batch ostaje u baferu za sledeci flush
+                for key, like in batch.items():
+                    self._pending.setdefault(key, like)
+                raise
+            except Exception:
+                # vrati u bafer ono sto u medjuvremenu nije prepisano novijom namerom; like/unlike su idempotentni
+                self._metrics["flush_errors"] += 1
+                logger.exception("Like buffer flush failed (%d pairs), retrying", len(batch))
+                for key, like in batch.items():
+                    self._pending.setdefault(key, like)
+                return False
+            finally:
+                self._inflight = {}
+
+            ms = (time.perf_counter() - t0) * 1000.0
+            m = self._metrics
+            m["flushed"] += len(batch)
+            m["flushes"] += 1
+            m["last_flush_ms"] = round(ms, 2)
+            m["max_flush_ms"] = round(max(m["max_flush_ms"], ms), 2)
+            m["total_flush_ms"] += ms
+            return True
+
+    def metrics(self) -> Dict[str, Any]:
+        m = dict(self._metrics)
+        total = m.pop("total_flush_ms")
+        m["avg_flush_ms"] = round(total / m["flushes"], 2) if m["flushes"] else 0.0
+        m["queue_depth"] = len(self._pending)
+        m["max_pending"] = self.max_pending
+        m["enabled"] = self.enabled
+        return m
+
+
+like_buffer = LikeBuffer()
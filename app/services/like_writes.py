@@ -0,0 +1,69 @@
+# UNWIND upis vise (user, recipe) lajkova u jednoj transakciji + azuriranje in-process struktura
+# (item similarity, popularity). Koriste ga POST/DELETE /likes/batch i write-behind bafer (like_buffer.py).
+# Parovi moraju biti jedinstveni - isti par dva puta u istom UNWIND-u bi se dva puta racunao u brojacima.
+from typing import Callable, Dict, List, Tuple
+
+from app.db.neo4j_driver import write_all
+from app.recs.item_similarity import item_similarity
+from app.recs.popularity import popularity
+
+LIKE_PAIRS_CYPHER = """
+UNWIND $pairs AS p
+MATCH (u:User {id: p.user_id})
+MATCH (r:Recipe {id: p.recipe_id})
+WITH p, u, r, EXISTS { (u)-[:LIKES]->(r) } AS existed
+MERGE (u)-[:LIKES]->(r)
+ON CREATE SET r.like_count = coalesce(r.like_count, 0) + 1,
+              r.updated_at = timestamp(),
+              u.likes_given = coalesce(u.likes_given, 0) + 1,
+              u.likes_changed_at = timestamp()
+RETURN p.user_id AS user_id,
+       p.recipe_id AS recipe_id,
+       existed,
+       r.title AS title,
+       r.like_count AS like_count;
+"""
+
+UNLIKE_PAIRS_CYPHER = """
+UNWIND $pairs AS p
+MATCH (u:User {id: p.user_id})-[rel:LIKES]->(r:Recipe {id: p.recipe_id})
+DELETE rel
+SET r.like_count = coalesce(r.like_count, 1) - 1,
+    r.updated_at = timestamp(),
+    u.likes_given = coalesce(u.likes_given, 1) - 1,
+    u.likes_changed_at = timestamp()
+RETURN p.user_id AS user_id,
+       p.recipe_id AS recipe_id,
+       r.title AS title,
+       r.like_count AS like_count;
+"""
+
+
+def _apply_like_counts(rows: List[dict], pick: Callable[[int, int], int]) -> None:
+    # vise parova za isti recept: pick (max za like, min za unlike) = stanje posle cele transakcije
+    final: Dict[str, Tuple[str, int]] = {}
+    for row in rows:
+        prev = final.get(row["recipe_id"])
+        count = row["like_count"] if prev is None else pick(prev[1], row["like_count"])
+        final[row["recipe_id"]] = (row["title"], count)
+    for rid, (title, count) in final.items():
+        popularity.set(rid, title, count)
+
+
+async def like_pairs(driver, pairs: List[Dict[str, str]]) -> List[dict]:
+    # vraca red po paru koji postoji (existed => lajk je vec bio tu); nepostojeci useri/recepti ispadaju
+    rows = await write_all(driver, LIKE_PAIRS_CYPHER, pairs=pairs)
+    created = [row for row in rows if not row["existed"]]
+    for row in created:
+        item_similarity.like(row["user_id"], row["recipe_id"])
+    _apply_like_counts(created, max)
+    return rows
+
+
+async def unlike_pairs(driver, pairs: List[Dict[str, str]]) -> List[dict]:
+    # vraca red po obrisanom lajku
+    rows = await write_all(driver, UNLIKE_PAIRS_CYPHER, pairs=pairs)
+    for row in rows:
+        item_similarity.unlike(row["user_id"], row["recipe_id"])
+    _apply_like_counts(rows, min)
+    return rows
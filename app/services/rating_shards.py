@@ -0,0 +1,85 @@
+# Pozadinski merge rating shardova (RATING_SHARDS > 0): sabira (:RatingShard) cvorove u
+# Recipe.rating_sum / rating_count i vraca ih na nulu, sve u istoj transakciji, pa zbir
+# baza + shardovi (sto citanja vracaju, app/db/ratings.py) ostaje isti tokom merge-a.
+# Merge ujedno azurira r.rating_score, koji sa shardovima kasni najvise RATING_MERGE_SECONDS.
+import asyncio
+import logging
+import zlib
+from typing import Optional
+
+from app.db.neo4j_driver import write_single
+from app.db.ratings import RATING_SCORE_SET, rating_prior
+
+logger = logging.getLogger(__name__)
+
+MERGE_BATCH_SIZE = 500  # recepata po transakciji
+
+
+def shard_for(user_id: str, shards: int) -> Optional[int]:
+    # isti user uvek pogadja isti shard (stabilno izmedju procesa, za razliku od hash())
+    if shards <= 0:
+        return None
+    return zlib.crc32(user_id.encode("utf-8")) % shards
+
+
+async def merge_rating_shards(driver) -> int:
+    cypher = """
+    MATCH (s:RatingShard)
+    WHERE s.sum <> 0 OR s.count <> 0
+    WITH s.recipe_id AS rid, collect(s) AS shards
+    LIMIT $batch
+    // prvo write lock na shardove, pa tek onda citanje: upis ocene koji je u toku ili stize
+    // posle ovoga ceka kraj merge-a, pa nijedna promena ne moze da se izgubi pri vracanju na 0
+    FOREACH (s IN shards | SET s._merge_lock = true)
+    WITH rid, shards,
+         reduce(acc = 0, s IN shards | acc + s.sum) AS merged_sum,
+         reduce(acc = 0, s IN shards | acc + s.count) AS merged_count
+    OPTIONAL MATCH (r:Recipe {id: rid})
+    FOREACH (_ IN CASE WHEN r IS NULL THEN [] ELSE [1] END |
+        SET r.rating_sum = coalesce(r.rating_sum, 0) + merged_sum,
+            r.rating_count = coalesce(r.rating_count, 0) + merged_count,
+            r.updated_at = timestamp()
+        SET """ + RATING_SCORE_SET + """
+    )
+    // shardovi obrisanog recepta se samo uklanjaju
+    FOREACH (s IN CASE WHEN r IS NULL THEN shards ELSE [] END | DELETE s)
+    FOREACH (s IN CASE WHEN r IS NULL THEN [] ELSE shards END |
+        SET s.sum = 0, s.count = 0
+        REMOVE s._merge_lock
+    )
+    RETURN count(*) AS merged;
+    """
+    total = 0
+    while True:
+        rec = await write_single(driver, cypher, batch=MERGE_BATCH_SIZE, **rating_prior())
+        merged = rec["merged"] if rec else 0
+        total += merged
+        if merged < MERGE_BATCH_SIZE:
+            return total
+
+
+class RatingShardMerger:
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, driver, interval_seconds: float) -> None:
+        if interval_seconds > 0:
+            self._task = asyncio.create_task(self._loop(driver, interval_seconds))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _loop(self, driver, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                merged = await merge_rating_shards(driver)
+                if merged:
+                    logger.info("Rating shards merged for %d recipes", merged)
+            except Exception:
+                logger.exception("Rating shard merge failed")
+
+
+rating_shard_merger = RatingShardMerger()
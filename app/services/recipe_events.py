@@ -0,0 +1,49 @@
+# Dogadjaji o izmenama recepata. Svaki upis recepta ide kroz app/services/recipe_writes.py, koji
+# posle uspesne transakcije objavi RecipeEvent; in-process strukture (ingredient index, popularity,
+# kesevi) se pretplate jednom (app/main.py) umesto da svaki ruter zove svaku strukturu posebno.
+#
+# Handleri su sinhroni i pozivaju se odmah posle commit-a, u istom request-u - moraju biti brzi
+# i ne smeju da bacaju (greska se loguje, ostali handleri se i dalje pozivaju).
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+
+
+@dataclass
+class RecipeEvent:
+    kind: str  # CREATED / UPDATED / DELETED
+    recipe_id: str
+    # posle created/updated: id, title, description, category, ingredients; None za deleted
+    recipe: Optional[Dict[str, Any]] = None
+
+
+Handler = Callable[[RecipeEvent], None]
+
+
+class RecipeEvents:
+    def __init__(self) -> None:
+        self._handlers: List[Handler] = []
+
+    def subscribe(self, handler: Handler) -> None:
+        if handler not in self._handlers:
+            self._handlers.append(handler)
+
+    def unsubscribe(self, handler: Handler) -> None:
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+
+    def publish(self, event: RecipeEvent) -> None:
+        for handler in list(self._handlers):
+            try:
+                handler(event)
+            except Exception:
+                logger.exception("Recipe event handler failed (%s %s)", event.kind, event.recipe_id)
+
+
+recipe_events = RecipeEvents()
@@ -0,0 +1,228 @@
+# Jedino mesto gde se recepti kreiraju, menjaju i brisu - koriste ga /recipes i /users/{id}/recipes.
+#
+# Svaka operacija je jedna write transakcija; description_norm (sr_norm_latin) se racuna samo ovde,
+# pa svi recepti ulaze u fulltext indeks (search_by_description) bez obzira na putanju.
+# Posle commit-a se objavljuje RecipeEvent (app/services/recipe_events.py) na koji su pretplacene
+# in-process strukture i kesevi. owner_id != None => recept pripada tom useru (kreiranje ga vezuje
+# sa CREATED, izmena/brisanje proveravaju vlasnistvo).
+import uuid
+from typing import List, Optional
+
+from app.db.neo4j_driver import write_single
+from app.db.ratings import RATING_FIELDS, initial_rating_score
+from app.schemas.recipe import IngredientInput, RecipeCreate, RecipeUpdate
+from app.services.recipe_events import CREATED, DELETED, UPDATED, RecipeEvent, recipe_events
+from app.utils.text_norm import SR_NORM_VERSION, sr_norm_latin
+
+
+class RecipeNotFound(Exception):
+    pass
+
+
+class InvalidCategory(Exception):
+    pass
+
+
+def norm_ingredients(items: List[IngredientInput]) -> List[dict]:
+    return [
+        {"name": it.name, "name_norm": sr_norm_latin(it.name), "unit": it.unit, "amount": it.amount}
+        for it in items
+    ]
+
+
+def norm_description(description: Optional[str]) -> Optional[str]:
+    return sr_norm_latin(description) if description else None
+
+
+# posle MERGE (i:Ingredient): name_norm se (pre)racunava za nov sastojak i za sastojak cija je
+# normalizacija starija od SR_NORM_VERSION; ostali se ne diraju (bez write lock-a na cestim sastojcima)
+INGREDIENT_NORM_SET = """FOREACH (_ IN CASE WHEN i.name_norm IS NULL OR coalesce(i.name_norm_v, 0) < $norm_version
+                 THEN [1] ELSE [] END |
+      SET i.name_norm = ing.name_norm, i.name_norm_v = $norm_version)"""
+
+# nepostojeca kategorija ili (sa $uid) nepostojeci user => nema reda
+CREATE_RECIPE_CYPHER = """
+MATCH (c:Category {name: $category})
+OPTIONAL MATCH (u:User {id: $uid})
+WITH c, u
+WHERE $uid IS NULL OR u IS NOT NULL
+CREATE (r:Recipe {
+  id: $rid,
+  title: $title,
+  description: $description,
+  description_norm: $description_norm,
+  description_norm_v: $norm_version,
+  rating_sum: 0,
+  rating_count: 0,
+  rating_avg: 0.0,
+  rating_score: $rating_score,
+  like_count: 0,
+  updated_at: timestamp()
+})
+CREATE (r)-[:IN_CATEGORY]->(c)
+FOREACH (_ IN CASE WHEN u IS NULL THEN [] ELSE [1] END |
+    CREATE (u)-[:CREATED]->(r)
+    SET u.recipes_created = coalesce(u.recipes_created, 0) + 1
+)
+WITH r
+CALL {
+  WITH r
+  UNWIND $ings AS ing
+  MERGE (i:Ingredient {name: ing.name})
+  """ + INGREDIENT_NORM_SET + """
+  CREATE (r)-[:HAS_INGREDIENT {amount: ing.amount, unit: ing.unit}]->(i)
+}
+RETURN r.id AS id,
+       r.title AS title,
+       r.description AS description,
+       r.rating_sum AS rating_sum,
+       r.rating_count AS rating_count,
+       r.rating_avg AS rating_avg;
+"""
+
+# samo poslata polja, kategorija samo ako je druga, a sastojci kao diff - brisu se samo uklonjene
+# HAS_INGREDIENT veze, nove se prave, a postojecim se amount/unit postavljaju samo ako su se promenili
+# (nepromenjeni sastojci se ne zakljucavaju).
+# found=false => recept ne postoji (ili nije od usera); ok=false => nista nije upisano (nepostojeca kategorija)
+UPDATE_RECIPE_CYPHER = """
+OPTIONAL MATCH (r:Recipe {id: $rid})
+WHERE $uid IS NULL OR EXISTS { (:User {id: $uid})-[:CREATED]->(r) }
+OPTIONAL MATCH (c:Category {name: $category})
+WITH r, c, r IS NOT NULL AND ($category IS NULL OR c IS NOT NULL) AS ok
+CALL {
+  WITH r, c, ok
+  WITH r, c WHERE ok
+  SET r.updated_at = timestamp()
+  FOREACH (_ IN CASE WHEN $title IS NULL THEN [] ELSE [1] END | SET r.title = $title)
+  FOREACH (_ IN CASE WHEN $set_description THEN [1] ELSE [] END |
+      SET r.description = $description, r.description_norm = $description_norm,
+          r.description_norm_v = $norm_version)
+  FOREACH (old IN CASE WHEN c IS NULL THEN [] ELSE [(r)-[o:IN_CATEGORY]->(oc:Category) WHERE oc <> c | o] END |
+      DELETE old)
+  FOREACH (_ IN CASE WHEN c IS NULL THEN [] ELSE [1] END | MERGE (r)-[:IN_CATEGORY]->(c))
+  WITH r, [x IN coalesce($ings, []) | x.name] AS names
+  FOREACH (old IN CASE WHEN $ings IS NULL THEN [] ELSE [(r)-[o:HAS_INGREDIENT]->(oi:Ingredient) WHERE NOT oi.name IN names | o] END |
+      DELETE old)
+  WITH r
+  UNWIND coalesce($ings, []) AS ing
+  OPTIONAL MATCH (r)-[cur:HAS_INGREDIENT]->(:Ingredient {name: ing.name})
+  // amount > 0 i unit != "" (IngredientInput), pa -1 / "" mogu da predstavljaju null
+  FOREACH (_ IN CASE WHEN cur IS NOT NULL
+                      AND (coalesce(cur.amount, -1) <> coalesce(ing.amount, -1)
+                           OR coalesce(cur.unit, "") <> coalesce(ing.unit, ""))
+                     THEN [1] ELSE [] END |
+      SET cur.amount = ing.amount, cur.unit = ing.unit)
+  FOREACH (_ IN CASE WHEN cur IS NULL THEN [1] ELSE [] END |
+      MERGE (i:Ingredient {name: ing.name})
+      """ + INGREDIENT_NORM_SET + """
+      CREATE (r)-[:HAS_INGREDIENT {amount: ing.amount, unit: ing.unit}]->(i))
+}
+WITH r, ok
+OPTIONAL MATCH (u:User)-[:CREATED]->(r)
+OPTIONAL MATCH (r)-[:IN_CATEGORY]->(cat:Category)
+CALL {
+  WITH r
+  OPTIONAL MATCH (r)-[rel:HAS_INGREDIENT]->(i:Ingredient)
+  RETURN collect({ name: i.name, amount: rel.amount, unit: rel.unit }) AS ingredients
+}
+""" + RATING_FIELDS + """
+RETURN r IS NOT NULL AS found,
+       ok,
+       r.id AS id,
+       r.title AS title,
+       r.description AS description,
+       cat.name AS category,
+       { id: u.id, username: u.username } AS created_by,
+       ingredients,
+       rating_sum,
+       rating_count,
+       rating_avg;
+"""
+
+DELETE_RECIPE_CYPHER = """
+MATCH (r:Recipe {id: $rid})
+WHERE $uid IS NULL OR EXISTS { (:User {id: $uid})-[:CREATED]->(r) }
+CALL {
+  WITH r
+  MATCH (liker:User)-[:LIKES]->(r)
+  SET liker.likes_given = coalesce(liker.likes_given, 1) - 1
+}
+CALL {
+  WITH r
+  MATCH (creator:User)-[:CREATED]->(r)
+  SET creator.recipes_created = coalesce(creator.recipes_created, 1) - 1
+}
+// rating shardovi (RATING_SHARDS) nisu povezani sa receptom, pa ih DETACH DELETE ne brise
+CALL {
+  WITH r
+  MATCH (s:RatingShard {recipe_id: r.id})
+  DELETE s
+}
+DETACH DELETE r
+RETURN count(*) AS deleted;
+"""
+
+
+async def create_recipe_record(driver, payload: RecipeCreate, owner_id: Optional[str] = None) -> Optional[dict]:
+    # None => nepostojeca kategorija (ili user)
+    rid = str(uuid.uuid4())
+    ings = norm_ingredients(payload.ingredients)
+    rec = await write_single(
+        driver,
+        CREATE_RECIPE_CYPHER,
+        rid=rid,
+        uid=owner_id,
+        title=payload.title,
+        description=payload.description,
+        description_norm=norm_description(payload.description),
+        norm_version=SR_NORM_VERSION,
+        category=payload.category,
+        ings=ings,
+        rating_score=initial_rating_score(),
+    )
+    if not rec:
+        return None
+
+    recipe_events.publish(RecipeEvent(CREATED, rid, {
+        "id": rid,
+        "title": payload.title,
+        "description": payload.description,
+        "category": payload.category,
+        "ingredients": ings,
+    }))
+    return rec
+
+
+async def update_recipe_record(driver, rid: str, payload: RecipeUpdate, owner_id: Optional[str] = None) -> dict:
+    # title: None => nije poslato
+    # description: None => nije poslato; "" => obriši;
+    description = payload.description
+    rec = await write_single(
+        driver,
+        UPDATE_RECIPE_CYPHER,
+        rid=rid,
+        uid=owner_id,
+        title=payload.title,
+        set_description=description is not None,
+        description=description,
+        description_norm=norm_description(description),
+        norm_version=SR_NORM_VERSION,
+        category=payload.category,
+        ings=norm_ingredients(payload.ingredients) if payload.ingredients is not None else None,
+    )
+    if not rec or not rec["found"]:
+        raise RecipeNotFound()
+    if not rec["ok"]:
+        raise InvalidCategory()
+
+    out = {k: v for k, v in rec.items() if k not in ("found", "ok")}
+    recipe_events.publish(RecipeEvent(UPDATED, rid, out))
+    return out
+
+
+async def delete_recipe_record(driver, rid: str, owner_id: Optional[str] = None) -> bool:
+    rec = await write_single(driver, DELETE_RECIPE_CYPHER, rid=rid, uid=owner_id)
+    if not rec or rec["deleted"] == 0:
+        return False
+    recipe_events.publish(RecipeEvent(DELETED, rid))
+    return True
@@ -2,4 +2,61 @@ import os
 
 NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
-NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "mojaSifra123")
\ No newline at end of file
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "mojaSifra123")
+
+# async driver (AsyncGraphDatabase); 0 => stari sync driver kroz threadpool
+NEO4J_ASYNC = os.getenv("NEO4J_ASYNC", "1").lower() not in ("0", "false", "no")
+
+# neo4j:// (routing) za klaster - citanja idu na followere/read replike, bolt:// za jednu instancu
+NEO4J_DATABASE = os.getenv("NEO4J_DATABASE", "neo4j")
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "100"))
+NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "60"))  # sekunde
+NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))  # sekunde
+NEO4J_MAX_TX_RETRY_TIME = float(os.getenv("NEO4J_MAX_TX_RETRY_TIME", "15"))  # sekunde, za execute_read/execute_write
+NEO4J_FETCH_SIZE = int(os.getenv("NEO4J_FETCH_SIZE", "1000"))
+
+# in-memory indeks za /recipes/search i /recipes/search_csv (app/search/ingredient_index.py)
+INGREDIENT_INDEX = os.getenv("INGREDIENT_INDEX", "0").lower() in ("1", "true", "yes")
+INGREDIENT_INDEX_REFRESH_SECONDS = float(os.getenv("INGREDIENT_INDEX_REFRESH_SECONDS", "300"))  # 0 => bez osvezavanja
+
+# offline preporuke (python -m app.jobs.recommendations_batch); 0 => uvek live Cypher
+RECS_PRECOMPUTED = os.getenv("RECS_PRECOMPUTED", "1").lower() not in ("0", "false", "no")
+RECS_TOP_K = int(os.getenv("RECS_TOP_K", "50"))
+
+# item-item collaborative filtering (app/recs/item_similarity.py): /recipes/{id}/also_liked, mode=collaborative
+ITEM_SIMILARITY = os.getenv("ITEM_SIMILARITY", "0").lower() in ("1", "true", "yes")
+ITEM_SIMILARITY_REFRESH_SECONDS = float(os.getenv("ITEM_SIMILARITY_REFRESH_SECONDS", "900"))  # 0 => bez rebuild-a
+ITEM_SIMILARITY_TOP_N = int(os.getenv("ITEM_SIMILARITY_TOP_N", "50"))
+
+# in-process popularity ranking (app/recs/popularity.py) za /recipes/popular i popular fallback preporuka
+POPULAR_TOP_N = int(os.getenv("POPULAR_TOP_N", "1000"))
+POPULAR_REFRESH_SECONDS = float(os.getenv("POPULAR_REFRESH_SECONDS", "30"))
+
+# write-behind za POST/DELETE /likes (app/services/like_buffer.py); 0 => svaki lajk je svoja transakcija
+LIKE_WRITE_BEHIND = os.getenv("LIKE_WRITE_BEHIND", "0").lower() in ("1", "true", "yes")
+LIKE_BUFFER_MAX_PENDING = int(os.getenv("LIKE_BUFFER_MAX_PENDING", "10000"))
+LIKE_BUFFER_BATCH_SIZE = int(os.getenv("LIKE_BUFFER_BATCH_SIZE", "500"))
+LIKE_BUFFER_FLUSH_MS = float(os.getenv("LIKE_BUFFER_FLUSH_MS", "5"))
+LIKE_BUFFER_ENQUEUE_TIMEOUT = float(os.getenv("LIKE_BUFFER_ENQUEUE_TIMEOUT", "1"))  # sekunde
+
+# broj shardova za agregat ocena po receptu (app/services/rating_shards.py); 0 => upis direktno na Recipe
+RATING_SHARDS = int(os.getenv("RATING_SHARDS", "0"))
+RATING_MERGE_SECONDS = float(os.getenv("RATING_MERGE_SECONDS", "30"))
+
+# Bayesov skor ocena (r.rating_score, /recipes/top_rated): ocekivana ocena i njena tezina u broju ocena
+RATING_PRIOR_MEAN = float(os.getenv("RATING_PRIOR_MEAN", "3.5"))
+RATING_PRIOR_WEIGHT = float(os.getenv("RATING_PRIOR_WEIGHT", "5"))
+
+# bulk import (python -m app.jobs.bulk_import, POST /admin/import); IMPORT_WORKERS=0 => broj jezgara - 1
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "0"))
+# /admin/* rute traze header X-Admin-Token sa ovom vrednoscu; prazno => /admin rute su iskljucene
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# /recipes/search_by_description: kes totala po (mode, upit); 0 => bez kesa
+SEARCH_TOTAL_TTL_SECONDS = float(os.getenv("SEARCH_TOTAL_TTL_SECONDS", "60"))
+SEARCH_TOTAL_CACHE_SIZE = int(os.getenv("SEARCH_TOTAL_CACHE_SIZE", "10000"))
+
+# /recipes/search_by_description: "lucene" (fulltext indeks u Neo4j) | "bm25" (in-process, app/search/bm25.py)
+DESCRIPTION_SEARCH = os.getenv("DESCRIPTION_SEARCH", "lucene").lower()
+DESCRIPTION_INDEX_REFRESH_SECONDS = float(os.getenv("DESCRIPTION_INDEX_REFRESH_SECONDS", "300"))  # 0 => bez osvezavanja
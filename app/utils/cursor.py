@@ -0,0 +1,32 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+
+# keyset paginacija: cursor je base64url(JSON) vrednosti sort kljuca poslednjeg reda sa strane
+# npr. (title, id) ili (likes, title, id); klijent ga samo vraca nazad kao ?cursor=...
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps(list(values), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(token: Optional[str], size: int) -> Optional[List[Any]]:
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+def next_cursor(rows: List[Dict[str, Any]], limit: int, *keys: str) -> Optional[str]:
+    # puna strana => mozda ima jos; poslednji red je pocetak sledece strane
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(*(last[k] for k in keys))
@@ -1,13 +1,90 @@
 import unicodedata
-import re
+from functools import lru_cache
+from typing import Iterable, List, Optional
 
 # da normalizujem description jer cu koristiti indeks (Lucene u Neo4j ali nema za srpski pa koristim basic) za pretragu po opisu recepta
-def sr_norm_latin(s: str) -> str:
-    s = (s or "").strip().lower()
-    #  čćšđž -> ccsdz
-    s = unicodedata.normalize("NFKD", s)
-    s = "".join(ch for ch in s if not unicodedata.combining(ch))
-    # ocisti interpunkciju
-    s = re.sub(r"[^a-z0-9\s]+", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+# lower -> bez dijakritika (čćšđž -> ccsdz) -> sve sto nije a-z0-9 postaje razmak -> jedan razmak izmedju reci
+#
+# Umesto NFKD + regex-a nad celim stringom svaki znak se mapira jednom, preko str.translate tabele:
+# ASCII a-z0-9 ostaju, ostali znakovi se razloze (NFKD), odbace im se akcenti i ne-alfanumericki
+# ostaci postaju razmak. Mapiranje ne-ASCII znaka se racuna pri prvom pojavljivanju i pamti.
+# đ nema NFKD dekompoziciju (ostajao bi van a-z), pa je eksplicitno đ -> d.
+_ASCII_KEEP = frozenset("abcdefghijklmnopqrstuvwxyz0123456789")
+_EXPLICIT = {"đ": "d"}
+
+
+def _fold_char(ch: str) -> str:
+    if ch in _EXPLICIT:
+        return _EXPLICIT[ch]
+    out = []
+    for c in unicodedata.normalize("NFKD", ch):
+        if unicodedata.combining(c):
+            continue
+        c = _EXPLICIT.get(c, c)
+        out.append(c if c in _ASCII_KEEP else " ")
+    return "".join(out)
+
+
+class _FoldTable(dict):
+    def __missing__(self, code: int) -> str:
+        folded = self[code] = _fold_char(chr(code))
+        return folded
+
+
+_FOLD: _FoldTable = _FoldTable()
+for _code in range(0x80):
+    _FOLD[_code] = chr(_code) if chr(_code) in _ASCII_KEEP else " "
+
+# verzija izlaza sr_norm_latin, upisuje se uz Recipe.description_norm kao description_norm_v;
+# povecati pri svakoj izmeni koja menja rezultat, pa app.jobs.description_norm preracuna stare opise
+# (1 = NFKD + regex, bez đ; 2 = translate tabela, đ -> d)
+SR_NORM_VERSION = 2
+
+# kratki stringovi (upiti, imena sastojaka) se ponavljaju, opisi recepata ne - njih ne kesiramo
+SR_NORM_CACHE_SIZE = 4096
+SR_NORM_CACHE_MAX_LEN = 64
+
+
+def _sr_norm(s: str) -> str:
+    return " ".join(s.lower().translate(_FOLD).split())
+
+
+_sr_norm_cached = lru_cache(maxsize=SR_NORM_CACHE_SIZE)(_sr_norm)
+
+
+def sr_norm_latin(s: Optional[str]) -> str:
+    if not s:
+        return ""
+    if len(s) <= SR_NORM_CACHE_MAX_LEN:
+        return _sr_norm_cached(s)
+    return _sr_norm(s)
+
+
+def normalize_many(items: Iterable[Optional[str]]) -> List[str]:
+    # batch oblik sr_norm_latin za pipeline-ove (reindex, import): bez kesa, None / "" -> ""
+    fold = _FOLD
+    return [" ".join(s.lower().translate(fold).split()) if s else "" for s in items]
+
+# lagani stemmer za srpski (latinica posle sr_norm_latin): skida najduzi poznat padezni /
+# glagolski nastavak ako ostane bar 3 slova, pa "paradajza", "paradajzom", "paradajz" -> "paradajz".
+# Nije pravi morfoloski stemmer - cilj je samo da razliciti oblici iste reci daju isti term (BM25).
+_SR_SUFFIXES = sorted(
+    [
+        "ovima", "evima", "ijama",
+        "ama", "ima", "ove", "eve", "ova", "eva", "oga", "ega", "omu", "emu",
+        "ski", "ska", "sko", "ske", "skih", "skim",
+        "ati", "iti", "eti", "uje", "ju",
+        "om", "em", "og", "eg", "ih", "im", "oj", "ej",
+        "a", "e", "i", "o", "u",
+    ],
+    key=len,
+    reverse=True,
+)
+SR_STEM_MIN_LEN = 3
+
+
+def sr_stem(token: str) -> str:
+    for suffix in _SR_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= SR_STEM_MIN_LEN:
+            return token[:-len(suffix)]
+    return token
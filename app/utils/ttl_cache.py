@@ -0,0 +1,39 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+# mali in-process LRU kes sa TTL-om (npr. total za istu pretragu dok korisnik lista strane)
+# nije thread-safe - koristi se iz event loop-a
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl_seconds: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires, value = item
+        if expires < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self, *_: Any) -> None:
+        # *_ => moze direktno kao handler dogadjaja (recipe_events.subscribe)
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,77 @@
+# Poredi async i sync mod data sloja (app.db.neo4j_driver) - requests/s pri istoj konkurentnosti.
+# Sync mod ide kroz threadpool (default ~40 niti), isto kao handleri pre prelaska na async.
+#
+#   python -m bench.bench_driver_modes --requests 2000 --concurrency 200
+import argparse
+import asyncio
+import time
+
+from neo4j import AsyncGraphDatabase, GraphDatabase
+
+from app import settings
+from app.db.neo4j_driver import read_all
+
+QUERIES = {
+    "ping": "RETURN 1 AS ok",
+    "popular": """
+    MATCH (r:Recipe)
+    OPTIONAL MATCH (u:User)-[:LIKES]->(r)
+    WITH r, count(u) AS likes
+    RETURN r.id AS id, likes
+    ORDER BY likes DESC, r.title ASC
+    LIMIT 10
+    """,
+    "list": """
+    MATCH (r:Recipe)
+    RETURN r.id AS id, r.title AS title
+    ORDER BY title ASC
+    LIMIT 20
+    """,
+}
+
+
+async def run_mode(driver, cypher: str, total: int, concurrency: int) -> float:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            await read_all(driver, cypher)
+
+    # zagrevanje pool-a konekcija
+    await asyncio.gather(*(one() for _ in range(min(concurrency, total))))
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - t0)
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=200)
+    ap.add_argument("--query", choices=sorted(QUERIES), default="popular")
+    args = ap.parse_args()
+
+    auth = (settings.NEO4J_USER, settings.NEO4J_PASSWORD)
+    cypher = QUERIES[args.query]
+
+    sync_driver = GraphDatabase.driver(settings.NEO4J_URI, auth=auth)
+    try:
+        sync_rps = await run_mode(sync_driver, cypher, args.requests, args.concurrency)
+    finally:
+        sync_driver.close()
+
+    async_driver = AsyncGraphDatabase.driver(settings.NEO4J_URI, auth=auth)
+    try:
+        async_rps = await run_mode(async_driver, cypher, args.requests, args.concurrency)
+    finally:
+        await async_driver.close()
+
+    print(f"query={args.query} requests={args.requests} concurrency={args.concurrency}")
+    print(f"sync  (threadpool): {sync_rps:8.1f} req/s")
+    print(f"async (asyncio)   : {async_rps:8.1f} req/s")
+    print(f"speedup           : {async_rps / sync_rps:8.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+# Hot-key lajkovi: N usera istovremeno lajkuje isti recept.
+#   direct       - svaki lajk je svoja write transakcija (kao POST /likes bez LIKE_WRITE_BEHIND)
+#   write-behind - lajkovi idu kroz app.services.like_buffer (UNWIND batch-evi)
+# Posle svakog moda se lajkovi uklanjaju (unlike), pa baza ostaje kakva je bila.
+#
+#   python -m bench.bench_like_buffer --recipe-id <id> --users 2000 --concurrency 200
+import argparse
+import asyncio
+import time
+
+from neo4j import AsyncGraphDatabase
+
+from app import settings
+from app.db.neo4j_driver import read_all, write_single
+from app.services.like_buffer import LikeBuffer
+from app.services.like_writes import unlike_pairs
+
+LIKE_CYPHER = """
+MATCH (u:User {id: $uid})
+MATCH (r:Recipe {id: $rid})
+MERGE (u)-[:LIKES]->(r)
+ON CREATE SET r.like_count = coalesce(r.like_count, 0) + 1,
+              u.likes_given = coalesce(u.likes_given, 0) + 1,
+              u.likes_changed_at = timestamp()
+RETURN r.like_count AS like_count;
+"""
+
+
+async def not_liking(driver, rid: str, n: int):
+    rows = await read_all(
+        driver,
+        "MATCH (u:User) WHERE NOT EXISTS { (u)-[:LIKES]->(:Recipe {id: $rid}) } RETURN u.id AS id LIMIT $n",
+        rid=rid, n=n,
+    )
+    return [row["id"] for row in rows]
+
+
+async def run(label: str, uids, concurrency: int, like_one):
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(uid):
+        async with sem:
+            await like_one(uid)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(uid) for uid in uids))
+    return label, len(uids) / (time.perf_counter() - t0)
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--recipe-id", required=True)
+    ap.add_argument("--users", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=200)
+    args = ap.parse_args()
+
+    driver = AsyncGraphDatabase.driver(settings.NEO4J_URI, auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD))
+    rid = args.recipe_id
+    try:
+        uids = await not_liking(driver, rid, args.users)
+        pairs = [{"user_id": uid, "recipe_id": rid} for uid in uids]
+        results = []
+
+        results.append(await run(
+            "direct", uids, args.concurrency,
+            lambda uid: write_single(driver, LIKE_CYPHER, uid=uid, rid=rid),
+        ))
+        await unlike_pairs(driver, pairs)
+
+        buf = LikeBuffer()
+        buf.start(
+            driver,
+            settings.LIKE_BUFFER_MAX_PENDING,
+            settings.LIKE_BUFFER_BATCH_SIZE,
+            settings.LIKE_BUFFER_FLUSH_MS,
+            settings.LIKE_BUFFER_ENQUEUE_TIMEOUT,
+        )
+        t0 = time.perf_counter()
+        label, acked = await run("write-behind", uids, args.concurrency, lambda uid: buf.submit(uid, rid, True))
+        await buf.stop()
+        durable = len(uids) / (time.perf_counter() - t0)
+        metrics = buf.metrics()
+        await unlike_pairs(driver, pairs)
+
+        print(f"recipe={rid} users={len(uids)} concurrency={args.concurrency}")
+        for label, rps in results:
+            print(f"{label:<24}: {rps:9.1f} likes/s")
+        print(f"{'write-behind (ack)':<24}: {acked:9.1f} likes/s")
+        print(f"{'write-behind (in db)':<24}: {durable:9.1f} likes/s")
+        print(f"flushes={metrics['flushes']} avg_flush_ms={metrics['avg_flush_ms']} max_flush_ms={metrics['max_flush_ms']}")
+    finally:
+        await driver.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+# Konkurentne ocene jednog recepta: bez shardova (svaki upis menja Recipe cvor) i sa
+# RATING_SHARDS shardova. Isti handleri kao PUT/DELETE /ratings/{id}/rating; posle svakog moda
+# se ocene brisu i shardovi merge-uju, pa baza ostaje kakva je bila.
+#
+#   python -m bench.bench_rating_shards --recipe-id <id> --users 2000 --concurrency 200 --shards 16
+import argparse
+import asyncio
+import random
+import time
+
+from neo4j import AsyncGraphDatabase
+
+from app import settings
+from app.db.neo4j_driver import read_all
+from app.routers.ratings import delete_rating, get_rating, upsert_rating
+from app.schemas.rating import RatingUpsert
+from app.services.rating_shards import merge_rating_shards
+
+
+async def not_rating(driver, rid: str, n: int):
+    rows = await read_all(
+        driver,
+        "MATCH (u:User) WHERE NOT EXISTS { (u)-[:RATED]->(:Recipe {id: $rid}) } RETURN u.id AS id LIMIT $n",
+        rid=rid, n=n,
+    )
+    return [row["id"] for row in rows]
+
+
+async def hammer(driver, rid: str, uids, concurrency: int) -> float:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(uid):
+        async with sem:
+            await upsert_rating(rid, RatingUpsert(value=random.randint(1, 5)), uid, driver)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(uid) for uid in uids))
+    return len(uids) / (time.perf_counter() - t0)
+
+
+async def cleanup(driver, rid: str, uids, concurrency: int) -> None:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(uid):
+        async with sem:
+            await delete_rating(rid, uid, driver)
+
+    await asyncio.gather(*(one(uid) for uid in uids))
+    await merge_rating_shards(driver)
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--recipe-id", required=True)
+    ap.add_argument("--users", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=200)
+    ap.add_argument("--shards", type=int, default=16)
+    args = ap.parse_args()
+
+    driver = AsyncGraphDatabase.driver(settings.NEO4J_URI, auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD))
+    rid = args.recipe_id
+    try:
+        before = await get_rating(rid, None, driver)
+        uids = await not_rating(driver, rid, args.users)
+        results = []
+        for shards in (0, args.shards):
+            settings.RATING_SHARDS = shards
+            rps = await hammer(driver, rid, uids, args.concurrency)
+            summary = await get_rating(rid, None, driver)
+            await cleanup(driver, rid, uids, args.concurrency)
+            results.append((shards, rps, summary["rating_count"] - before["rating_count"]))
+
+        print(f"recipe={rid} users={len(uids)} concurrency={args.concurrency}")
+        for shards, rps, added in results:
+            label = "no shards" if shards == 0 else f"{shards} shards"
+            print(f"{label:<12}: {rps:9.1f} ratings/s  (rating_count +{added})")
+        print(f"speedup     : {results[1][1] / results[0][1]:9.2f}x")
+    finally:
+        await driver.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+# sr_norm_latin: stara implementacija (NFKD + regex nad celim stringom) vs translate tabela,
+# na opisima recepata, upitima za pretragu (ponavljaju se -> LRU kes) i batch-u (normalize_many).
+# Ne treba baza.
+#
+#   python -m bench.bench_text_norm --docs 20000 --queries 50000
+import argparse
+import random
+import re
+import time
+import unicodedata
+
+from app.utils.text_norm import normalize_many, sr_norm_latin
+
+WORDS = [
+    "Skuvaj", "testeninu", "u", "posoljenoj", "vodi", "Na", "maslinovom", "ulju", "propržiti", "beli", "luk",
+    "Dodaj", "paradajz", "sos", "i", "pečurke", "Pomešaj", "sve", "posluži", "toplo", "Ćevapi", "sa",
+    "lukom", "kajmakom", "Đuveč", "od", "povrća", "pirinča", "Šljive", "umotaj", "tijesto", "pržiti",
+    "žumance", "šećer", "brašno", "Peci", "10-12", "min.", "na", "200°C", "Čorba", "od", "graška",
+    "Sarma:", "kiseli", "kupus", "(mleveno", "meso)", "dinstati", "30", "minuta;", "ZAČINI", "po", "želji!",
+]
+QUERIES = [
+    "paradajz", "Ćevapi", "đuveč", "pasulj prebranac", "sarma", "pečurke", "Šljive", "čorba od graška",
+    "sos", "kajmak", "pita sa sirom", "Riblja čorba", "gibanica", "Palačinke", "pljeskavica", "ajvar",
+]
+
+
+def sr_norm_latin_old(s: str) -> str:
+    s = (s or "").strip().lower()
+    s = unicodedata.normalize("NFKD", s)
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    s = re.sub(r"[^a-z0-9\s]+", " ", s)
+    s = re.sub(r"\s+", " ", s).strip()
+    return s
+
+
+def make_doc(rnd: random.Random) -> str:
+    lines = [" ".join(rnd.choice(WORDS) for _ in range(rnd.randint(6, 14))) + "." for _ in range(rnd.randint(2, 6))]
+    return "\n".join(lines)
+
+
+def timed(fn, *args) -> float:
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=20000)
+    ap.add_argument("--queries", type=int, default=50000)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    rnd = random.Random(args.seed)
+    docs = [make_doc(rnd) for _ in range(args.docs)]
+    queries = [rnd.choice(QUERIES) for _ in range(args.queries)]
+
+    # ista izlazna vrednost osim za đ (stara verzija ga izbacuje, nova daje d)
+    mismatches = sum(
+        1 for s in docs + QUERIES if "đ" not in s.lower() and sr_norm_latin_old(s) != sr_norm_latin(s)
+    )
+
+    rows = [
+        ("docs, old", timed(lambda: [sr_norm_latin_old(s) for s in docs]), len(docs)),
+        ("docs, new", timed(lambda: [sr_norm_latin(s) for s in docs]), len(docs)),
+        ("docs, normalize_many", timed(normalize_many, docs), len(docs)),
+        ("queries, old", timed(lambda: [sr_norm_latin_old(s) for s in queries]), len(queries)),
+        ("queries, new (LRU)", timed(lambda: [sr_norm_latin(s) for s in queries]), len(queries)),
+    ]
+    chars = sum(len(s) for s in docs)
+    print(f"docs={len(docs)} (avg {chars / len(docs):.0f} chars) queries={len(queries)} mismatches={mismatches}")
+    for label, seconds, n in rows:
+        print(f"{label:<22}: {n / seconds:12.0f} strings/s  ({seconds * 1000:8.1f} ms)")
+    print(f"speedup docs          : {rows[0][1] / rows[2][1]:9.2f}x (normalize_many)")
+    print(f"speedup queries       : {rows[3][1] / rows[4][1]:9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,3 +18,27 @@ FOR (c:Category) REQUIRE c.name IS UNIQUE;
 CREATE FULLTEXT INDEX recipeDescNormIndex IF NOT EXISTS
 FOR (r:Recipe)
 ON EACH [r.description_norm];
+
+// Range index za keyset paginaciju listi recepata (ORDER BY title, id)
+CREATE INDEX recipe_title_id IF NOT EXISTS
+FOR (r:Recipe) ON (r.title, r.id);
+
+// Range index nad materijalizovanim brojem lajkova (/recipes/popular kao top-K po indeksu)
+CREATE INDEX recipe_like_count IF NOT EXISTS
+FOR (r:Recipe) ON (r.like_count);
+
+// Range index nad Bayesovim skorom ocena (/recipes/top_rated kao top-K po indeksu)
+CREATE INDEX recipe_rating_score IF NOT EXISTS
+FOR (r:Recipe) ON (r.rating_score);
+
+// Vreme poslednje izmene recepta (ms) - GET /recipes/export?since=... ide po (updated_at, id)
+CREATE INDEX recipe_updated_at IF NOT EXISTS
+FOR (r:Recipe) ON (r.updated_at, r.id);
+
+// Normalizovano ime sastojka (sr_norm_latin) - pretraga po sastojcima ide preko ovog indeksa
+CREATE INDEX ingredient_name_norm IF NOT EXISTS
+FOR (i:Ingredient) ON (i.name_norm);
+
+// Shardovi agregata ocena (RATING_SHARDS > 0) - MERGE po (recipe_id, shard) mora biti jedinstven
+CREATE CONSTRAINT rating_shard_key IF NOT EXISTS
+FOR (s:RatingShard) REQUIRE (s.recipe_id, s.shard) IS UNIQUE;
@@ -0,0 +1,16 @@
+// Backfill / popravka materijalizovanih brojaca iz relacija:
+//   Recipe.like_count, User.likes_given, User.recipes_created
+// Pokrece se posle seed-a, a moze i rucno ako se brojaci razidju sa relacijama:
+//   cypher-shell -u neo4j -p <lozinka> -d neo4j --file neo4j/init/counters.cypher
+MATCH (r:Recipe)
+CALL {
+  WITH r
+  SET r.like_count = COUNT { (:User)-[:LIKES]->(r) }
+} IN TRANSACTIONS OF 1000 ROWS;
+
+MATCH (u:User)
+CALL {
+  WITH u
+  SET u.likes_given = COUNT { (u)-[:LIKES]->(:Recipe) },
+      u.recipes_created = COUNT { (u)-[:CREATED]->(:Recipe) }
+} IN TRANSACTIONS OF 1000 ROWS;
@@ -1,3 +1,5 @@
+// Gruba inicijalna vrednost (samo toLower, bez skidanja dijakritika i interpunkcije kao sr_norm_latin).
+// Tacnu vrednost upisuje: python -m app.jobs.description_norm (recepti bez description_norm_v)
 MATCH (r:Recipe)
 WHERE r.description IS NOT NULL AND (r.description_norm IS NULL OR r.description_norm = "")
 SET r.description_norm = toLower(r.description);
\ No newline at end of file
@@ -232,10 +232,12 @@ MERGE (ana)-[r2:RATED]->(omlet)  ON CREATE SET r2.value=4, r2.createdAt=datetime
 MERGE (marko)-[r3:RATED]->(pica) ON CREATE SET r3.value=3, r3.createdAt=datetime();
 
 // ============================
-// (rating_sum i rating_count) ZA SVE RECEPTE
+// (rating_sum, rating_count i rating_score) ZA SVE RECEPTE
 // ============================
 MATCH (r:Recipe)
 OPTIONAL MATCH (:User)-[rt:RATED]->(r)
 WITH r, collect(rt.value) AS vals
 SET r.rating_sum = reduce(s = 0, v IN vals | s + v),
-    r.rating_count = size(vals);
\ No newline at end of file
+    r.rating_count = size(vals)
+// rating_score sa podrazumevanim RATING_PRIOR_MEAN=3.5 i RATING_PRIOR_WEIGHT=5 (app/db/ratings.py)
+SET r.rating_score = (5 * 3.5 + r.rating_sum) / (5 + r.rating_count);
\ No newline at end of file
@@ -31,6 +31,12 @@ export const api = {
   // recipes
   getRecipe: (id) => http(`/recipes/${encodeURIComponent(id)}`),
 
+  // recept + like_count + liked_by_me + rating (sa my_rating) u jednom pozivu
+  getRecipeView: (id, userId) => {
+    const qs = userId ? `?user_id=${encodeURIComponent(userId)}` : "";
+    return http(`/recipes/${encodeURIComponent(id)}/view${qs}`);
+  },
+
   popular: (skip = 0, limit = 20) =>
     http(`/recipes/popular?skip=${skip}&limit=${limit}`),
 
@@ -115,14 +115,6 @@ export default function RecipePage() {
   const { userId } = useCurrentUser();
 
 
-  async function loadRating(recipeId) {
-    try {
-      const r = await api.getRating(recipeId, userId);
-      setRating(r);
-    } catch (e) {
-      setErr(e.message || String(e));
-    }
-  }
   async function setMyRating(value) {
     if (!data || !userId) return;
     setRatingBusy(true);
@@ -265,18 +257,19 @@ export default function RecipePage() {
       setLoading(true);
       setErr("");
       try {
-        const r = await api.getRecipe(id);
+        // recept, lajkovi, da li je user lajkovao i ocena - jedan request
+        const r = await api.getRecipeView(id, userId);
         loadCategories();
 
         setData(r);
-
-        // likes count
-        const lc = await api.getRecipeLikesCount(id); // { recipe_id, likes }
-        setLikesCount(lc.likes);
-        const ex = await api.likeExists(userId, id);
-        await loadRating(id);
-        // duplo da ga negiram da sigurno bude bool, msm nema potrebe al kao
-        setLiked(!!ex.exists);
+        setLikesCount(r.like_count);
+        setLiked(r.liked_by_me);
+        setRating({
+          rating_sum: r.rating_sum,
+          rating_count: r.rating_count,
+          rating_avg: r.rating_avg,
+          my_rating: r.my_rating,
+        });
       } catch (e) {
         setErr(e.message || String(e));
       } finally {